@@ -0,0 +1,102 @@
+"""
+Análise e validação das entradas dos comandos de motoristas.
+Padrões pré-compilados para placa (antiga ABC1234 e Mercosul ABC1D23) e LH;
+a entrada é normalizada uma única vez e vira um objeto tipado reutilizado
+pelo handler, pelos índices e pelo armazenamento.
+"""
+import re
+from typing import NamedTuple, Optional, Tuple
+
+RE_PLACA_ANTIGA = re.compile(r'[A-Z]{3}[0-9]{4}')
+RE_PLACA_MERCOSUL = re.compile(r'[A-Z]{3}[0-9][A-Z][0-9]{2}')
+RE_PLACA = re.compile(r'[A-Z]{3}[0-9][A-Z0-9][0-9]{2}')  # qualquer um dos dois formatos
+RE_LH = re.compile(r'[A-Z0-9]{13}')
+_RE_SEPARADORES_PLACA = re.compile(r'[\s.\-]')
+_RE_LISTA_PLACAS = re.compile(r'[,;/]')
+
+USO_ADICIONAR = 'Use: /add LH NOME PLACA (placas extras separadas por vírgula)'
+
+
+class ErroValidacao(ValueError):
+    """Entrada de comando inválida (mensagem pronta para o usuário)."""
+
+
+class ComandoAdicionar(NamedTuple):
+    lh: str
+    nome: str
+    placas: Tuple[str, ...]
+
+    @property
+    def placas_texto(self):
+        """Placas no formato armazenado ('ABC1234,DEF5G67')."""
+        return ','.join(self.placas)
+
+
+class Consulta(NamedTuple):
+    tipo: str   # 'placa' | 'lh'
+    valor: str
+
+
+def normalizar_placa(texto: str) -> Optional[str]:
+    """'abc-1234' -> 'ABC1234'; None se não for uma placa válida."""
+    placa = _RE_SEPARADORES_PLACA.sub('', texto).upper()
+    return placa if RE_PLACA.fullmatch(placa) else None
+
+
+def normalizar_lh(texto: str) -> Optional[str]:
+    """LH em maiúsculas sem espaços; None se não tiver 13 caracteres alfanuméricos."""
+    lh = texto.strip().upper()
+    return lh if RE_LH.fullmatch(lh) else None
+
+
+def _placas_do_token(token: str):
+    """Placas de um token ('ABC1234,DEF5G67'); None se alguma parte não for placa."""
+    partes = [p for p in _RE_LISTA_PLACAS.split(token) if p]
+    if not partes:
+        return []
+    placas = [normalizar_placa(p) for p in partes]
+    return None if None in placas else placas
+
+
+def analisar_adicionar(texto: str) -> ComandoAdicionar:
+    """Converte 'LH NOME PLACA[,PLACA...]' em ComandoAdicionar.
+
+    As placas são lidas do fim da linha para o início (podem vir separadas por
+    vírgula ou em tokens separados); o que sobra entre a LH e as placas é o nome.
+
+    Raises:
+        ErroValidacao: com a mensagem para o usuário
+    """
+    tokens = texto.split()
+    if len(tokens) < 3:
+        raise ErroValidacao(f'Formato inválido. {USO_ADICIONAR}')
+
+    lh = normalizar_lh(tokens[0])
+    if lh is None:
+        raise ErroValidacao(f'LH inválida: {tokens[0]} (esperado 13 letras/números).')
+
+    placas = []
+    restantes = tokens[1:]
+    while len(restantes) > 1:
+        placas_token = _placas_do_token(restantes[-1])
+        if placas_token is None:
+            break
+        placas[:0] = placas_token
+        restantes.pop()
+    if not placas:
+        raise ErroValidacao(f'Placa inválida: {tokens[-1]} (use ABC1234 ou ABC1D23).')
+
+    nome = ' '.join(restantes)
+    # Remove duplicatas mantendo a ordem
+    return ComandoAdicionar(lh, nome, tuple(dict.fromkeys(placas)))
+
+
+def analisar_consulta(texto: str) -> Optional[Consulta]:
+    """Identifica se o valor buscado é uma placa ou uma LH (None se nenhum dos dois)."""
+    placa = normalizar_placa(texto)
+    if placa:
+        return Consulta('placa', placa)
+    lh = normalizar_lh(texto)
+    if lh:
+        return Consulta('lh', lh)
+    return None
@@ -0,0 +1 @@
+"""Benchmarks do bot (não fazem parte da imagem de produção)."""
@@ -0,0 +1,197 @@
+"""
+Servidor local que imita a API do Telegram para benchmarks.
+
+Implementa getUpdates (com confirmação por offset, como o Telegram),
+sendMessage, sendDocument e responde {"ok": true} para os demais métodos.
+Latência e respostas 429 são configuráveis.
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_RE_CHAT_ID_MULTIPART = re.compile(rb'name="chat_id"\r\n\r\n(-?\d+)')
+
+
+class ApiTelegramFalsa:
+    """Stand-in de api.telegram.org rodando em 127.0.0.1.
+
+    Args:
+        latencia (float): atraso (s) aplicado a cada requisição
+        taxa_429 (float): probabilidade (0-1) de responder 429 em sendMessage/sendDocument
+        retry_after (int): valor de retry_after informado nas respostas 429
+    """
+
+    def __init__(self, latencia=0.0, taxa_429=0.0, retry_after=1, semente=42):
+        self.latencia = latencia
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self._random = random.Random(semente)
+        self._lock = threading.Condition()
+        self._pendentes = []            # updates ainda não confirmados
+        self._proximo_update_id = 1
+        self.entregues = {}             # update_id -> instante da 1a entrega
+        self.chat_do_update = {}        # update_id -> chat_id
+        self.respostas = []             # (instante, metodo, chat_id)
+        self.respostas_por_chat = {}    # chat_id -> [instantes]
+        self.requisicoes = {}           # metodo -> contagem
+        self.respostas_429 = 0
+        self._servidor = None
+        self._thread = None
+
+    @property
+    def url_base(self):
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}/botbench/"
+
+    def iniciar(self):
+        api = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                api._tratar(self)
+
+            def do_POST(self):
+                api._tratar(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._servidor.daemon_threads = True
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+
+    # ------------------------------------------------------------------
+    # Carga de trabalho
+    # ------------------------------------------------------------------
+    def enfileirar_mensagem(self, chat_id, texto, nome='Bench'):
+        """Adiciona um update de mensagem de texto. Retorna o update_id."""
+        with self._lock:
+            update_id = self._proximo_update_id
+            self._proximo_update_id += 1
+            self._pendentes.append({
+                'update_id': update_id,
+                'message': {
+                    'message_id': update_id,
+                    'from': {'id': chat_id, 'first_name': nome},
+                    'chat': {'id': chat_id, 'type': 'private'},
+                    'date': int(time.time()),
+                    'text': texto,
+                },
+            })
+            self.chat_do_update[update_id] = chat_id
+            return update_id
+
+    def enfileirar_update(self, update):
+        """Adiciona um update arbitrário (callback_query, inline_query...)."""
+        with self._lock:
+            update = dict(update, update_id=self._proximo_update_id)
+            self._proximo_update_id += 1
+            self._pendentes.append(update)
+            return update['update_id']
+
+    def aguardar_respostas(self, esperadas, timeout=120.0):
+        """Espera até cada chat ter recebido o número de respostas esperado.
+
+        Args:
+            esperadas (dict): chat_id -> quantidade de respostas
+        Retorna:
+            bool: True se todas chegaram antes do timeout
+        """
+        limite = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                faltando = any(
+                    len(self.respostas_por_chat.get(chat_id, ())) < n
+                    for chat_id, n in esperadas.items()
+                )
+                if not faltando:
+                    return True
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._lock.wait(min(restante, 0.5))
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    def _tratar(self, handler):
+        url = urlparse(handler.path)
+        metodo = url.path.rsplit('/', 1)[-1]
+        tamanho = int(handler.headers.get('Content-Length') or 0)
+        corpo = handler.rfile.read(tamanho) if tamanho else b''
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        tipo = handler.headers.get('Content-Type', '')
+        if corpo and tipo.startswith('application/x-www-form-urlencoded'):
+            params.update({k: v[-1] for k, v in parse_qs(corpo.decode()).items()})
+        elif corpo and tipo.startswith('application/json'):
+            params.update(json.loads(corpo))
+        elif corpo and tipo.startswith('multipart/form-data'):
+            achado = _RE_CHAT_ID_MULTIPART.search(corpo)
+            if achado:
+                params['chat_id'] = achado.group(1).decode()
+
+        if self.latencia:
+            time.sleep(self.latencia)
+
+        with self._lock:
+            self.requisicoes[metodo] = self.requisicoes.get(metodo, 0) + 1
+
+        if metodo == 'getUpdates':
+            status, resposta = 200, {'ok': True, 'result': self._get_updates(params)}
+        elif metodo in ('sendMessage', 'sendDocument') and self.taxa_429 and \
+                self._random.random() < self.taxa_429:
+            with self._lock:
+                self.respostas_429 += 1
+            status, resposta = 429, {
+                'ok': False, 'error_code': 429,
+                'description': f'Too Many Requests: retry after {self.retry_after}',
+                'parameters': {'retry_after': self.retry_after},
+            }
+        else:
+            if metodo in ('sendMessage', 'sendDocument', 'editMessageText'):
+                self._registrar_resposta(metodo, params.get('chat_id'))
+            status, resposta = 200, {'ok': True, 'result': {'message_id': 1}}
+
+        dados = json.dumps(resposta).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(dados)))
+        handler.end_headers()
+        handler.wfile.write(dados)
+
+    def _get_updates(self, params):
+        offset = int(params.get('offset') or 0)
+        limite = int(params.get('limit') or 100)
+        agora = time.monotonic()
+        with self._lock:
+            if offset:
+                # Como no Telegram: offset confirma todos os updates anteriores
+                self._pendentes = [u for u in self._pendentes if u['update_id'] >= offset]
+            lote = self._pendentes[:limite]
+            for update in lote:
+                self.entregues.setdefault(update['update_id'], agora)
+            return lote
+
+    def _registrar_resposta(self, metodo, chat_id):
+        agora = time.monotonic()
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            pass
+        with self._lock:
+            self.respostas.append((agora, metodo, chat_id))
+            self.respostas_por_chat.setdefault(chat_id, []).append(agora)
+            self._lock.notify_all()
@@ -0,0 +1,217 @@
+"""
+Micro-benchmarks e curvas de escala de RoboBolsao e PlanilhaFechamento.
+
+Para cada tamanho de base mede tempo (e pico de memória via tracemalloc) de:
+adicionar_motoristas, pesquisar_motoristas, remover_motorista,
+obter_relatorio_fechamento, resumo, posicao_na_fila, chamar_proximo e PlanilhaFechamento.criar_ou_atualizar_planilha
+(criação e atualização de um arquivo existente, que passa pelo delete_rows).
+Ao final estima o expoente de crescimento de cada operação entre tamanhos
+(~0 = constante, ~1 = linear, ~2 = quadrático).
+
+Uso:
+    python -m benchmarks.bench_estruturas
+    python -m benchmarks.bench_estruturas --tamanhos 1000 10000 100000 1000000 --max-planilha 1000
+    python -m benchmarks.bench_estruturas --saida estruturas.json --sem-memoria
+"""
+import argparse
+import gc
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+from benchmarks.dados_sinteticos import gerar_lh, gerar_linhas, gerar_placa
+from estrutura import RoboBolsao
+
+
+def _cronometrar(funcao, memoria=False):
+    """Executa funcao() e retorna (resultado, segundos, pico_mb|None)."""
+    gc.collect()
+    if memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        resultado = funcao()
+    finally:
+        duracao = time.perf_counter() - inicio
+        pico = None
+        if memoria:
+            pico = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+    return resultado, duracao, pico
+
+
+def _pico(funcao, args):
+    """Pico de memória (MB) numa execução separada, para o tracemalloc não distorcer o tempo."""
+    if not args.memoria:
+        return None
+    return _cronometrar(funcao, memoria=True)[2]
+
+
+def _registro(operacao, n, ops, segundos, pico_mb=None):
+    return {
+        'operacao': operacao,
+        'n': n,
+        'ops': ops,
+        'total_s': round(segundos, 6),
+        'por_op_us': round(segundos / ops * 1e6, 3) if ops else None,
+        'pico_mb': round(pico_mb, 3) if pico_mb is not None else None,
+    }
+
+
+def medir_tamanho(n, args, diretorio):
+    """Roda todas as operações para uma base de n motoristas."""
+    from planilha_fechamento import PlanilhaFechamento
+
+    resultados = []
+    linhas = gerar_linhas(n, proporcao_multiplaca=args.multiplaca)
+    rng = random.Random(n)
+
+    def popular():
+        bolsao = RoboBolsao()
+        for linha in linhas:
+            bolsao.adicionar_motoristas(linha)
+        return bolsao
+
+    bolsao, segundos, _ = _cronometrar(popular)
+    resultados.append(_registro('adicionar_motoristas', n, n, segundos))
+    if args.memoria:
+        del bolsao
+        bolsao, _, pico = _cronometrar(popular, memoria=True)
+        resultados[-1]['pico_mb'] = round(pico, 3)
+
+    # Consultas: placas, LHs e valores inexistentes (pior caso da varredura)
+    consultas = []
+    for i in range(args.consultas):
+        j = rng.randrange(n)
+        consultas.append((gerar_placa(j), gerar_lh(j), 'ZZZ9999')[i % 3])
+
+    def pesquisar():
+        for valor in consultas:
+            bolsao.pesquisar_motoristas(valor)
+
+    _, segundos, _ = _cronometrar(pesquisar)
+    resultados.append(_registro('pesquisar_motoristas', n, len(consultas), segundos))
+
+    # 10% concluídos e 5% cancelados para o relatório ter histórico
+    for i in range(0, n, 10):
+        bolsao.marcar_concluido(gerar_lh(i))
+    for i in range(5, n, 20):
+        bolsao.marcar_cancelado(gerar_lh(i))
+
+    relatorio, segundos, _ = _cronometrar(bolsao.obter_relatorio_fechamento)
+    resultados.append(_registro('obter_relatorio_fechamento', n, 1, segundos,
+                                _pico(bolsao.obter_relatorio_fechamento, args)))
+
+    def resumir():
+        for _ in range(args.consultas):
+            bolsao.resumo(dono=1)
+
+    _, segundos, _ = _cronometrar(resumir)
+    resultados.append(_registro('resumo', n, args.consultas, segundos))
+
+    def posicionar():
+        for valor in consultas:
+            bolsao.posicao_na_fila(valor)
+
+    _, segundos, _ = _cronometrar(posicionar)
+    resultados.append(_registro('posicao_na_fila', n, len(consultas), segundos))
+
+    chamadas = min(args.consultas, len(bolsao.fila))
+
+    def chamar():
+        for _ in range(chamadas):
+            bolsao.chamar_proximo()
+
+    _, segundos, _ = _cronometrar(chamar)
+    resultados.append(_registro('chamar_proximo', n, chamadas, segundos))
+
+    if n <= args.max_planilha:
+        planilha = PlanilhaFechamento(diretorio=Path(diretorio) / f'n{n}')
+
+        def criar():
+            Path(planilha.obter_caminho()).unlink(missing_ok=True)
+            return planilha.criar_ou_atualizar_planilha(relatorio)
+
+        def atualizar():
+            # Arquivo já existe: recarrega e apaga as linhas uma a uma antes de reescrever
+            return planilha.criar_ou_atualizar_planilha(relatorio)
+
+        _, segundos, _ = _cronometrar(criar)
+        resultados.append(_registro('planilha_criar', n, 1, segundos, _pico(criar, args)))
+        _, segundos, _ = _cronometrar(atualizar)
+        resultados.append(_registro('planilha_atualizar', n, 1, segundos, _pico(atualizar, args)))
+
+    remocoes = [gerar_lh(rng.randrange(n)) for _ in range(args.consultas)]
+
+    def remover():
+        for lh in remocoes:
+            bolsao.remover_motorista(lh)
+
+    _, segundos, _ = _cronometrar(remover)
+    resultados.append(_registro('remover_motorista', n, len(remocoes), segundos))
+    return resultados
+
+
+def expoentes_de_escala(resultados):
+    """Estima, por operação, o expoente k de por_op ~ n**k entre tamanhos consecutivos."""
+    por_operacao = {}
+    for r in resultados:
+        por_operacao.setdefault(r['operacao'], []).append(r)
+    curvas = {}
+    for operacao, pontos in por_operacao.items():
+        pontos = sorted(pontos, key=lambda r: r['n'])
+        trechos = []
+        for a, b in zip(pontos, pontos[1:]):
+            if a['por_op_us'] and b['por_op_us']:
+                k = math.log(b['por_op_us'] / a['por_op_us']) / math.log(b['n'] / a['n'])
+                trechos.append({'de': a['n'], 'ate': b['n'], 'expoente': round(k, 2)})
+        curvas[operacao] = trechos
+    return curvas
+
+
+def _argumentos(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--consultas', type=int, default=300, help='buscas/remoções por tamanho')
+    parser.add_argument('--multiplaca', type=float, default=0.1, help='proporção de motoristas com 2 placas')
+    parser.add_argument('--max-planilha', type=int, default=1000,
+                        help='maior base usada na planilha (a atualização é quadrática no delete_rows)')
+    parser.add_argument('--sem-memoria', dest='memoria', action='store_false',
+                        help='não mede pico de memória (mais rápido)')
+    parser.add_argument('--saida', help='grava os resultados em JSON neste arquivo')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix='bench_estruturas_') as diretorio:
+        for n in sorted(args.tamanhos):
+            for registro in medir_tamanho(n, args, diretorio):
+                resultados.append(registro)
+                print(json.dumps(registro), file=sys.stderr)
+
+    saida = {
+        'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'parametros': vars(args),
+        'resultados': resultados,
+        'escala': expoentes_de_escala(resultados),
+    }
+    texto = json.dumps(saida, indent=2)
+    if args.saida:
+        Path(args.saida).write_text(texto)
+    print(texto)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""
+Benchmark ponta a ponta do bot contra uma API do Telegram local.
+
+Cada cenário roda em um subprocesso próprio (memória medida isoladamente),
+num diretório temporário, com o BotTelegram real apontado para a
+ApiTelegramFalsa via `link_base`.
+
+Uso:
+    python -m benchmarks.bench_ponta_a_ponta
+    python -m benchmarks.bench_ponta_a_ponta --cenarios busca planilha --n 2000 --latencia 0.02
+    python -m benchmarks.bench_ponta_a_ponta --taxa-429 0.05 --saida resultado.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+from benchmarks.api_telegram_falsa import ApiTelegramFalsa
+from benchmarks.dados_sinteticos import gerar_lh, gerar_linhas, gerar_placa
+
+SENHA = 'bench'
+CHAT_BASE = 100000
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def _autenticar(bot, chat_ids, papel='operador'):
+    for chat_id in chat_ids:
+        bot.gerenciador_usuarios.autenticar(chat_id, SENHA, papel=papel)
+
+
+def _pre_carregar(bot, n):
+    for linha in gerar_linhas(n):
+        bot.bot_bolsao.adicionar_motoristas(linha)
+
+
+# ----------------------------------------------------------------------
+# Cenários: preparam o estado, enfileiram updates e retornam
+# {chat_id: respostas esperadas}
+# ----------------------------------------------------------------------
+def cenario_importacao(bot, api, args):
+    """/add em massa (importação de escala)."""
+    chats = [CHAT_BASE + i for i in range(args.n)]
+    _autenticar(bot, chats)
+    for chat_id, linha in zip(chats, gerar_linhas(args.n)):
+        api.enfileirar_mensagem(chat_id, f'/add {linha}')
+    return {chat_id: 1 for chat_id in chats}
+
+
+def cenario_busca(bot, api, args):
+    """Tempestade de /placa e /lh sobre uma base pré-carregada."""
+    _pre_carregar(bot, args.motoristas)
+    chats = [CHAT_BASE + i for i in range(args.n)]
+    _autenticar(bot, chats)
+    rng = random.Random(7)
+    for i, chat_id in enumerate(chats):
+        j = rng.randrange(args.motoristas)
+        texto = f'/placa {gerar_placa(j)}' if i % 2 == 0 else f'/lh {gerar_lh(j)}'
+        api.enfileirar_mensagem(chat_id, texto)
+    return {chat_id: 1 for chat_id in chats}
+
+
+def cenario_concluidos(bot, api, args):
+    """/concluidos em massa, cada chat dono do motorista que conclui."""
+    chats = [CHAT_BASE + i for i in range(args.n)]
+    _autenticar(bot, chats)
+    for i, (chat_id, linha) in enumerate(zip(chats, gerar_linhas(args.n))):
+        bot.bot_bolsao.adicionar_motoristas(linha)
+        bot.gerenciador_usuarios.adicionar_motorista(chat_id, gerar_lh(i))
+        api.enfileirar_mensagem(chat_id, f'/concluidos {gerar_lh(i)}')
+    return {chat_id: 1 for chat_id in chats}
+
+
+def cenario_planilha(bot, api, args):
+    """/planilha concorrente sobre uma base pré-carregada."""
+    _pre_carregar(bot, args.motoristas)
+    chats = [CHAT_BASE + i for i in range(args.concorrencia_planilha)]
+    _autenticar(bot, chats, papel='supervisor')
+    for chat_id in chats:
+        api.enfileirar_mensagem(chat_id, '/planilha')
+    # "[INFO] Gerando...", documento e "[OK] Planilha ... enviada"
+    return {chat_id: 3 for chat_id in chats}
+
+
+CENARIOS = {
+    'importacao': cenario_importacao,
+    'busca': cenario_busca,
+    'concluidos': cenario_concluidos,
+    'planilha': cenario_planilha,
+}
+
+
+def executar_cenario(nome, args):
+    """Executa um cenário no processo atual e retorna as métricas."""
+    diretorio = tempfile.mkdtemp(prefix=f'bench_{nome}_')
+    os.chdir(diretorio)
+    os.environ.setdefault('log_nivel', 'WARNING')
+    os.environ['log_arquivo'] = os.path.join(diretorio, 'bot.log')
+
+    import main
+    from estrutura import RoboBolsao
+    from seguranca import Segredo
+
+    api = ApiTelegramFalsa(latencia=args.latencia, taxa_429=args.taxa_429).iniciar()
+    bot = main.BotTelegram(bot_bolsao=RoboBolsao(), clear_on_start=False, retry_delay=1)
+    bot.token = 'bench'
+    bot.link_base = api.url_base
+    bot.senha_planilha = Segredo(SENHA)
+    bot.senha_autenticacao = Segredo(SENHA)
+
+    tempos_planilha = []
+    criar_original = bot.planilha.criar_ou_atualizar_planilha
+
+    def criar_medindo(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return criar_original(*args, **kwargs)
+        finally:
+            tempos_planilha.append(time.perf_counter() - inicio)
+
+    bot.planilha.criar_ou_atualizar_planilha = criar_medindo
+
+    inicio_preparo = time.perf_counter()
+    esperadas = CENARIOS[nome](bot, api, args)
+    preparo = time.perf_counter() - inicio_preparo
+
+    polling = threading.Thread(target=bot.rodarbot, daemon=True)
+    polling.start()
+    completo = api.aguardar_respostas(esperadas, timeout=args.timeout)
+
+    latencias = []
+    with api._lock:
+        primeira_entrega = min(api.entregues.values(), default=None)
+        ultima_resposta = None
+        for update_id, entregue in api.entregues.items():
+            chat_id = api.chat_do_update.get(update_id)
+            respostas = api.respostas_por_chat.get(chat_id, [])
+            n = esperadas.get(chat_id, 0)
+            if n and len(respostas) >= n:
+                fim = respostas[n - 1]
+                latencias.append(fim - entregue)
+                ultima_resposta = max(ultima_resposta or fim, fim)
+        requisicoes = dict(api.requisicoes)
+        respostas_429 = api.respostas_429
+
+    # Desligamento gracioso, como num SIGTERM: drena tarefas/fila e grava o estado
+    inicio_desligamento = time.perf_counter()
+    bot.parar()
+    polling.join(timeout=bot.prazo_desligamento + 10)
+    desligamento = time.perf_counter() - inicio_desligamento
+    api.parar()
+
+    duracao = (ultima_resposta - primeira_entrega) if ultima_resposta and primeira_entrega else None
+    return {
+        'cenario': nome,
+        'completo': completo,
+        'updates': len(esperadas),
+        'respondidos': len(latencias),
+        'preparo_s': round(preparo, 4),
+        'duracao_s': round(duracao, 4) if duracao else None,
+        'updates_por_s': round(len(latencias) / duracao, 2) if duracao else None,
+        'latencia_p50_ms': round(_percentil(latencias, 50) * 1000, 2) if latencias else None,
+        'latencia_p99_ms': round(_percentil(latencias, 99) * 1000, 2) if latencias else None,
+        # ru_maxrss é em KB no Linux
+        'memoria_pico_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'planilha_builds': len(tempos_planilha),
+        'planilha_p50_s': round(_percentil(tempos_planilha, 50), 4) if tempos_planilha else None,
+        'planilha_max_s': round(max(tempos_planilha), 4) if tempos_planilha else None,
+        'desligamento_s': round(desligamento, 4),
+        'requisicoes': requisicoes,
+        'respostas_429': respostas_429,
+    }
+
+
+def _argumentos(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument('--n', type=int, default=300, help='comandos por cenário')
+    parser.add_argument('--motoristas', type=int, default=5000, help='base pré-carregada (busca/planilha)')
+    parser.add_argument('--concorrencia-planilha', type=int, default=5)
+    parser.add_argument('--latencia', type=float, default=0.0, help='latência da API falsa (s)')
+    parser.add_argument('--taxa-429', type=float, default=0.0, help='probabilidade de 429 nos envios')
+    parser.add_argument('--timeout', type=float, default=300.0)
+    parser.add_argument('--saida', help='grava os resultados em JSON neste arquivo')
+    parser.add_argument('--interno', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    if args.interno:
+        print(json.dumps(executar_cenario(args.interno, args)))
+        return
+
+    argv_base = [a for a in (argv if argv is not None else sys.argv[1:])]
+    resultados = []
+    for nome in args.cenarios:
+        processo = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_ponta_a_ponta', *argv_base, '--interno', nome],
+            cwd=RAIZ, capture_output=True, text=True,
+        )
+        if processo.returncode != 0:
+            resultados.append({'cenario': nome, 'erro': processo.stderr.strip()[-2000:]})
+        else:
+            resultados.append(json.loads(processo.stdout.strip().splitlines()[-1]))
+        print(json.dumps(resultados[-1], ensure_ascii=False), file=sys.stderr)
+
+    saida = {
+        'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parametros': {k: v for k, v in vars(args).items() if k not in ('interno', 'saida')},
+        'resultados': resultados,
+    }
+    texto = json.dumps(saida, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(texto)
+    print(texto)
+
+
+if __name__ == '__main__':
+    main()
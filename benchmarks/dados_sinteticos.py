@@ -0,0 +1,41 @@
+"""
+Geração determinística de motoristas sintéticos para os benchmarks.
+"""
+import random
+import string
+
+_LETRAS = string.ascii_uppercase
+_NOMES = ['Joao', 'Maria', 'Pedro', 'Ana', 'Carlos', 'Paula', 'Lucas', 'Julia']
+_SOBRENOMES = ['Silva', 'Santos', 'Costa', 'Souza', 'Oliveira', 'Lima', 'Pereira']
+
+
+def gerar_lh(i):
+    """LH com 13 caracteres (formato aceito pela busca)."""
+    return f'LH{i:011d}'
+
+
+def gerar_placa(i):
+    """Placa de 7 caracteres, única para i < 26**3 * 10**4.
+
+    Índices pares usam o formato antigo (ABC1234), ímpares o Mercosul (ABC1D23).
+    """
+    resto, numero = divmod(i, 10000)
+    letras = _LETRAS[(resto // 676) % 26] + _LETRAS[(resto // 26) % 26] + _LETRAS[resto % 26]
+    if i % 2 == 0:
+        return f'{letras}{numero:04d}'
+    return f'{letras}{numero // 1000}{_LETRAS[(numero // 100) % 10]}{numero % 100:02d}'
+
+
+def gerar_linha_motorista(i, proporcao_multiplaca=0.1, rng=None):
+    """Linha no formato do /add: 'LH NOME PLACA[,PLACA2]'."""
+    rng = rng or random.Random(i)
+    nome = f'{rng.choice(_NOMES)} {rng.choice(_SOBRENOMES)}'
+    placas = gerar_placa(i)
+    if rng.random() < proporcao_multiplaca:
+        placas += ',' + gerar_placa(i + 7_000_000)
+    return f'{gerar_lh(i)} {nome} {placas}'
+
+
+def gerar_linhas(n, proporcao_multiplaca=0.1, semente=42):
+    rng = random.Random(semente)
+    return [gerar_linha_motorista(i, proporcao_multiplaca, rng) for i in range(n)]
@@ -0,0 +1,109 @@
+"""
+Mede a imagem Docker de produção: tamanho, tempo de build e tempo de boot.
+
+O boot é medido do `docker run` até a linha "Inicialização em ..." aparecer
+no log do container (o próprio bot informa ali o tempo de cada fase). O token
+é falso: o bot sobe, tenta falar com a API e é parado com `docker stop`, o que
+também mede o desligamento gracioso.
+
+Uso:
+    python -m benchmarks.medir_imagem
+    python -m benchmarks.medir_imagem --execucoes 5 --tag motorista-bot:teste --saida imagem.json
+    python -m benchmarks.medir_imagem --sem-build --tag motorista-bot:latest
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+RE_INICIALIZACAO = re.compile(r'Inicialização em (\d+) ms \(([^)]*)\)')
+
+
+def _docker(*args, check=True):
+    return subprocess.run(['docker', *args], capture_output=True, text=True, check=check)
+
+
+def construir(tag, alvo='producao'):
+    inicio = time.perf_counter()
+    _docker('build', '--target', alvo, '-t', tag, str(RAIZ))
+    return time.perf_counter() - inicio
+
+
+def tamanho_mb(tag):
+    return int(_docker('image', 'inspect', '-f', '{{.Size}}', tag).stdout.strip()) / 1024 / 1024
+
+
+def medir_boot(tag, timeout=60):
+    """Sobe um container, espera a linha de inicialização e o para."""
+    inicio = time.perf_counter()
+    container = _docker(
+        'run', '-d',
+        '-e', 'token_telegram=0:bench', '-e', 'senha_autenticacao=bench', '-e', 'senha_planilha=bench',
+        tag,
+    ).stdout.strip()
+    try:
+        boot = None
+        fases = None
+        while time.perf_counter() - inicio < timeout:
+            logs = _docker('logs', container, check=False)
+            encontrado = RE_INICIALIZACAO.search(logs.stdout + logs.stderr)
+            if encontrado:
+                boot = time.perf_counter() - inicio
+                fases = {'total_ms': int(encontrado.group(1)), 'fases': encontrado.group(2)}
+                break
+            time.sleep(0.05)
+
+        inicio_parada = time.perf_counter()
+        _docker('stop', '-t', '30', container)
+        parada = time.perf_counter() - inicio_parada
+        codigo = _docker('inspect', '-f', '{{.State.ExitCode}}', container).stdout.strip()
+    finally:
+        _docker('rm', '-f', container, check=False)
+
+    return {
+        'boot_s': round(boot, 3) if boot is not None else None,
+        'inicializacao_interna': fases,
+        'parada_s': round(parada, 3),
+        'codigo_saida': int(codigo) if codigo.lstrip('-').isdigit() else codigo,
+    }
+
+
+def _argumentos(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tag', default='motorista-bot:bench')
+    parser.add_argument('--execucoes', type=int, default=3, help='boots medidos')
+    parser.add_argument('--sem-build', action='store_true', help='usa a imagem já existente')
+    parser.add_argument('--saida', help='grava os resultados em JSON neste arquivo')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    resultado = {'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S'), 'tag': args.tag}
+    if not args.sem_build:
+        resultado['build_s'] = round(construir(args.tag), 2)
+    resultado['tamanho_mb'] = round(tamanho_mb(args.tag), 1)
+
+    boots = []
+    for i in range(args.execucoes):
+        boots.append(medir_boot(args.tag))
+        print(json.dumps(boots[-1], ensure_ascii=False), file=sys.stderr)
+    resultado['boots'] = boots
+    tempos = sorted(b['boot_s'] for b in boots if b['boot_s'] is not None)
+    resultado['boot_mediana_s'] = tempos[len(tempos) // 2] if tempos else None
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(texto)
+    print(texto)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except FileNotFoundError:
+        raise SystemExit('[ERRO] docker não encontrado no PATH.')
@@ -0,0 +1,123 @@
+"""
+Modo inline (@bot ABC12): busca de motoristas a partir de qualquer chat.
+O Telegram envia um inline_query a cada tecla digitada; aqui cada usuário tem
+no máximo uma consulta pendente (a mais recente substitui as anteriores) e
+ela só é executada depois de um pequeno intervalo sem digitação (debounce).
+Resultados ficam num cache com TTL por consulta normalizada.
+"""
+import logging
+import threading
+import time
+
+from cache_lru import CacheLRU
+from renderizador import formatar_motorista
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar_consulta(texto):
+    """Maiúsculas, sem espaços nem hífens (ex.: 'abc-12' -> 'ABC12')."""
+    return ''.join(texto.split()).replace('-', '').upper()
+
+
+class BuscaInline:
+    """Fila de inline_queries com debounce por usuário e cache de resultados.
+
+    Args:
+        bolsao: RoboBolsao usado nas buscas
+        responder: função (inline_query_id, resultados, cache_time, pessoal) que chama answerInlineQuery
+        liberar: função (deposito) chamada quando a consulta de um depósito recebido em
+            `receber` termina ou é substituída (o depósito fica fixado até lá)
+        atraso_debounce (float): segundos sem nova tecla antes de buscar
+        ttl_cache (int): segundos que um resultado fica no cache local
+        cache_time (int): cache_time informado ao Telegram (sempre com is_personal, para o
+            cache do Telegram não entregar a resposta a outro usuário ou depósito)
+        limite (int): máximo de resultados por consulta
+        minimo_caracteres (int): consultas menores são respondidas vazias, sem busca
+    """
+
+    def __init__(self, bolsao, responder, atraso_debounce=0.35, ttl_cache=15, cache_time=10,
+                 limite=20, minimo_caracteres=3, liberar=None):
+        self.bolsao = bolsao
+        self.responder = responder
+        self.liberar = liberar
+        self.atraso_debounce = atraso_debounce
+        self.cache_time = cache_time
+        self.limite = limite
+        self.minimo_caracteres = minimo_caracteres
+        self._cache = CacheLRU(maximo=2000, ttl=ttl_cache)
+        self._pendentes = {}  # usuario_id -> (executar_em, inline_query)
+        self._condicao = threading.Condition()
+        self._thread = None
+
+    def receber(self, inline_query, deposito=None):
+        """Registra uma inline_query (chamado pela thread de polling; não bloqueia).
+
+        `deposito` (com .bolsao e .codigo) escolhe outro bolsão que não o padrão;
+        ele é devolvido a `liberar` quando a consulta termina ou é substituída.
+        """
+        usuario_id = inline_query['from']['id']
+        with self._condicao:
+            substituida = self._pendentes.get(usuario_id)
+            self._pendentes[usuario_id] = (time.monotonic() + self.atraso_debounce, (inline_query, deposito))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._laco, name='busca-inline', daemon=True)
+                self._thread.start()
+            self._condicao.notify()
+        if substituida is not None:
+            self._liberar(substituida[1][1])
+
+    def _liberar(self, deposito):
+        if deposito is not None and self.liberar is not None:
+            self.liberar(deposito)
+
+    def _laco(self):
+        while True:
+            with self._condicao:
+                while True:
+                    agora = time.monotonic()
+                    prontas = [u for u, (quando, _) in self._pendentes.items() if quando <= agora]
+                    if prontas:
+                        consultas = [self._pendentes.pop(u)[1] for u in prontas]
+                        break
+                    espera = min((q for q, _ in self._pendentes.values()), default=None)
+                    self._condicao.wait(None if espera is None else espera - agora)
+            for inline_query, deposito in consultas:
+                try:
+                    if deposito is None:
+                        self._executar(inline_query)
+                    else:
+                        self._executar(inline_query, deposito.bolsao, deposito.codigo)
+                except Exception as e:
+                    logger.error(f"Erro na busca inline: {e}", exc_info=True)
+                finally:
+                    self._liberar(deposito)
+
+    def resultados(self, texto, bolsao=None, deposito=None):
+        """Retorna a lista de resultados (artigos) para uma consulta, usando o cache."""
+        consulta = normalizar_consulta(texto)
+        if len(consulta) < self.minimo_caracteres:
+            return []
+        bolsao = bolsao or self.bolsao
+        # A versão do snapshot entra na chave: qualquer escrita invalida o cache
+        chave = (deposito, bolsao.snapshot().versao, consulta)
+        artigos = self._cache.obter(chave)
+        if artigos is None:
+            motoristas = bolsao.pesquisar_prefixo(consulta, self.limite)
+            artigos = [self._artigo(m) for m in motoristas]
+            self._cache.definir(chave, artigos)
+        return artigos
+
+    def _executar(self, inline_query, bolsao=None, deposito=None):
+        self.responder(inline_query['id'], self.resultados(inline_query.get('query', ''), bolsao, deposito),
+                       self.cache_time, pessoal=True)
+
+    @staticmethod
+    def _artigo(motorista):
+        return {
+            'type': 'article',
+            'id': motorista.get('LH', '')[:64],
+            'title': f"{motorista.get('LH', '')} - {motorista.get('Nome', '')}",
+            'description': f"Placas: {motorista.get('Placas', '').replace(',', ', ')}",
+            'input_message_content': {'message_text': formatar_motorista(motorista)},
+        }
@@ -0,0 +1,48 @@
+"""
+Cache em memória com limite de itens (LRU) e expiração opcional (TTL).
+Thread-safe; usado para cursores de paginação e resultados de busca.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    def __init__(self, maximo=1000, ttl=None):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._itens = OrderedDict()  # chave -> (expira_em|None, valor)
+        self._lock = threading.Lock()
+
+    def obter(self, chave, padrao=None):
+        """Retorna o valor (e o marca como recente) ou `padrao` se ausente/expirado."""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return padrao
+            expira_em, valor = item
+            if expira_em is not None and expira_em <= time.monotonic():
+                del self._itens[chave]
+                return padrao
+            self._itens.move_to_end(chave)
+            return valor
+
+    def definir(self, chave, valor, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expira_em = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._itens[chave] = (expira_em, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+
+    def remover(self, chave):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
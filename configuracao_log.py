@@ -0,0 +1,143 @@
+"""
+Configuração de logging assíncrono do bot.
+As threads do bot apenas enfileiram os registros; uma thread dedicada
+(QueueListener) formata e grava no arquivo/console.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import atexit
+from datetime import datetime
+
+# Atributos padrão de LogRecord (não entram como campos extras no JSON)
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class FormatadorJSON(logging.Formatter):
+    """Formata cada registro como uma linha JSON."""
+
+    def format(self, record):
+        dados = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        # Campos passados via extra={...}
+        for chave, valor in record.__dict__.items():
+            if chave not in _ATRIBUTOS_PADRAO and not chave.startswith('_'):
+                dados[chave] = valor
+        if record.exc_info:
+            dados['exc'] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FiltroAmostragem(logging.Filter):
+    """Limita registros INFO/DEBUG repetidos do mesmo ponto de log.
+
+    Registros com o mesmo template (record.msg) são aceitos até `limite` vezes
+    por janela de `janela` segundos; o restante é descartado e contabilizado.
+    WARNING ou acima sempre passam.
+    """
+
+    def __init__(self, limite=20, janela=1.0):
+        super().__init__()
+        self.limite = limite
+        self.janela = janela
+        self._inicio_janela = time.monotonic()
+        self._contagem = {}
+        self.suprimidos = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.limite <= 0:
+            return True
+        agora = time.monotonic()
+        chave = (record.name, record.msg)
+        with self._lock:
+            if agora - self._inicio_janela >= self.janela:
+                self._inicio_janela = agora
+                self._contagem.clear()
+            n = self._contagem.get(chave, 0) + 1
+            self._contagem[chave] = n
+            if n > self.limite:
+                self.suprimidos += 1
+                return False
+        return True
+
+
+class QueueHandlerNaoBloqueante(logging.handlers.QueueHandler):
+    """QueueHandler que não formata na thread chamadora e nunca bloqueia.
+
+    Se a fila estiver cheia o registro é descartado (e contado) em vez de
+    segurar a thread de polling ou de handlers.
+    """
+
+    def __init__(self, fila):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def prepare(self, record):
+        # A formatação fica a cargo da thread do QueueListener
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+def configurar_logging(arquivo='bot.log', nivel=logging.INFO, max_bytes=5 * 1024 * 1024,
+                       backups=5, json_arquivo=True, json_console=False,
+                       limite_amostragem=20, janela_amostragem=1.0, tamanho_fila=10000):
+    """Configura o logging raiz com fila + listener em thread separada.
+
+    Retorna:
+        logging.handlers.QueueListener: listener já iniciado (parado no atexit)
+    """
+    formato_texto = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+    handler_arquivo = logging.handlers.RotatingFileHandler(
+        arquivo, maxBytes=max_bytes, backupCount=backups, encoding='utf-8'
+    )
+    handler_arquivo.setFormatter(FormatadorJSON() if json_arquivo else formato_texto)
+
+    handler_console = logging.StreamHandler()
+    handler_console.setFormatter(FormatadorJSON() if json_console else formato_texto)
+
+    fila = queue.Queue(maxsize=tamanho_fila)
+    handler_fila = QueueHandlerNaoBloqueante(fila)
+    handler_fila.addFilter(FiltroAmostragem(limite_amostragem, janela_amostragem))
+
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(handler_fila)
+    raiz.setLevel(nivel)
+
+    listener = logging.handlers.QueueListener(
+        fila, handler_arquivo, handler_console, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def configurar_logging_env():
+    """Configura o logging a partir de variáveis de ambiente (todas opcionais)."""
+    nivel = getattr(logging, os.getenv('log_nivel', 'INFO').upper(), logging.INFO)
+    return configurar_logging(
+        arquivo=os.getenv('log_arquivo', 'bot.log'),
+        nivel=nivel,
+        max_bytes=int(os.getenv('log_max_bytes', 5 * 1024 * 1024)),
+        backups=int(os.getenv('log_backups', 5)),
+        json_arquivo=os.getenv('log_json_arquivo', '1') == '1',
+        json_console=os.getenv('log_json_console', '0') == '1',
+        limite_amostragem=int(os.getenv('log_limite_por_segundo', 20)),
+    )
@@ -0,0 +1,104 @@
+"""
+Contadores do dia operacional mantidos a cada escrita do bolsão.
+Ficam dentro do Snapshot (imutáveis, como o resto do estado), então o
+/resumo lê números prontos em vez de varrer motoristas e histórico.
+"""
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+from mapa_persistente import MapaPersistente
+
+ATIVO = 'ativo'
+CONCLUIDO = 'concluido'
+CANCELADO = 'cancelado'
+_INDICE = {ATIVO: 0, CONCLUIDO: 1, CANCELADO: 2}
+_ZERO = (0, 0, 0)
+_MESMO_DONO = object()
+
+
+def _somar(trinca, indice, valor):
+    lista = list(trinca)
+    lista[indice] += valor
+    return tuple(lista)
+
+
+class Contadores(NamedTuple):
+    """Contagens do dia corrente.
+
+    por_status: (ativos, concluidos, cancelados)
+    por_dono: chat_id -> (ativos, concluidos, cancelados)
+    por_hora: hora (0-23) -> (entradas, concluidos, cancelados) — eventos na hora
+    """
+    por_status: Tuple[int, int, int]
+    por_dono: MapaPersistente
+    por_hora: MapaPersistente
+
+    @classmethod
+    def vazio(cls):
+        return cls(_ZERO, MapaPersistente(), MapaPersistente())
+
+    def transicao(self, anterior: Optional[str], novo: str, dono=None, quando: datetime = None,
+                  dono_anterior=_MESMO_DONO):
+        """Retorna os contadores após um motorista passar de `anterior` para `novo`.
+
+        `anterior` None significa entrada no bolsão. `dono_anterior` é o dono
+        em que `anterior` estava contado, quando não é o mesmo `dono` (LH
+        removido e adicionado de novo por outro chat). O(1): mexe em uma
+        posição de cada contagem.
+        """
+        if dono_anterior is _MESMO_DONO:
+            dono_anterior = dono
+        if anterior == novo and dono_anterior == dono:
+            return self
+        quando = quando or datetime.now()
+        por_status = self.por_status
+        por_dono = self.por_dono
+        if anterior is not None:
+            por_status = _somar(por_status, _INDICE[anterior], -1)
+        por_status = _somar(por_status, _INDICE[novo], 1)
+
+        if anterior is not None and dono_anterior is not None:
+            por_dono = por_dono.com(dono_anterior, _somar(por_dono.get(dono_anterior, _ZERO), _INDICE[anterior], -1))
+        if dono is not None:
+            por_dono = por_dono.com(dono, _somar(por_dono.get(dono, _ZERO), _INDICE[novo], 1))
+
+        # Na hora, 'ativo' conta como entrada
+        por_hora = self.por_hora.com(quando.hour, _somar(self.por_hora.get(quando.hour, _ZERO), _INDICE[novo], 1))
+        return Contadores(por_status, por_dono, por_hora)
+
+    @classmethod
+    def de_estado(cls, motoristas, historico):
+        """Reconstrói os contadores a partir do estado (restart e virada do dia).
+
+        As horas só são recuperadas para concluídos/cancelados, que guardam a data.
+        """
+        contadores = cls.vazio()
+        por_status = [0, 0, 0]
+        por_dono = {}
+        por_hora = {}
+        for lh, motorista in motoristas.items():
+            registro = historico.get(lh)
+            status = registro['status'] if registro else ATIVO
+            por_status[_INDICE[status]] += 1
+            dono = motorista.get('Dono')
+            if dono is not None:
+                contagem = por_dono.setdefault(dono, [0, 0, 0])
+                contagem[_INDICE[status]] += 1
+        for lh, registro in historico.items():
+            if lh not in motoristas:
+                # Removidos saem dos motoristas mas continuam no histórico como cancelados
+                por_status[_INDICE[registro['status']]] += 1
+                dono = registro['motorista'].get('Dono')
+                if dono is not None:
+                    por_dono.setdefault(dono, [0, 0, 0])[_INDICE[registro['status']]] += 1
+            try:
+                hora = datetime.strptime(registro.get('data', ''), '%d/%m/%Y %H:%M').hour
+            except ValueError:
+                continue
+            contagem = por_hora.setdefault(hora, [0, 0, 0])
+            contagem[_INDICE[registro['status']]] += 1
+        return contadores._replace(
+            por_status=tuple(por_status),
+            por_dono=MapaPersistente.de_itens((d, tuple(c)) for d, c in por_dono.items()),
+            por_hora=MapaPersistente.de_itens((h, tuple(c)) for h, c in sorted(por_hora.items())),
+        )
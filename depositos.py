@@ -0,0 +1,305 @@
+"""
+Depósitos (multi-tenant): cada depósito tem o próprio bolsão, usuários,
+histórico e planilhas, num diretório próprio.
+
+O depósito de uma mensagem é o código vinculado ao chat com /deposito (só
+admin, e só para os códigos de `depositos_permitidos`); sem vínculo, o chat
+usa o depósito padrão (os arquivos na raiz de `diretorio_dados`, como antes
+dos depósitos). Com `por_grupo`, cada grupo sem vínculo é o seu próprio
+depósito, e /deposito padrao grava um vínculo explícito ao padrão. O diretório de um
+depósito só é criado quando há algo para gravar nele, então grupos que só
+mandam mensagens sem /login não deixam nada no disco.
+
+Depósitos são carregados do disco no primeiro acesso e ficam num LRU. Quando
+a memória estimada (pelo número de motoristas) passa do orçamento, ou quando
+ficam ociosos por muito tempo, os menos usados são gravados e descarregados.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from estrutura import RoboBolsao
+from gerenciador_usuarios import GerenciadorUsuarios
+from particoes import ArquivoHistorico
+
+logger = logging.getLogger(__name__)
+
+DEPOSITO_PADRAO = 'padrao'
+RE_CODIGO = re.compile(r'[A-Z0-9_-]{2,32}')
+# Estimativa de memória: ~830 bytes medidos por motorista (dict + índices + fila),
+# arredondado para cobrir o registro no histórico
+BYTES_POR_MOTORISTA = 1024
+BYTES_POR_DEPOSITO = 64 * 1024
+
+
+def normalizar_codigo(texto):
+    """Código de depósito em maiúsculas ou None se inválido (2-32 letras, números, _ ou -)."""
+    codigo = texto.strip().upper()
+    return codigo if RE_CODIGO.fullmatch(codigo) else None
+
+
+class Deposito:
+    """Estado de um depósito: bolsão, usuários (lazy) e planilha (lazy).
+
+    Args:
+        codigo (str): identificador do depósito
+        diretorio (Path): onde ficam usuarios.json, o estado, o histórico e as planilhas
+        bolsao (RoboBolsao): bolsão já criado (depósito padrão); se None, é criado aqui
+        arquivo_estado: estado gravado no descarregamento (padrão: diretorio/estado_bolsao.json)
+        hora_virada (str): 'HH:MM' da virada do dia dos bolsões criados aqui
+        opcoes_usuarios (dict): argumentos extras do GerenciadorUsuarios (ttl_sessao, retencao)
+    """
+
+    def __init__(self, codigo, diretorio, bolsao=None, arquivo_estado=None, hora_virada='00:00',
+                 opcoes_usuarios=None):
+        self.codigo = codigo
+        self.diretorio = Path(diretorio)
+        self.arquivo_estado = Path(arquivo_estado or self.diretorio / 'estado_bolsao.json')
+        self.opcoes_usuarios = opcoes_usuarios or {}
+        if bolsao is None:
+            bolsao = RoboBolsao(hora_virada=hora_virada,
+                                arquivo_historico=ArquivoHistorico(self.diretorio / 'historico'))
+            bolsao.carregar_estado(self.arquivo_estado)
+        self.bolsao = bolsao
+        self.em_uso = 0
+        self.ultimo_acesso = time.monotonic()
+        self._planilha = None
+        self._gerenciador_usuarios = None
+        self._lock = threading.Lock()
+
+    @property
+    def planilha(self):
+        """PlanilhaFechamento criada no primeiro /planilha (o import do openpyxl fica para esse momento)."""
+        if self._planilha is None:
+            with self._lock:
+                if self._planilha is None:
+                    inicio = time.perf_counter()
+                    from planilha_fechamento import PlanilhaFechamento
+                    self._planilha = PlanilhaFechamento(diretorio=self.diretorio)
+                    logger.info("Planilha inicializada em %.0f ms", (time.perf_counter() - inicio) * 1000)
+        return self._planilha
+
+    @property
+    def gerenciador_usuarios(self):
+        """GerenciadorUsuarios criado (e usuarios.json lido) na primeira mensagem."""
+        if self._gerenciador_usuarios is None:
+            with self._lock:
+                if self._gerenciador_usuarios is None:
+                    inicio = time.perf_counter()
+                    self._gerenciador_usuarios = GerenciadorUsuarios(
+                        self.diretorio / 'usuarios.json', **self.opcoes_usuarios)
+                    logger.info("Usuários do depósito %s carregados em %.0f ms",
+                                self.codigo, (time.perf_counter() - inicio) * 1000)
+        return self._gerenciador_usuarios
+
+    def usuarios_carregados(self):
+        return self._gerenciador_usuarios is not None
+
+    def memoria_estimada(self):
+        """Bytes estimados a partir do número de motoristas e registros no histórico."""
+        snap = self.bolsao.snapshot()
+        return BYTES_POR_DEPOSITO + BYTES_POR_MOTORISTA * (len(snap.motoristas) + len(snap.historico))
+
+    def salvar(self):
+        """Grava o bolsão (os usuários já são gravados a cada alteração).
+
+        Um depósito que nunca teve motoristas nem estado gravado não cria nada.
+        """
+        snap = self.bolsao.snapshot()
+        if not snap.motoristas and not snap.historico and not self.arquivo_estado.exists():
+            return
+        self.arquivo_estado.parent.mkdir(parents=True, exist_ok=True)
+        self.bolsao.salvar_estado(self.arquivo_estado)
+
+
+class GerenciadorDepositos:
+    """Vínculos chat -> depósito e LRU dos depósitos carregados.
+
+    Args:
+        diretorio (Path): diretorio_dados; depósitos ficam em diretorio/depositos/CODIGO
+        padrao (Deposito): depósito padrão, sempre carregado
+        orcamento_bytes (int): memória estimada máxima dos depósitos carregados
+        ocioso_segundos (float): depósitos sem acesso há mais tempo são descarregados
+        permitidos (set): códigos aceitos no /deposito (vazio: vínculo desabilitado)
+        opcoes_deposito (dict): argumentos repassados a cada Deposito criado
+        por_grupo (bool): grupos sem vínculo usam o próprio depósito (GRUPO<id>)
+            em vez do padrão
+    """
+
+    def __init__(self, diretorio, padrao, orcamento_bytes=256 * 1024 * 1024, ocioso_segundos=1800,
+                 permitidos=(), opcoes_deposito=None, por_grupo=False):
+        self.diretorio = Path(diretorio)
+        self.padrao = padrao
+        self.orcamento_bytes = orcamento_bytes
+        self.ocioso_segundos = ocioso_segundos
+        self.permitidos = frozenset(permitidos)
+        self.opcoes_deposito = opcoes_deposito or {}
+        self.por_grupo = por_grupo
+        self.arquivo_vinculos = self.diretorio / 'depositos.json'
+        self._carregados = OrderedDict()  # código -> Deposito, do menos para o mais recente
+        self._lock = threading.Lock()
+        self._vinculos = self._carregar_vinculos()  # chat_id (str) -> código
+
+    def _carregar_vinculos(self):
+        if not self.arquivo_vinculos.exists():
+            return {}
+        try:
+            with open(self.arquivo_vinculos, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Erro ao carregar vínculos de depósitos: {e}")
+            return {}
+
+    def _salvar_vinculos(self):
+        temporario = self.arquivo_vinculos.with_suffix('.tmp')
+        try:
+            with open(temporario, 'w') as f:
+                json.dump(self._vinculos, f, indent=2)
+            os.replace(temporario, self.arquivo_vinculos)
+        except Exception as e:
+            logger.error(f"Erro ao salvar vínculos de depósitos: {e}")
+
+    def _codigo_sem_vinculo(self, chat_id):
+        if self.por_grupo and chat_id is not None and int(chat_id) < 0:
+            return f'GRUPO{-int(chat_id)}'
+        return DEPOSITO_PADRAO
+
+    def codigo_do_chat(self, chat_id):
+        """Depósito de um chat: o vinculado (inclusive ao padrão); sem vínculo, o
+        próprio grupo (com por_grupo) ou o padrão."""
+        return self._vinculos.get(str(chat_id)) or self._codigo_sem_vinculo(chat_id)
+
+    def vincular(self, chat_id, texto):
+        """/deposito CODIGO. Retorna {'status': 'sucesso'|'erro', 'mensagem': str}."""
+        codigo = normalizar_codigo(texto)
+        if codigo is None or codigo == DEPOSITO_PADRAO.upper():
+            return {'status': 'erro', 'mensagem': 'Código inválido (2 a 32 letras, números, _ ou -).'}
+        if not self.permitidos:
+            return {'status': 'erro', 'mensagem': 'Nenhum depósito configurado (depositos_permitidos).'}
+        if codigo not in self.permitidos:
+            return {'status': 'erro', 'mensagem': f'Depósito {codigo} não está configurado.'}
+        with self._lock:
+            self._vinculos[str(chat_id)] = codigo
+            self._salvar_vinculos()
+        logger.info("Chat %s vinculado ao depósito %s", chat_id, codigo)
+        return {'status': 'sucesso', 'mensagem': f'Chat vinculado ao depósito {codigo}.'}
+
+    def desvincular(self, chat_id):
+        """/deposito padrao: volta o chat ao depósito padrão.
+
+        Se sem vínculo o chat cairia em outro depósito (grupo com por_grupo),
+        grava um vínculo explícito ao padrão. Retorna False se já estava nele.
+        """
+        chave = str(chat_id)
+        with self._lock:
+            if self.codigo_do_chat(chat_id) == DEPOSITO_PADRAO:
+                return False
+            if self._codigo_sem_vinculo(chat_id) == DEPOSITO_PADRAO:
+                del self._vinculos[chave]
+            else:
+                self._vinculos[chave] = DEPOSITO_PADRAO
+            self._salvar_vinculos()
+        logger.info("Chat %s de volta ao depósito padrão", chat_id)
+        return True
+
+    @contextmanager
+    def usar(self, codigo):
+        """Depósito `codigo`, carregado se preciso; não é descarregado enquanto em uso."""
+        deposito = self.obter(codigo)
+        try:
+            yield deposito
+        finally:
+            self.liberar(deposito)
+
+    def fixar(self, deposito):
+        """Mais um uso de um depósito já fixado (ex.: tarefa criada durante uma mensagem).
+
+        Cada `fixar`/`obter` precisa de um `liberar` quando o trabalho termina.
+        """
+        with self._lock:
+            deposito.em_uso += 1
+        return deposito
+
+    def liberar(self, deposito):
+        with self._lock:
+            deposito.em_uso -= 1
+            deposito.ultimo_acesso = time.monotonic()
+
+    def obter(self, codigo):
+        """Depósito `codigo` fixado em memória até o `liberar` correspondente (prefira `usar`)."""
+        if codigo == DEPOSITO_PADRAO:
+            with self._lock:
+                self.padrao.em_uso += 1
+            return self.padrao
+        with self._lock:
+            deposito = self._carregados.get(codigo)
+            if deposito is None:
+                inicio = time.perf_counter()
+                deposito = Deposito(codigo, self.diretorio / 'depositos' / codigo, **self.opcoes_deposito)
+                self._carregados[codigo] = deposito
+                logger.info("Depósito %s carregado em %.0f ms", codigo, (time.perf_counter() - inicio) * 1000)
+            else:
+                self._carregados.move_to_end(codigo)
+            deposito.em_uso += 1
+            self._despejar()
+        return deposito
+
+    def carregados(self):
+        with self._lock:
+            return [self.padrao] + list(self._carregados.values())
+
+    def memoria_estimada(self):
+        return sum(d.memoria_estimada() for d in self.carregados())
+
+    def manutencao(self):
+        """Virada do dia e compactação de usuários dos carregados; descarrega os ociosos."""
+        for deposito in self.carregados():
+            if deposito.bolsao.verificar_virada():
+                # Grava já o novo dia: um restart sem desligamento limpo recarregaria o
+                # dia fechado e o arquivaria de novo (a partição é só acréscimo)
+                try:
+                    deposito.salvar()
+                except Exception as e:
+                    logger.error(f"Erro ao salvar depósito {deposito.codigo} após a virada: {e}", exc_info=True)
+            if deposito.usuarios_carregados():
+                deposito.gerenciador_usuarios.compactar_se_necessario()
+        with self._lock:
+            self._despejar()
+
+    def _despejar(self):
+        """Descarrega os menos usados (chamar com _lock): ociosos e, se preciso, até caber no orçamento."""
+        agora = time.monotonic()
+        total = self.padrao.memoria_estimada() + sum(d.memoria_estimada() for d in self._carregados.values())
+        for codigo, deposito in list(self._carregados.items()):
+            if deposito.em_uso:
+                continue
+            ocioso = agora - deposito.ultimo_acesso >= self.ocioso_segundos
+            if not ocioso and total <= self.orcamento_bytes:
+                break
+            total -= deposito.memoria_estimada()
+            self._descarregar(codigo, 'ocioso' if ocioso else 'orçamento de memória')
+        if total > self.orcamento_bytes:
+            logger.warning("Depósitos em uso somam %.1f MB estimados (orçamento %.1f MB)",
+                           total / 1048576, self.orcamento_bytes / 1048576)
+
+    def _descarregar(self, codigo, motivo):
+        deposito = self._carregados.pop(codigo)
+        try:
+            deposito.salvar()
+        except Exception as e:
+            logger.error(f"Erro ao salvar depósito {codigo}: {e}", exc_info=True)
+        logger.info("Depósito %s descarregado (%s)", codigo, motivo)
+
+    def salvar_todos(self):
+        """Grava o bolsão de todos os depósitos carregados (desligamento)."""
+        for deposito in self.carregados():
+            try:
+                deposito.salvar()
+            except Exception as e:
+                logger.error(f"Erro ao salvar depósito {deposito.codigo}: {e}", exc_info=True)
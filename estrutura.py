@@ -1,135 +1,279 @@
 """
 Criar uma classe estruturada para organizar meu codigo
 """
-import time
-from datetime import datetime
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left, insort
+from datetime import date, datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from analisador_comandos import ComandoAdicionar, Consulta, ErroValidacao, analisar_adicionar, analisar_consulta
+from contadores import ATIVO, CANCELADO, CONCLUIDO, Contadores
+from fila_patio import FilaPatio, HistogramaEspera
+from mapa_persistente import MapaPersistente
+from particoes import ArquivoHistorico, converter_hora, dia_operacional, proxima_virada
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot(NamedTuple):
+    """Estado imutável do bolsão numa versão.
+
+    Escritores publicam um novo Snapshot a cada mudança; leitores pegam a
+    referência atual uma vez e trabalham nela sem lock, sem nunca ver um
+    estado pela metade.
+    """
+    versao: int
+    motoristas: MapaPersistente  # LH -> dict do motorista
+    historico: MapaPersistente   # LH -> {'motorista', 'status', 'data', 'motivo'}
+    placas: MapaPersistente      # placa normalizada -> tupla de LHs (índice de busca)
+    contadores: Contadores       # totais por status, dono e hora (para o /resumo)
+
+
+def _indexar_placas(indice, lh, placas):
+    """Retorna o índice de placas com `lh` incluída em cada uma das `placas`."""
+    for placa in placas:
+        indice = indice.com(placa, indice.get(placa, ()) + (lh,))
+    return indice
+
+
+def _desindexar_placas(indice, lh, placas):
+    """Retorna o índice de placas sem `lh` nas `placas` informadas."""
+    for placa in placas:
+        restantes = tuple(x for x in indice.get(placa, ()) if x != lh)
+        indice = indice.com(placa, restantes) if restantes else indice.sem(placa)
+    return indice
+
+
+def _chaves_prefixo(lh, placas):
+    """Entradas (chave, LH) do índice de prefixos: a própria LH e cada placa."""
+    return [(lh, lh)] + [(placa, lh) for placa in placas]
+
+
+def _indexar_prefixos(indice, lh, placas):
+    for entrada in _chaves_prefixo(lh, placas):
+        insort(indice, entrada)
+
+
+def _desindexar_prefixos(indice, lh, placas):
+    for entrada in _chaves_prefixo(lh, placas):
+        i = bisect_left(indice, entrada)
+        if i < len(indice) and indice[i] == entrada:
+            del indice[i]
 
-data = time.localtime()
-data_atual =  f'{data.tm_mday}/{data.tm_mon}/{data.tm_year} {data.tm_hour}:{data.tm_min}'
 
 class RoboBolsao:
-    def __init__(self):
-        self.dados_motoristas = {}
-        self.historico_status = {}  # Rastreia status: 'ativo', 'concluido', 'cancelado'
+    def __init__(self, hora_virada='00:00', arquivo_historico=None):
+        # Leituras usam self._snapshot (sem lock); escritas são serializadas por _lock_escrita
+        self._lock_escrita = threading.Lock()
+        self._snapshot = Snapshot(0, MapaPersistente(), MapaPersistente(), MapaPersistente(), Contadores.vazio())
+        # Estado particionado por dia operacional: só o dia corrente fica em memória
+        self.hora_virada = converter_hora(hora_virada)
+        self.arquivo_historico = arquivo_historico or ArquivoHistorico()
+        self.dia_atual = dia_operacional(hora_virada=self.hora_virada)
+        self._proxima_virada = proxima_virada(self.dia_atual, self.hora_virada)
+        # Ordem de chegada dos ativos; mutável, então só é tocada com _lock_escrita
+        self.fila = FilaPatio()
+        # LHs e placas ordenadas para a busca por prefixo (modo inline); como a fila,
+        # é mutável e só é tocada com _lock_escrita
+        self._prefixos = []
 
-    # funcao pacialmente terminada
-    def adicionar_motoristas(self, dado):
+    @property
+    def dados_motoristas(self):
+        """Motoristas do snapshot atual (somente leitura)."""
+        return self._snapshot.motoristas
+
+    @property
+    def historico_status(self):
+        """Histórico do snapshot atual (somente leitura). Status: 'concluido', 'cancelado'."""
+        return self._snapshot.historico
+
+    def snapshot(self):
+        """Retorna o snapshot atual; use-o para ler motoristas e histórico de forma consistente."""
+        return self._snapshot
+
+    def _publicar(self, motoristas=None, historico=None, placas=None, contadores=None):
+        """Publica uma nova versão (chamar com _lock_escrita adquirido)."""
+        atual = self._snapshot
+        self._snapshot = Snapshot(
+            atual.versao + 1,
+            atual.motoristas if motoristas is None else motoristas,
+            atual.historico if historico is None else historico,
+            atual.placas if placas is None else placas,
+            atual.contadores if contadores is None else contadores,
+        )
+
+    @staticmethod
+    def _status_atual(snap, lh):
+        """Status de um LH no snapshot: 'ativo', 'concluido' ou 'cancelado'."""
+        registro = snap.historico.get(lh)
+        return registro['status'] if registro else ATIVO
+
+    def adicionar_motoristas(self, dado, dono=None):
         """Adiciona motorista com validação de duplicata.
-        
+
+        Args:
+            dado: ComandoAdicionar já analisado ou o texto 'LH NOME PLACA[,PLACA]'
+            dono: chat_id de quem adicionou (entra nos contadores por dono)
+
         Retorna:
             dict: {'status': 'novo'|'duplicado'|'erro', 'mensagem': str, 'dados': dict|None}
         """
         try:
-            dados_tratados = {}
-            dados_separados = dado.split()
-            dados_tratados['LH'] = dados_separados[0]
-            dados_separados.pop(0)
-            dados_tratados['Placas'] = dados_separados[-1]
-            dados_separados.pop(-1)
-            nome = ' '.join(dados_separados)
-            dados_tratados['Nome'] = nome
-            
-            # Use LH as the key to store the motorista dictionary
-            lh = dados_tratados['LH']
-            
-            # Verifica se LH já existe
-            if lh in self.dados_motoristas:
-                return {
-                    'status': 'duplicado',
-                    'mensagem': f'Motorista com LH {lh} já existe no sistema.',
-                    'dados': self.dados_motoristas[lh]
-                }
-            
-            # Adiciona o novo motorista
-            self.dados_motoristas[lh] = dados_tratados
+            comando = dado if isinstance(dado, ComandoAdicionar) else analisar_adicionar(dado)
+        except ErroValidacao as e:
+            return {'status': 'erro', 'mensagem': str(e), 'dados': None}
+
+        lh = comando.lh
+        dados_tratados = {'LH': lh, 'Placas': comando.placas_texto, 'Nome': comando.nome}
+        if dono is not None:
+            dados_tratados['Dono'] = dono
+        try:
+            with self._lock_escrita:
+                snap = self._snapshot
+                # Verifica se LH já existe
+                if lh in snap.motoristas:
+                    return {
+                        'status': 'duplicado',
+                        'mensagem': f'Motorista com LH {lh} já existe no sistema.',
+                        'dados': snap.motoristas[lh]
+                    }
+
+                # LH removido hoje e adicionado de novo: volta a ser ativo, então sai
+                # do histórico e deixa de contar como cancelado (no dono antigo)
+                registro = snap.historico.get(lh)
+                if registro is None:
+                    historico = None
+                    contadores = snap.contadores.transicao(None, ATIVO, dono)
+                else:
+                    historico = snap.historico.sem(lh)
+                    contadores = snap.contadores.transicao(registro['status'], ATIVO, dono,
+                                                           dono_anterior=registro['motorista'].get('Dono'))
+
+                # Adiciona o novo motorista e indexa as placas na mesma versão
+                self._publicar(
+                    motoristas=snap.motoristas.com(lh, dados_tratados),
+                    placas=_indexar_placas(snap.placas, lh, comando.placas),
+                    historico=historico,
+                    contadores=contadores,
+                )
+                _indexar_prefixos(self._prefixos, lh, comando.placas)
+                self.fila.entrar(lh)
             return {
                 'status': 'novo',
-                'mensagem': f'Motorista {nome} ({lh}) adicionado com sucesso.',
+                'mensagem': f'Motorista {comando.nome} ({lh}) adicionado com sucesso.',
                 'dados': dados_tratados
             }
-        
-        except IndexError as e:
-            return {
-                'status': 'erro',
-                'mensagem': 'Formato inválido. Use: /add LH_NUMERO NOME PLACA',
-                'dados': None
-            }
         except Exception as e:
             return {
                 'status': 'erro',
                 'mensagem': f'Erro ao tratar dados: {e}',
                 'dados': None
             }
-        
-    # funcao pacialmente terminada
+
     def pesquisar_motoristas(self, valor_pesquisa):
-        resultado = []
-        p_user = valor_pesquisa.lower()
-        q_caracter = len(p_user)
-
-        if q_caracter == 7:
-            # Buscar por placa (7 caracteres)
-            for chave, motorista_dict in self.dados_motoristas.items():
-                if isinstance(motorista_dict, dict):
-                    placa = motorista_dict.get('Placas', '').lower()
-
-                    if len(placa) > 7:
-                        placas_lista = [p.strip() for p in placa.split(',')]
-                        if p_user in placas_lista:
-                            print(f'Motorista encontrado: {motorista_dict}') 
-                            resultado.append(motorista_dict)
-                            return resultado
-                        
-                    if placa == p_user:
-                        print(f'Motorista encontrado: {motorista_dict}') 
-                        resultado.append(motorista_dict)
-                        return resultado
-
-        elif q_caracter == 13:
-            # Buscar por LH (13 caracteres)
-            for chave, motorista_dict in self.dados_motoristas.items():
-                if isinstance(motorista_dict, dict):
-                    lh = motorista_dict.get('LH', '').lower()
-                    if lh == p_user:
-                        print(f'Motorista encontrado: {motorista_dict}')
-                        resultado.append(motorista_dict)
-                        return resultado
-        else:
-            text = 'Valor de pesquisa invalido. Insira uma Placa (7 caracteres) ou LH (13 caracteres).'
-            print(text)
+        """Busca por placa (ABC1234 / ABC1D23) ou LH (13 caracteres), via índices.
+
+        Args:
+            valor_pesquisa: texto digitado ou Consulta já normalizada
+
+        Retorna:
+            list: todos os motoristas encontrados (vazia se nenhum)
+            str: mensagem de erro se o valor não for placa nem LH
+        """
+        consulta = valor_pesquisa if isinstance(valor_pesquisa, Consulta) else analisar_consulta(valor_pesquisa)
+        if consulta is None:
+            text = 'Valor de pesquisa invalido. Insira uma Placa (ABC1234 ou ABC1D23) ou LH (13 caracteres).'
+            logger.debug(text)
             return text
-    
+
+        snap = self._snapshot
+        if consulta.tipo == 'placa':
+            lhs = snap.placas.get(consulta.valor, ())
+        else:
+            lhs = (consulta.valor,)
+        resultado = [snap.motoristas[lh] for lh in lhs if lh in snap.motoristas]
+        logger.debug('Busca %s %s: %s encontrado(s)', consulta.tipo, consulta.valor, len(resultado))
+        return resultado
+
+    def pesquisar_prefixo(self, prefixo, limite=20):
+        """Busca motoristas cuja LH ou alguma placa começa com `prefixo` (sem diferenciar maiúsculas).
+
+        Usada no modo inline, onde a consulta chega enquanto o usuário ainda digita.
+        Busca binária no índice ordenado de LHs e placas: O(log n + limite),
+        sem varrer os motoristas.
+        """
+        prefixo = prefixo.upper()
+        resultado = []
+        vistos = set()
+        with self._lock_escrita:
+            snap = self._snapshot
+            indice = self._prefixos
+            i = bisect_left(indice, (prefixo,))
+            while i < len(indice) and len(resultado) < limite:
+                chave, lh = indice[i]
+                if not chave.startswith(prefixo):
+                    break
+                if lh not in vistos:
+                    vistos.add(lh)
+                    resultado.append(snap.motoristas[lh])
+                i += 1
+        return resultado
+
     # funcao pacialmente terminada
     def remover_motorista(self, dado_remover):
         """Remove motorista e marca status como cancelado no histórico."""
         try:
-            if dado_remover in self.dados_motoristas:
-                motorista = self.dados_motoristas.pop(dado_remover)
-                # Registra no histórico como cancelado
-                self.historico_status[dado_remover] = {
-                    'motorista': motorista,
-                    'status': 'cancelado',
-                    'data': datetime.now().strftime('%d/%m/%Y %H:%M'),
-                    'motivo': 'removido'
+            with self._lock_escrita:
+                snap = self._snapshot
+                if dado_remover not in snap.motoristas:
+                    return {'status': 'erro', 'mensagem': 'Motorista não encontrado.'}
+                motorista = snap.motoristas[dado_remover]
+                # Sai dos motoristas e do índice e entra no histórico como cancelado na mesma versão
+                self._publicar(
+                    motoristas=snap.motoristas.sem(dado_remover),
+                    placas=_desindexar_placas(snap.placas, dado_remover, motorista['Placas'].split(',')),
+                    contadores=snap.contadores.transicao(
+                        self._status_atual(snap, dado_remover), CANCELADO, motorista.get('Dono')),
+                    historico=snap.historico.com(dado_remover, {
+                        'motorista': motorista,
+                        'status': 'cancelado',
+                        'data': datetime.now().strftime('%d/%m/%Y %H:%M'),
+                        'motivo': 'removido'
+                    })
+                )
+                self.fila.sair(dado_remover, registrar_espera=False)
+                _desindexar_prefixos(self._prefixos, dado_remover, motorista['Placas'].split(','))
+            return {
+                    'status': 'sucesso',
+                    'mensagem': f'Motorista {motorista["Nome"]} removido com sucesso.',
+                    'dados': motorista
                 }
-                return {'status': 'sucesso', 'mensagem': f'Motorista {motorista["Nome"]} removido com sucesso.'}
-            else:
-                return {'status': 'erro', 'mensagem': 'Motorista não encontrado.'}
         except Exception as e:
             return {'status': 'erro', 'mensagem': f'Erro ao remover: {e}'}
     
     def marcar_concluido(self, lh):
         """Marca motorista como concluído."""
-        if lh not in self.dados_motoristas:
-            return {'status': 'erro', 'mensagem': 'Motorista não encontrado.'}
-        
-        motorista = self.dados_motoristas[lh]
-        self.historico_status[lh] = {
-            'motorista': motorista,
-            'status': 'concluido',
-            'data': datetime.now().strftime('%d/%m/%Y %H:%M'),
-            'motivo': 'concluído'
-        }
+        with self._lock_escrita:
+            snap = self._snapshot
+            if lh not in snap.motoristas:
+                return {'status': 'erro', 'mensagem': 'Motorista não encontrado.'}
+
+            motorista = snap.motoristas[lh]
+            self._publicar(
+                historico=snap.historico.com(lh, {
+                    'motorista': motorista,
+                    'status': 'concluido',
+                    'data': datetime.now().strftime('%d/%m/%Y %H:%M'),
+                    'motivo': 'concluído'
+                }),
+                contadores=snap.contadores.transicao(self._status_atual(snap, lh), CONCLUIDO, motorista.get('Dono')),
+            )
+            # Concluído sem ter sido chamado: a espera conta até aqui
+            self.fila.sair(lh)
         return {
             'status': 'sucesso',
             'mensagem': f'Motorista {motorista["Nome"]} marcado como concluído.',
@@ -138,43 +282,115 @@ class RoboBolsao:
     
     def marcar_cancelado(self, lh):
         """Marca motorista como cancelado."""
-        if lh not in self.dados_motoristas:
-            return {'status': 'erro', 'mensagem': 'Motorista não encontrado.'}
-        
-        motorista = self.dados_motoristas[lh]
-        self.historico_status[lh] = {
-            'motorista': motorista,
-            'status': 'cancelado',
-            'data': datetime.now().strftime('%d/%m/%Y %H:%M'),
-            'motivo': 'cancelado'
-        }
+        with self._lock_escrita:
+            snap = self._snapshot
+            if lh not in snap.motoristas:
+                return {'status': 'erro', 'mensagem': 'Motorista não encontrado.'}
+
+            motorista = snap.motoristas[lh]
+            self._publicar(
+                historico=snap.historico.com(lh, {
+                    'motorista': motorista,
+                    'status': 'cancelado',
+                    'data': datetime.now().strftime('%d/%m/%Y %H:%M'),
+                    'motivo': 'cancelado'
+                }),
+                contadores=snap.contadores.transicao(self._status_atual(snap, lh), CANCELADO, motorista.get('Dono')),
+            )
+            self.fila.sair(lh, registrar_espera=False)
         return {
             'status': 'sucesso',
             'mensagem': f'Motorista {motorista["Nome"]} marcado como cancelado.',
             'dados': motorista
         }
     
-    def obter_relatorio_fechamento(self):
+    def chamar_proximo(self):
+        """Tira o primeiro caminhão da fila do pátio (O(log n)).
+
+        O motorista continua ativo até ser concluído ou cancelado; só deixa de
+        aguardar. A espera entra nas estatísticas do dia.
+
+        Retorna:
+            dict: {'status': 'sucesso'|'vazia', 'mensagem': str, 'dados': dict|None,
+                   'espera': segundos, 'restantes': int}
+        """
+        with self._lock_escrita:
+            snap = self._snapshot
+            chamado = self.fila.chamar()
+            restantes = len(self.fila)
+        if chamado is None:
+            return {'status': 'vazia', 'mensagem': 'Nenhum caminhão aguardando na fila.',
+                    'dados': None, 'espera': None, 'restantes': 0}
+        lh, espera = chamado
+        motorista = snap.motoristas[lh]
+        return {
+            'status': 'sucesso',
+            'mensagem': f'Próximo: {motorista["Nome"]} ({lh}).',
+            'dados': motorista,
+            'espera': espera,
+            'restantes': restantes,
+        }
+
+    def posicao_na_fila(self, valor_pesquisa):
+        """Posição na fila por LH ou placa.
+
+        Retorna:
+            list: [(motorista, posição ou None, segundos aguardando ou None)] —
+                None quando o motorista existe mas não está aguardando
+            str: mensagem de erro se o valor não for placa nem LH
+        """
+        encontrados = self.pesquisar_motoristas(valor_pesquisa)
+        if isinstance(encontrados, str):
+            return encontrados
+        with self._lock_escrita:
+            return [(m, self.fila.posicao(m['LH']), self.fila.espera(m['LH'])) for m in encontrados]
+
+    def estado_fila(self, limite=10):
+        """Tamanho da fila, os `limite` primeiros e as esperas do dia (p50/p95 em minutos).
+
+        Retorna:
+            dict: aguardando, primeiros [(posição, motorista, segundos)],
+                atendidos, p50, p95, media (minutos; None sem atendimentos)
+        """
+        with self._lock_escrita:
+            # Dentro do lock, o snapshot e a fila estão na mesma versão
+            snap = self._snapshot
+            primeiros = [(lh, self.fila.espera(lh)) for lh in self.fila.primeiros(limite)]
+            esperas = self.fila.esperas
+            estado = {
+                'aguardando': len(self.fila),
+                'atendidos': esperas.total,
+                'p50': esperas.percentil(50),
+                'p95': esperas.percentil(95),
+                'media': esperas.media_minutos(),
+            }
+        estado['primeiros'] = [(i, snap.motoristas[lh], espera) for i, (lh, espera) in enumerate(primeiros, 1)]
+        return estado
+
+    def obter_relatorio_fechamento(self, snap=None):
         """Retorna lista de todos os motoristas com status (ativos + histórico).
         
-        Não duplica motoristas que estão no histórico.
+        Não duplica motoristas que estão no histórico. Lê um único snapshot,
+        então o relatório é consistente mesmo com escritas acontecendo.
         """
+        snap = snap or self._snapshot
         relatorio = []
+        agora = datetime.now().strftime('%d/%m/%Y %H:%M')
         
         # Motoristas ativos (que NÃO estão no histórico)
-        for lh, motorista in self.dados_motoristas.items():
+        for lh, motorista in snap.motoristas.ordenado():
             # Só adiciona se NÃO está no histórico (não foi marcado como concluído/cancelado)
-            if lh not in self.historico_status:
+            if lh not in snap.historico:
                 relatorio.append({
                     'LH': motorista.get('LH', ''),
                     'Nome': motorista.get('Nome', ''),
                     'Placa': motorista.get('Placas', ''),
                     'Status': 'Ativo',
-                    'Data': datetime.now().strftime('%d/%m/%Y %H:%M')
+                    'Data': agora
                 })
         
         # Histórico (concluídos e cancelados)
-        for lh, historico in self.historico_status.items():
+        for lh, historico in snap.historico.ordenado():
             relatorio.append({
                 'LH': lh,
                 'Nome': historico['motorista'].get('Nome', ''),
@@ -185,10 +401,159 @@ class RoboBolsao:
         
         return relatorio
 
+    def verificar_virada(self, agora=None):
+        """Vira o dia se a hora de virada já passou. Barato: uma comparação de datetime.
+
+        Retorna:
+            bool: True se o dia foi virado
+        """
+        agora = agora or datetime.now()
+        if agora < self._proxima_virada:
+            return False
+        self.virar_dia(dia_operacional(agora, self.hora_virada))
+        return True
+
+    def virar_dia(self, novo_dia):
+        """Arquiva o dia corrente e libera da memória os motoristas já encerrados.
+
+        Concluídos e cancelados vão para a partição do dia que terminou; os
+        motoristas ainda ativos continuam no bolsão no novo dia.
+        """
+        with self._lock_escrita:
+            snap = self._snapshot
+            dia_fechado = self.dia_atual
+            encerrados = [r for r in self.obter_relatorio_fechamento(snap) if r['Status'] != 'Ativo']
+            if encerrados:
+                self.arquivo_historico.arquivar(dia_fechado, encerrados)
+            ativos = MapaPersistente.de_itens(
+                (lh, m) for lh, m in snap.motoristas.ordenado() if lh not in snap.historico
+            )
+            self._prefixos = self._indice_prefixos(ativos)
+            self._publicar(motoristas=ativos, historico=MapaPersistente(), placas=self._indice_placas(ativos),
+                           contadores=Contadores.de_estado(ativos, MapaPersistente()))
+            # Quem ainda aguarda continua na fila; as estatísticas de espera são do dia
+            self.fila.esperas = HistogramaEspera()
+            self.dia_atual = novo_dia
+            self._proxima_virada = proxima_virada(novo_dia, self.hora_virada)
+        logger.info("Virada de dia: %s -> %s (%s encerrados arquivados, %s ativos mantidos)",
+                    dia_fechado, novo_dia, len(encerrados), len(ativos))
+
+    @staticmethod
+    def _indice_placas(motoristas):
+        """Reconstrói o índice placa -> LHs a partir dos motoristas."""
+        placas = {}
+        for lh, m in motoristas.ordenado():
+            for placa in m['Placas'].split(','):
+                placas[placa] = placas.get(placa, ()) + (lh,)
+        return MapaPersistente.de_itens(placas.items())
+
+    @staticmethod
+    def _indice_prefixos(motoristas):
+        """Reconstrói o índice ordenado de LHs e placas a partir dos motoristas."""
+        return sorted(entrada for lh, m in motoristas.items() for entrada in _chaves_prefixo(lh, m['Placas'].split(',')))
+
+    def salvar_estado(self, caminho):
+        """Grava o dia corrente (motoristas, histórico e fila do pátio) em JSON, de forma atômica.
+
+        Usado no desligamento para que um restart continue de onde parou.
+        """
+        with self._lock_escrita:
+            snap = self._snapshot
+            fila = self.fila.itens()
+        estado = {
+            'dia': self.dia_atual.isoformat(),
+            'motoristas': snap.motoristas.ordenado(),
+            'historico': snap.historico.ordenado(),
+            'fila': fila,
+        }
+        caminho = Path(caminho)
+        temporario = caminho.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+        logger.info("Estado salvo em %s: %s motoristas, %s no histórico",
+                    caminho, len(snap.motoristas), len(snap.historico))
+
+    def carregar_estado(self, caminho):
+        """Restaura o estado gravado por `salvar_estado`.
+
+        Se o dia operacional virou enquanto o bot estava desligado, o estado
+        é carregado no dia antigo e a próxima `verificar_virada()` o arquiva.
+
+        Retorna:
+            bool: True se havia estado para carregar
+        """
+        caminho = Path(caminho)
+        if not caminho.exists():
+            return False
+        with open(caminho, 'r', encoding='utf-8') as f:
+            estado = json.load(f)
+        motoristas = MapaPersistente.de_itens((lh, m) for lh, m in estado['motoristas'])
+        historico = MapaPersistente.de_itens((lh, h) for lh, h in estado['historico'])
+        fila = FilaPatio()
+        if 'fila' in estado:
+            for lh, chegada in estado['fila']:
+                if lh in motoristas and lh not in historico:
+                    fila.entrar(lh, chegada)
+        else:
+            # Estado de versão anterior, sem ordem de chegada: ativos entram agora
+            for lh, _ in motoristas.ordenado():
+                if lh not in historico:
+                    fila.entrar(lh)
+        with self._lock_escrita:
+            self.fila = fila
+            self._prefixos = self._indice_prefixos(motoristas)
+            self._publicar(motoristas=motoristas, historico=historico, placas=self._indice_placas(motoristas),
+                           contadores=Contadores.de_estado(motoristas, historico))
+            self.dia_atual = date.fromisoformat(estado['dia'])
+            self._proxima_virada = proxima_virada(self.dia_atual, self.hora_virada)
+        logger.info("Estado restaurado de %s: %s motoristas, %s no histórico, %s na fila (dia %s)",
+                    caminho, len(motoristas), len(historico), len(fila), self.dia_atual)
+        return True
+
+    def resumo(self, dono=None, agora=None):
+        """Totais do dia a partir dos contadores do snapshot (sem varrer motoristas).
+
+        Retorna:
+            dict: ativos, concluidos, cancelados, total, dono (trinca ou None),
+                hora_atual, concluidos_hora_atual, entradas_hora_atual,
+                media_concluidos_hora, por_hora [(hora, entradas, concluidos, cancelados)]
+        """
+        snap = self._snapshot
+        contadores = snap.contadores
+        agora = agora or datetime.now()
+        ativos, concluidos, cancelados = contadores.por_status
+        entradas_hora, concluidos_hora, _ = contadores.por_hora.get(agora.hour, (0, 0, 0))
+        # Horas decorridas no dia operacional (mínimo 1, para não inflar a média logo após a virada)
+        inicio_dia = datetime.combine(self.dia_atual, self.hora_virada)
+        horas = max((agora - inicio_dia).total_seconds() / 3600, 1.0)
+        return {
+            'versao': snap.versao,
+            'dia': self.dia_atual,
+            'ativos': ativos,
+            'concluidos': concluidos,
+            'cancelados': cancelados,
+            'total': ativos + concluidos + cancelados,
+            'dono': contadores.por_dono.get(dono) if dono is not None else None,
+            'hora_atual': agora.hour,
+            'entradas_hora_atual': entradas_hora,
+            'concluidos_hora_atual': concluidos_hora,
+            'media_concluidos_hora': concluidos / horas,
+            # Em ordem do dia operacional (começando na hora da virada)
+            'por_hora': sorted(((hora,) + contagem for hora, contagem in contadores.por_hora.items()),
+                               key=lambda item: (item[0] - self.hora_virada.hour) % 24),
+        }
+
+    def obter_relatorio_dia(self, dia):
+        """Relatório de um dia: o corrente vem da memória, os passados do arquivo."""
+        if dia == self.dia_atual:
+            return self.obter_relatorio_fechamento()
+        return self.arquivo_historico.carregar(dia)
+
     def escrever_arquivo(self, nome_arquivo):
         try:
-            with open(f'{nome_arquivo}_{data_atual}', 'w') as arquivo:
-                for chave, valor in self.dados_motoristas.items():
+            with open(f'{nome_arquivo}_{self.dia_atual.strftime("%d_%m_%Y")}', 'w') as arquivo:
+                for chave, valor in self._snapshot.motoristas.ordenado():
                     linha = f'LH: {valor["LH"]}, Nome: {valor["Nome"]}, Placas: {valor["Placas"]}\n'
                     arquivo.write(linha)
             print('Dados escritos no arquivo com sucesso!')
@@ -0,0 +1,185 @@
+"""
+Fila de chegada do pátio (ordem em que os caminhões entraram no bolsão).
+
+Cada entrada recebe um número de sequência crescente; uma árvore de Fenwick
+marca quais sequências ainda estão na fila. Com isso entrar, sair do meio
+(concluído/cancelado), saber a posição de um LH e chamar o próximo custam
+O(log n), mesmo com milhares de caminhões aguardando.
+
+As esperas de quem já foi atendido vão para um histograma de baldes de 1
+minuto, também numa Fenwick, então p50/p95 saem em O(log n) sem ordenar nada.
+"""
+import math
+import time
+
+
+class Fenwick:
+    """Árvore de Fenwick (soma de prefixos) sobre índices 0..tamanho-1."""
+
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self._arvore = [0] * (tamanho + 1)
+        self._passo = 1 << (tamanho.bit_length() - 1) if tamanho else 0
+
+    @classmethod
+    def de_lista(cls, valores):
+        """Monta a árvore a partir dos valores em O(n)."""
+        arvore = cls(len(valores))
+        dados = arvore._arvore
+        for i, valor in enumerate(valores, 1):
+            dados[i] += valor
+            pai = i + (i & -i)
+            if pai <= arvore.tamanho:
+                dados[pai] += dados[i]
+        return arvore
+
+    def somar(self, indice, valor):
+        i = indice + 1
+        dados = self._arvore
+        while i <= self.tamanho:
+            dados[i] += valor
+            i += i & -i
+
+    def prefixo(self, indice):
+        """Soma dos valores de 0 até `indice` (inclusive)."""
+        i = indice + 1
+        soma = 0
+        dados = self._arvore
+        while i > 0:
+            soma += dados[i]
+            i -= i & -i
+        return soma
+
+    def kesimo(self, k):
+        """Menor índice cujo prefixo alcança `k` (k >= 1 e <= soma total)."""
+        posicao = 0
+        passo = self._passo
+        dados = self._arvore
+        while passo:
+            proximo = posicao + passo
+            if proximo <= self.tamanho and dados[proximo] < k:
+                posicao = proximo
+                k -= dados[proximo]
+            passo >>= 1
+        return posicao
+
+
+class HistogramaEspera:
+    """Esperas em baldes de 1 minuto; acima de 24h tudo cai no último balde."""
+
+    MAX_MINUTOS = 24 * 60
+
+    def __init__(self):
+        self._baldes = Fenwick(self.MAX_MINUTOS + 1)
+        self.total = 0
+        self.soma_segundos = 0.0
+
+    def registrar(self, segundos):
+        segundos = max(segundos, 0)
+        self._baldes.somar(min(int(segundos // 60), self.MAX_MINUTOS), 1)
+        self.total += 1
+        self.soma_segundos += segundos
+
+    def percentil(self, p):
+        """Minuto (balde) do percentil `p` (0-100), ou None sem amostras."""
+        if not self.total:
+            return None
+        return self._baldes.kesimo(max(1, math.ceil(p / 100 * self.total)))
+
+    def media_minutos(self):
+        return self.soma_segundos / self.total / 60 if self.total else None
+
+
+class FilaPatio:
+    """Fila ordenada por chegada com remoção do meio e posição em O(log n).
+
+    Não é thread-safe: o RoboBolsao só mexe nela com o lock de escrita.
+    """
+
+    CAPACIDADE_MINIMA = 1024
+
+    def __init__(self):
+        self._presentes = Fenwick(self.CAPACIDADE_MINIMA)
+        self._sequencia = {}   # LH -> sequência
+        self._lh = {}          # sequência -> LH
+        self._chegada = {}     # LH -> timestamp de entrada
+        self._proxima = 0
+        self.esperas = HistogramaEspera()
+
+    def __len__(self):
+        return len(self._sequencia)
+
+    def __contains__(self, lh):
+        return lh in self._sequencia
+
+    def entrar(self, lh, chegada=None):
+        """Coloca `lh` no fim da fila. Retorna False se já estava nela."""
+        if lh in self._sequencia:
+            return False
+        if self._proxima >= self._presentes.tamanho:
+            self._reorganizar()
+        sequencia = self._proxima
+        self._proxima += 1
+        self._sequencia[lh] = sequencia
+        self._lh[sequencia] = lh
+        self._chegada[lh] = time.time() if chegada is None else chegada
+        self._presentes.somar(sequencia, 1)
+        return True
+
+    def sair(self, lh, registrar_espera=True, agora=None):
+        """Tira `lh` de qualquer ponto da fila.
+
+        Retorna:
+            float: segundos de espera, ou None se `lh` não estava na fila
+        """
+        sequencia = self._sequencia.pop(lh, None)
+        if sequencia is None:
+            return None
+        del self._lh[sequencia]
+        self._presentes.somar(sequencia, -1)
+        espera = (time.time() if agora is None else agora) - self._chegada.pop(lh)
+        if registrar_espera:
+            self.esperas.registrar(espera)
+        return espera
+
+    def chamar(self, agora=None):
+        """Tira o primeiro da fila. Retorna (LH, segundos de espera) ou None se vazia."""
+        lh = self.primeiro()
+        if lh is None:
+            return None
+        return lh, self.sair(lh, agora=agora)
+
+    def primeiro(self):
+        return self._lh[self._presentes.kesimo(1)] if self._sequencia else None
+
+    def primeiros(self, quantidade):
+        """Os `quantidade` primeiros LHs, em ordem."""
+        return [self._lh[self._presentes.kesimo(k)] for k in range(1, min(quantidade, len(self)) + 1)]
+
+    def posicao(self, lh):
+        """Posição de `lh` (1 = próximo a ser chamado) ou None se não está na fila."""
+        sequencia = self._sequencia.get(lh)
+        return None if sequencia is None else self._presentes.prefixo(sequencia)
+
+    def espera(self, lh, agora=None):
+        """Segundos que `lh` está aguardando, ou None se não está na fila."""
+        chegada = self._chegada.get(lh)
+        return None if chegada is None else (time.time() if agora is None else agora) - chegada
+
+    def itens(self):
+        """[(LH, chegada)] em ordem de chegada (para salvar o estado)."""
+        return [(lh, self._chegada[lh]) for _, lh in sorted(self._lh.items())]
+
+    def _reorganizar(self):
+        """Renumera quem está na fila a partir de 0 e dimensiona a árvore para o dobro.
+
+        As sequências só crescem; sem isso a árvore cresceria com o total de
+        entradas do dia e não com o tamanho da fila. Custo O(n), amortizado
+        pelas n entradas até a próxima reorganização.
+        """
+        ordem = [lh for _, lh in sorted(self._lh.items())]
+        capacidade = max(self.CAPACIDADE_MINIMA, 2 * (len(ordem) + 1))
+        self._presentes = Fenwick.de_lista([1] * len(ordem) + [0] * (capacidade - len(ordem)))
+        self._sequencia = {lh: i for i, lh in enumerate(ordem)}
+        self._lh = dict(enumerate(ordem))
+        self._proxima = len(ordem)
@@ -1,18 +1,46 @@
 """
 Gerenciador de autenticação de usuários do bot Telegram.
 Salva usuários autenticados e controla acesso aos dados.
+
+Cada login abre uma sessão com validade (TTL) e um papel:
+operador < supervisor < admin. As sessões ativas ficam num dict em memória
+(consulta O(1) a cada mensagem); sessões vencidas são descartadas na
+primeira consulta depois do vencimento.
 """
 import json
 import logging
+import time
 from pathlib import Path
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+PAPEL_OPERADOR = 'operador'
+PAPEL_SUPERVISOR = 'supervisor'
+PAPEL_ADMIN = 'admin'
+NIVEIS_PAPEL = {PAPEL_OPERADOR: 1, PAPEL_SUPERVISOR: 2, PAPEL_ADMIN: 3}
+
+
 class GerenciadorUsuarios:
-    def __init__(self, arquivo_usuarios='usuarios.json'):
+    """Usuários autenticados, sessões e papéis.
+
+    Args:
+        arquivo_usuarios (str): JSON com os usuários (sessão + motoristas criados)
+        ttl_sessao (int): segundos de validade de um login
+        retencao (int): segundos que um usuário com sessão vencida continua no
+            arquivo antes de ser removido na compactação
+        intervalo_compactacao (int): segundos entre compactações do arquivo
+    """
+
+    def __init__(self, arquivo_usuarios='usuarios.json', ttl_sessao=12 * 3600,
+                 retencao=30 * 86400, intervalo_compactacao=3600):
         self.arquivo = Path(arquivo_usuarios)
+        self.ttl_sessao = ttl_sessao
+        self.retencao = retencao
+        self.intervalo_compactacao = intervalo_compactacao
         self.usuarios = {}
+        self._sessoes = {}  # chat_id (int) -> (expira_em, papel); só sessões ativas
+        self._proxima_compactacao = time.monotonic() + intervalo_compactacao
         self._carregar_usuarios()
     
     def _carregar_usuarios(self):
@@ -22,6 +50,13 @@ class GerenciadorUsuarios:
                 with open(self.arquivo, 'r') as f:
                     self.usuarios = json.load(f)
                 logger.info(f"Carregados {len(self.usuarios)} usuários do arquivo")
+                agora = time.time()
+                for usuario in self.usuarios.values():
+                    # Usuários gravados antes das sessões não têm 'expira_em': precisam de
+                    # novo /login, mas contam a retenção a partir de agora
+                    expira_em = usuario.setdefault('expira_em', agora)
+                    if expira_em > agora:
+                        self._sessoes[usuario['chat_id']] = (expira_em, usuario.get('papel', PAPEL_OPERADOR))
             except Exception as e:
                 logger.error(f"Erro ao carregar usuários: {e}")
                 self.usuarios = {}
@@ -32,46 +67,111 @@ class GerenciadorUsuarios:
     def _salvar_usuarios(self):
         """Salva usuários no arquivo JSON."""
         try:
+            # Diretórios de depósito só são criados na primeira gravação
+            self.arquivo.parent.mkdir(parents=True, exist_ok=True)
             with open(self.arquivo, 'w') as f:
                 json.dump(self.usuarios, f, indent=2)
             logger.info(f"Usuários salvos no arquivo: {len(self.usuarios)} usuários")
         except Exception as e:
             logger.error(f"Erro ao salvar usuários: {e}")
     
-    def autenticar(self, chat_id: int, senha: str) -> dict:
-        """Autentica um usuário com senha.
-        
+    def autenticar(self, chat_id: int, senha: str, papel: str = PAPEL_OPERADOR) -> dict:
+        """Abre (ou renova) a sessão de um usuário com o papel informado.
+
+        A senha é validada no main.py, que escolhe o papel conforme a senha usada.
+        Um novo /login sempre renova a validade; com uma senha de papel menor,
+        a sessão mantém o papel que já tinha.
+
         Retorna:
-            dict: {'status': 'sucesso'|'erro', 'mensagem': str}
+            dict: {'status': 'sucesso', 'mensagem': str}
         """
         chat_id_str = str(chat_id)
-        
-        # Verifica se usuário já está autenticado
-        if chat_id_str in self.usuarios:
-            return {
-                'status': 'aviso',
-                'mensagem': 'Você já está autenticado!'
-            }
-        
-        # Verifica se a senha está correta (carregada do .env no main.py)
-        # A senha será validada no main.py
-        # Aqui apenas registramos o usuário
-        self.usuarios[chat_id_str] = {
+        papel_atual = self.papel(chat_id)
+        renovada = papel_atual is not None
+        if renovada and NIVEIS_PAPEL[papel_atual] > NIVEIS_PAPEL[papel]:
+            papel = papel_atual
+
+        expira_em = time.time() + self.ttl_sessao
+        usuario = self.usuarios.get(chat_id_str) or {
             'chat_id': chat_id,
-            'data_autenticacao': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
             'motoristas': []  # Lista de LH dos motoristas que este usuário criou
         }
+        usuario['data_autenticacao'] = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        usuario['papel'] = papel
+        usuario['expira_em'] = expira_em
+        self.usuarios[chat_id_str] = usuario
+        self._sessoes[chat_id] = (expira_em, papel)
         self._salvar_usuarios()
-        
+
+        if renovada:
+            return {
+                'status': 'sucesso',
+                'mensagem': f'Sessão renovada ({papel}).'
+            }
         return {
             'status': 'sucesso',
-            'mensagem': 'Autenticação realizada com sucesso! Bem-vindo ao sistema.'
+            'mensagem': f'Autenticação realizada com sucesso ({papel})! Bem-vindo ao sistema.'
         }
-    
+
+    def encerrar_sessao(self, chat_id: int) -> bool:
+        """Encerra a sessão (os motoristas criados continuam vinculados ao usuário)."""
+        if self._sessoes.pop(chat_id, None) is None:
+            return False
+        usuario = self.usuarios.get(str(chat_id))
+        if usuario:
+            usuario['expira_em'] = time.time()
+            self._salvar_usuarios()
+        return True
+
+    def papel(self, chat_id: int):
+        """Papel da sessão ativa, ou None se não autenticado/expirado."""
+        sessao = self._sessoes.get(chat_id)
+        if sessao is None:
+            return None
+        if sessao[0] <= time.time():
+            # Expiração preguiçosa: some do cache na primeira consulta após vencer
+            self._sessoes.pop(chat_id, None)
+            return None
+        return sessao[1]
+
     def esta_autenticado(self, chat_id: int) -> bool:
-        """Verifica se um usuário está autenticado."""
-        return str(chat_id) in self.usuarios
-    
+        """Verifica se um usuário tem sessão ativa."""
+        return self.papel(chat_id) is not None
+
+    def tem_papel(self, chat_id: int, papel_minimo: str) -> bool:
+        """True se a sessão ativa tem papel igual ou superior a `papel_minimo`."""
+        papel = self.papel(chat_id)
+        return papel is not None and NIVEIS_PAPEL[papel] >= NIVEIS_PAPEL[papel_minimo]
+
+    def compactar_se_necessario(self):
+        """Chamado a cada volta do polling; compacta no máximo uma vez por intervalo."""
+        if time.monotonic() < self._proxima_compactacao:
+            return 0
+        self._proxima_compactacao = time.monotonic() + self.intervalo_compactacao
+        return self.compactar()
+
+    def compactar(self) -> int:
+        """Remove do arquivo os usuários com sessão vencida há mais de `retencao`.
+
+        Usuários vencidos há menos tempo continuam (com seus motoristas) para
+        que um novo /login recupere a permissão de editar o que criaram.
+
+        Retorna:
+            int: quantidade de usuários removidos
+        """
+        agora = time.time()
+        for chat_id, (expira_em, _) in list(self._sessoes.items()):
+            if expira_em <= agora:
+                self._sessoes.pop(chat_id, None)
+        limite = agora - self.retencao
+        antigos = [c for c, u in self.usuarios.items() if u.get('expira_em', 0) < limite]
+        for chat_id_str in antigos:
+            del self.usuarios[chat_id_str]
+        if antigos:
+            self._salvar_usuarios()
+            logger.info("Compactação de usuários: %s removidos, %s mantidos", len(antigos), len(self.usuarios))
+        return len(antigos)
+
     def adicionar_motorista(self, chat_id: int, lh: str) -> bool:
         """Registra que um usuário adicionou um motorista."""
         chat_id_str = str(chat_id)
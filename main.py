@@ -1,35 +1,91 @@
-from dotenv import load_dotenv
+import time
+_INICIO = time.perf_counter()  # referência para as fases de inicialização logadas no __main__
+
 from pathlib import Path
 import requests
 import os
+import json
 from estrutura import RoboBolsao
-from planilha_fechamento import PlanilhaFechamento
-from gerenciador_usuarios import GerenciadorUsuarios
+from analisador_comandos import Consulta, ErroValidacao, analisar_adicionar, normalizar_lh, normalizar_placa
+from particoes import ArquivoHistorico
+from gerenciador_usuarios import PAPEL_ADMIN, PAPEL_OPERADOR, PAPEL_SUPERVISOR
+from depositos import DEPOSITO_PADRAO, Deposito, GerenciadorDepositos
+from configuracao_log import configurar_logging_env
+from renderizador import PaginadorResultados, PREFIXO_CALLBACK
+from busca_inline import BuscaInline
+from notificacoes import GerenciadorAssinaturas, FilaEnvio, Notificador, TODOS, alvo_assinatura
+from seguranca import ControleTentativas, Segredo
+from saude import ARQUIVO_PADRAO as ARQUIVO_SAUDE, Batimento
 import threading
 import logging
-import time
+import signal
+from datetime import datetime
 from typing import Optional, Dict, Any
 
-# Configurar logging para debug
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
+# Logging assíncrono: handlers formatam e gravam em thread própria. Rodando
+# como script, a configuração espera o .env ser carregado (log_* podem estar nele)
+if __name__ != "__main__":
+    configurar_logging_env()
 logger = logging.getLogger(__name__)
 
+
+def carregar_dotenv():
+    """Lê o .env ao lado do main.py uma única vez (o __main__ já carrega no início)."""
+    global _DOTENV_CARREGADO
+    if not _DOTENV_CARREGADO:
+        from dotenv import load_dotenv
+        load_dotenv(Path(__file__).parent / ".env")
+        _DOTENV_CARREGADO = True
+
+
+_DOTENV_CARREGADO = False
+
+
+def _minutos(segundos):
+    """Duração curta para as mensagens da fila: '35 min' ou '2h05'."""
+    minutos = int(segundos // 60)
+    return f"{minutos} min" if minutos < 60 else f"{minutos // 60}h{minutos % 60:02d}"
+
+
 class BotTelegram:
     def __init__(self, bot_bolsao, token=None, texto=None, chat_id=None, clear_on_start=True, keep_last_n=0, 
                  max_retries=5, retry_delay=5):
-        self.bot_bolsao = bot_bolsao
+        # Arquivos de estado (usuários, assinaturas, offset, planilhas...) ficam aqui;
+        # no container é o volume persistente
+        self.diretorio_dados = Path(os.getenv("diretorio_dados", "."))
+        self.diretorio_dados.mkdir(parents=True, exist_ok=True)
+        self.arquivo_estado = os.getenv("arquivo_estado", str(self.diretorio_dados / "estado_bolsao.json"))
+        # Depósitos: `bot_bolsao` é o depósito padrão (arquivos na raiz de diretorio_dados);
+        # os demais têm bolsão, usuários e planilhas próprios e são carregados sob demanda
+        opcoes_usuarios = {
+            'ttl_sessao': int(float(os.getenv("sessao_ttl_horas", 12)) * 3600),
+            'retencao': int(float(os.getenv("retencao_usuarios_dias", 30)) * 86400),
+        }
+        self.depositos = GerenciadorDepositos(
+            self.diretorio_dados,
+            Deposito(DEPOSITO_PADRAO, self.diretorio_dados, bolsao=bot_bolsao,
+                     arquivo_estado=self.arquivo_estado, opcoes_usuarios=opcoes_usuarios),
+            orcamento_bytes=int(float(os.getenv("orcamento_depositos_mb", 256)) * 1024 * 1024),
+            ocioso_segundos=float(os.getenv("deposito_ocioso_minutos", 30)) * 60,
+            # Sem depositos_permitidos, /deposito CODIGO fica desabilitado
+            permitidos={c.strip().upper() for c in os.getenv("depositos_permitidos", "").split(',') if c.strip()},
+            opcoes_deposito={'hora_virada': os.getenv("hora_virada", "00:00"), 'opcoes_usuarios': opcoes_usuarios},
+            # Opcional: cada grupo sem vínculo vira o próprio depósito (GRUPO<id>)
+            por_grupo=os.getenv("depositos_por_grupo", "0") == "1",
+        )
         self.texto = texto
         self.chat_id = chat_id
         self.token = token
-        self.senha_planilha = None  # Será carregada do .env
-        self.senha_autenticacao = None  # Será carregada do .env
+        # Segredos carregados do .env; a senha usada no /login define o papel da sessão
+        self.senha_autenticacao = None  # operador
+        self.senha_planilha = None  # supervisor (pode gerar planilhas)
+        self.senha_admin = None  # admin (opcional; profiling)
+        # Senhas erradas bloqueiam o chat por tempo crescente
+        self.tentativas = ControleTentativas(
+            maximo_tentativas=int(os.getenv("tentativas_senha_max", 5)),
+            bloqueio_base=int(os.getenv("bloqueio_senha_segundos", 30)),
+            maximo_falhas_minuto=int(os.getenv("senhas_erradas_por_minuto_max", 60)),
+        )
         self.link_base = None
         self.clear_on_start = clear_on_start
         self.keep_last_n = keep_last_n
@@ -38,17 +94,122 @@ class BotTelegram:
         self.retry_delay = retry_delay
         # Request timeout
         self.timeout = 30
-        # Planilha de fechamento
-        self.planilha = PlanilhaFechamento(diretorio='.')
-        # Gerenciador de usuários
-        self.gerenciador_usuarios = GerenciadorUsuarios('usuarios.json')
+        self._primeiro_lote = True
+        # Profiling (desligado por padrão; ver configure_token)
+        self.perfilador_habilitado = False
+        self._local = threading.local()
+        # Cursores de paginação das buscas (ficam no servidor, limitados)
+        self.paginador = PaginadorResultados()
+        # Modo inline (@bot PLACA) com debounce e cache próprios
+        self.busca_inline = BuscaInline(self.bot_bolsao, self.responder_inline, liberar=self.depositos.liberar)
+        # Notificações: assinaturas + resumo periódico via fila de saída com rate limit
+        self.assinaturas = GerenciadorAssinaturas(self.diretorio_dados / 'assinaturas.json')
+        self.fila_envio = FilaEnvio(self.send_message)
+        self.notificador = Notificador(
+            self.assinaturas, self.fila_envio,
+            intervalo=int(os.getenv("intervalo_resumo_notificacoes", 60))
+        )
+        # Desligamento gracioso (SIGTERM): para o polling, espera as tarefas em
+        # andamento e a fila de saída até o prazo e grava o estado do bolsão
+        self._parar = threading.Event()
+        self._tarefas = set()
+        self._lock_tarefas = threading.Lock()
+        self.prazo_desligamento = float(os.getenv("prazo_desligamento", 25))
+        # Batimento lido pelo HEALTHCHECK do container (python saude.py)
+        self.batimento = Batimento(self.diretorio_dados / ARQUIVO_SAUDE)
 
-    def get_updates_com_retry(self) -> Optional[Dict[str, Any]]:
-        """Faz requisição com retry automático em caso de falha de conexão."""
+    @property
+    def deposito(self):
+        """Depósito da mensagem em processamento nesta thread (fora de uma mensagem, o padrão)."""
+        return getattr(self._local, 'deposito', None) or self.depositos.padrao
+
+    @property
+    def bot_bolsao(self):
+        return self.deposito.bolsao
+
+    @property
+    def gerenciador_usuarios(self):
+        """Usuários do depósito atual (usuarios.json lido na primeira mensagem)."""
+        return self.deposito.gerenciador_usuarios
+
+    @property
+    def planilha(self):
+        """Planilha do depósito atual (o import do openpyxl fica para o primeiro /planilha)."""
+        return self.deposito.planilha
+
+    def _iniciar_tarefa(self, alvo, *args):
+        """Executa `alvo` em thread daemon (ou na thread atual durante /perfil_cmd).
+
+        As threads ficam registradas até terminar, para o desligamento esperar por elas,
+        e herdam o depósito da mensagem que as criou, que fica fixado em memória
+        (não é despejado) até a tarefa terminar.
+        """
+        if getattr(self._local, 'sincrono', False):
+            alvo(*args)
+            return
+        deposito = self.depositos.fixar(self.deposito)
+        thread = threading.Thread(target=self._executar_tarefa, args=(alvo, args, deposito), daemon=True)
+        with self._lock_tarefas:
+            self._tarefas.add(thread)
+        try:
+            thread.start()
+        except Exception:
+            with self._lock_tarefas:
+                self._tarefas.discard(thread)
+            self.depositos.liberar(deposito)
+            raise
+
+    def _executar_tarefa(self, alvo, args, deposito):
+        self._local.deposito = deposito
+        try:
+            alvo(*args)
+        finally:
+            self.depositos.liberar(deposito)
+            with self._lock_tarefas:
+                self._tarefas.discard(threading.current_thread())
+
+    def parar(self):
+        """Pede o fim do polling. Chamado do signal handler, então só sinaliza o
+        Event: logar aqui poderia travar se o sinal chegasse com o lock do
+        logging (ou do filtro de amostragem) já pego pela thread principal."""
+        self._parar.set()
+
+    def _finalizar(self):
+        """Drena tarefas e mensagens pendentes dentro do prazo e grava o estado."""
+        limite = time.monotonic() + self.prazo_desligamento
+        with self._lock_tarefas:
+            tarefas = list(self._tarefas)
+        logger.info("Desligando: %s tarefa(s) em andamento, %s mensagem(ns) na fila",
+                    len(tarefas), len(self.fila_envio))
+        for thread in tarefas:
+            thread.join(max(0, limite - time.monotonic()))
+        em_andamento = sum(thread.is_alive() for thread in tarefas)
+        if em_andamento:
+            logger.warning("Prazo de desligamento esgotado com %s tarefa(s) em andamento", em_andamento)
+
+        # Resumos acumulados saem antes de desligar
+        try:
+            self.notificador.enviar_resumos()
+        except Exception as e:
+            logger.error(f"Erro ao enviar resumos no desligamento: {e}")
+        if not self.fila_envio.drenar(max(0, limite - time.monotonic())):
+            logger.warning("Prazo de desligamento esgotado com %s mensagem(ns) na fila", len(self.fila_envio))
+
+        # Usuários e assinaturas já são gravados a cada alteração; falta o bolsão de cada depósito
+        self.depositos.salvar_todos()
+        logger.info("Bot desligado")
+
+    def get_updates_com_retry(self, offset: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Faz requisição com retry automático em caso de falha de conexão.
+
+        O offset confirma ao Telegram os updates já processados; sem ele os
+        mesmos updates voltariam em toda chamada.
+        """
         url = f"{self.link_base}getUpdates"
+        params = {'offset': offset} if offset else {}
         for tentativa in range(1, self.max_retries + 1):
             try:
-                response = requests.post(url, timeout=self.timeout)
+                response = requests.post(url, data=params, timeout=self.timeout)
                 response.raise_for_status()
                 dados = response.json()
                 if dados.get('ok'):
@@ -59,18 +220,18 @@ class BotTelegram:
                     return None
             except requests.exceptions.Timeout:
                 logger.warning(f"Timeout na tentativa {tentativa}/{self.max_retries}")
-                if tentativa < self.max_retries:
-                    time.sleep(self.retry_delay)
+                if tentativa < self.max_retries and self._parar.wait(self.retry_delay):
+                    return None
                 continue
             except requests.exceptions.ConnectionError:
                 logger.warning(f"Erro de conexão na tentativa {tentativa}/{self.max_retries}")
-                if tentativa < self.max_retries:
-                    time.sleep(self.retry_delay)
+                if tentativa < self.max_retries and self._parar.wait(self.retry_delay):
+                    return None
                 continue
             except requests.exceptions.RequestException as e:
                 logger.error(f"Erro na requisição: {e}")
-                if tentativa < self.max_retries:
-                    time.sleep(self.retry_delay)
+                if tentativa < self.max_retries and self._parar.wait(self.retry_delay):
+                    return None
                 continue
             except ValueError as e:
                 logger.error(f"Erro ao decodificar JSON: {e}")
@@ -81,7 +242,7 @@ class BotTelegram:
 
     def rodarbot(self):
         # Carrega último offset de arquivo para persistência
-        offset_file = 'ultimo_offset.txt'
+        offset_file = self.diretorio_dados / 'ultimo_offset.txt'
         try:
             if os.path.exists(offset_file):
                 with open(offset_file, 'r') as f:
@@ -93,8 +254,11 @@ class BotTelegram:
         
         logger.info("Bot iniciando...")
 
-        # Optionally clear the backlog of updates on startup so old messages are not processed
-        if self.clear_on_start:
+        # Optionally clear the backlog of updates on startup so old messages are not processed.
+        # Com offset salvo (restart/deploy) o backlog é retomado em vez de descartado.
+        if ultimo_update_id is not None:
+            logger.info("Retomando a partir do update %s", ultimo_update_id + 1)
+        elif self.clear_on_start:
             try:
                 self.clear_history(keep_last_n=self.keep_last_n)
                 logger.info("Histórico limpo com sucesso")
@@ -104,61 +268,100 @@ class BotTelegram:
 
         logger.info("Bot pronto para receber mensagens")
         
-        while True:
+        while not self._parar.is_set():
             try:
                 # ensure link_base is formatted with token
                 if not self.link_base and self.token:
                     self.link_base = f"https://api.telegram.org/bot{self.token}/"
 
+                # Nos depósitos carregados: vira o dia operacional quando passa da hora
+                # configurada, compacta usuarios.json e descarrega os ociosos
+                self.depositos.manutencao()
+
+                # Sinal de vida para o healthcheck (gravado no máximo a cada 5s)
+                snap = self.depositos.padrao.bolsao.snapshot()
+                self.batimento.registrar(
+                    ultimo_update_id=ultimo_update_id,
+                    motoristas=len(snap.motoristas),
+                    versao=snap.versao,
+                    depositos=len(self.depositos.carregados()),
+                    fila_envio=len(self.fila_envio),
+                    tarefas=len(self._tarefas),
+                )
+
                 # Fazer requisição com retry
-                params = {}
-                if ultimo_update_id:
-                    params['offset'] = ultimo_update_id + 1
-                
-                dados = self.get_updates_com_retry()
+                offset = ultimo_update_id + 1 if ultimo_update_id else None
+                dados = self.get_updates_com_retry(offset)
                 if not dados:
+                    if self._parar.is_set():
+                        break
                     logger.warning("Nenhum dado retornado, aguardando antes de tentar novamente...")
-                    time.sleep(self.retry_delay)
+                    self._parar.wait(self.retry_delay)
                     continue
                 
                 updates = dados.get('result', [])
                 
                 for update in updates:
+                    update_id = update.get('update_id')
                     try:
-                        update_id = update.get('update_id')
                         if 'message' in update:
                             self._processar_mensagem(update, chat_id=update['message']['chat'].get('id'))
-                            ultimo_update_id = update_id
-                            # Persiste o offset
-                            with open(offset_file, 'w') as f:
-                                f.write(str(ultimo_update_id))
+                        elif 'callback_query' in update:
+                            self._processar_callback(update['callback_query'])
+                        elif 'inline_query' in update:
+                            self._processar_inline(update['inline_query'])
                     except (KeyError, TypeError) as e:
                         logger.error(f"Erro ao processar update {update_id}: {e}")
-                        continue
                     except Exception as e:
                         logger.error(f"Erro inesperado ao processar update: {e}")
-                        continue
-                
-                # Pequeno delay para não sobrecarregar API
+                    # Avança o offset mesmo em erro/tipo ignorado para não reprocessar o update
+                    if update_id is not None:
+                        ultimo_update_id = update_id
+
                 if updates:
-                    time.sleep(0.5)
-                else:
-                    time.sleep(1)
+                    # Persiste o offset uma vez por lote
+                    with open(offset_file, 'w') as f:
+                        f.write(str(ultimo_update_id))
+                    if self._primeiro_lote:
+                        self._primeiro_lote = False
+                        logger.info("Primeiro lote processado %.2f s após o início do processo",
+                                    time.perf_counter() - _INICIO)
+
+                # Pequeno delay para não sobrecarregar API (interrompido pelo sinal de parada)
+                self._parar.wait(0.5 if updates else 1)
                         
             except Exception as e:
                 logger.error(f"Erro crítico no loop principal: {e}", exc_info=True)
                 logger.info(f"Aguardando {self.retry_delay} segundos antes de reconectar...")
-                time.sleep(self.retry_delay)
+                self._parar.wait(self.retry_delay)
                 continue
 
+        logger.info("Sinal de parada recebido; lote atual terminado")
+        self._finalizar()
+
     def _processar_mensagem(self, update: Dict[str, Any], chat_id: int):
+        """Processa uma mensagem no depósito do chat (carregado se preciso)."""
+        # Chat bloqueado por excesso de senhas erradas: descarta sem responder
+        if self.tentativas.bloqueado(chat_id):
+            return
+        anterior = getattr(self._local, 'deposito', None)
+        with self.depositos.usar(self.depositos.codigo_do_chat(chat_id)) as deposito:
+            self._local.deposito = deposito
+            try:
+                self._processar_no_deposito(update, chat_id)
+            finally:
+                self._local.deposito = anterior
+
+    def _processar_no_deposito(self, update: Dict[str, Any], chat_id: int):
         """Processa uma mensagem de forma isolada com tratamento de erro."""
         try:
             msg = update['message']
             nome = msg['from'].get('first_name', 'Desconhecido')
             mensagem = msg.get('text', '')
             
-            logger.info(f"Nova mensagem de {nome} ({chat_id}): {mensagem}")
+            # A senha do /login não vai para o log
+            texto_log = '/login ***' if mensagem.startswith('/login') else mensagem
+            logger.info("Nova mensagem de %s (%s): %s", nome, chat_id, texto_log)
 
             # Comando login (não requer autenticação)
             if mensagem.startswith('/login'):
@@ -166,13 +369,20 @@ class BotTelegram:
                 if not senha_fornecida:
                     self.send_message(chat_id, "[AVISO] Use: /login SENHA")
                     return
+                # Muitas senhas erradas no último minuto (somando os chats): não roda o PBKDF2
+                if self.tentativas.sobrecarregado():
+                    self.send_message(chat_id, "[AVISO] Muitas tentativas de login agora. Tente em 1 minuto.")
+                    logger.warning("Login de %s recusado: limite global de senhas erradas", chat_id)
+                    return
                 
-                if senha_fornecida != self.senha_autenticacao:
+                papel = self._papel_da_senha(senha_fornecida)
+                if papel is None:
                     logger.warning(f"Tentativa de login com senha incorreta do usuário {chat_id}")
-                    self.send_message(chat_id, "[ERRO] Senha incorreta! Autenticação falhou.")
+                    self._senha_incorreta(chat_id, "[ERRO] Senha incorreta! Autenticação falhou.")
                     return
+                self.tentativas.registrar_sucesso(chat_id)
                 
-                resultado = self.gerenciador_usuarios.autenticar(chat_id, senha_fornecida)
+                resultado = self.gerenciador_usuarios.autenticar(chat_id, senha_fornecida, papel=papel)
                 if resultado['status'] == 'sucesso':
                     self.send_message(chat_id, f"[OK] {resultado['mensagem']}\n\nDigite /help para ver os comandos disponíveis.")
                     logger.info(f"Usuário {chat_id} ({nome}) autenticado com sucesso")
@@ -180,9 +390,9 @@ class BotTelegram:
                     self.send_message(chat_id, f"[AVISO] {resultado['mensagem']}")
                 return
 
-            # Verifica se usuário está autenticado para os outros comandos
+            # Verifica se usuário está autenticado (sessão ativa) para os outros comandos
             if not self.gerenciador_usuarios.esta_autenticado(chat_id):
-                self.send_message(chat_id, "[ERRO] Você não está autenticado!\nUse: /login SENHA")
+                self.send_message(chat_id, "[ERRO] Você não está autenticado ou a sessão expirou!\nUse: /login SENHA")
                 logger.warning(f"Acesso negado para usuário não autenticado {chat_id}: {mensagem}")
                 return
 
@@ -191,31 +401,37 @@ class BotTelegram:
                 self._enviar_ajuda(chat_id)
                 return
             
-            if mensagem.startswith('/placa'):
-                placa = mensagem.replace('/placa', '').strip()
+            if mensagem.startswith('/logout'):
+                self.gerenciador_usuarios.encerrar_sessao(chat_id)
+                self.send_message(chat_id, "[OK] Sessão encerrada.")
+                logger.info("Sessão encerrada por %s", chat_id)
+
+            elif mensagem.startswith('/placa'):
+                texto = mensagem.replace('/placa', '').strip()
+                placa = normalizar_placa(texto)
                 if placa:
-                    threading.Thread(
-                        target=self.pesquisa_placa_async, 
-                        args=(chat_id, placa), 
-                        daemon=True
-                    ).start()
+                    self._iniciar_tarefa(self.pesquisa_placa_async, chat_id, placa)
+                elif texto:
+                    self.send_message(chat_id, f"[ERRO] Placa inválida: {texto} (use ABC1234 ou ABC1D23)")
                 else:
                     self.send_message(chat_id, "[ERRO] Uso: /placa ABC1234")
                     
             elif mensagem.startswith('/lh'):
-                lh = mensagem.replace('/lh', '').strip()
+                texto = mensagem.replace('/lh', '').strip()
+                lh = normalizar_lh(texto)
                 if lh:
-                    threading.Thread(
-                        target=self.pesquisa_lh_async, 
-                        args=(chat_id, lh), 
-                        daemon=True
-                    ).start()
+                    self._iniciar_tarefa(self.pesquisa_lh_async, chat_id, lh)
+                elif texto:
+                    self.send_message(chat_id, f"[ERRO] LH inválida: {texto} (esperado 13 letras/números)")
                 else:
-                    self.send_message(chat_id, "[ERRO] Uso: /lh 1234567890123")
+                    self.send_message(chat_id, "[ERRO] Uso: /lh LH12345678901")
 
             elif mensagem.startswith('/remove'):
-                dado_para_remover = mensagem.replace('/remove', '').strip()
-                if dado_para_remover:
+                texto = mensagem.replace('/remove', '').strip()
+                dado_para_remover = normalizar_lh(texto)
+                if texto and not dado_para_remover:
+                    self.send_message(chat_id, f"[ERRO] LH inválida: {texto} (esperado 13 letras/números)")
+                elif dado_para_remover:
                     # Valida se o usuário pode remover este motorista
                     if not self.gerenciador_usuarios.pode_editar_motorista(chat_id, dado_para_remover):
                         self.send_message(chat_id, "[ERRO] Você não tem permissão para remover este motorista!\nVocê só pode remover motoristas que criou.")
@@ -227,27 +443,37 @@ class BotTelegram:
                         if resultado['status'] == 'sucesso':
                             self.send_message(chat_id, f"[OK] {resultado['mensagem']}")
                             self.gerenciador_usuarios.remover_motorista(chat_id, dado_para_remover)
-                            logger.info(f"Motorista removido por {chat_id}: {dado_para_remover}")
+                            self.notificador.registrar_transicao(
+                                chat_id, dado_para_remover, resultado['dados']['Nome'], 'removido',
+                                deposito=self._codigo_assinatura())
+                            logger.info("Motorista removido por %s: %s", chat_id, dado_para_remover)
                         else:
                             self.send_message(chat_id, f"[ERRO] {resultado['mensagem']}")
                     except Exception as e:
                         logger.error(f"Erro ao remover motorista: {e}")
                         self.send_message(chat_id, f"[ERRO] Erro ao remover: {e}")
                 else:
-                    self.send_message(chat_id, "[ERRO] Uso: /remove LH_1234567890123")
+                    self.send_message(chat_id, "[ERRO] Uso: /remove LH12345678901")
 
             elif mensagem.startswith('/add'):
                 dados_para_adicionar = mensagem.replace('/add', '').strip()
                 if dados_para_adicionar:
                     try:
-                        resultado = self.bot_bolsao.adicionar_motoristas(dados_para_adicionar)
+                        comando = analisar_adicionar(dados_para_adicionar)
+                    except ErroValidacao as e:
+                        self.send_message(chat_id, f"[ERRO] {e}")
+                        return
+                    try:
+                        resultado = self.bot_bolsao.adicionar_motoristas(comando, dono=chat_id)
                         
                         if resultado['status'] == 'novo':
                             self.send_message(chat_id, f"[OK] {resultado['mensagem']}")
                             # Registra que este usuário adicionou este motorista
-                            lh = dados_para_adicionar.split()[0]  # Extrai o LH da entrada
+                            lh = comando.lh
                             self.gerenciador_usuarios.adicionar_motorista(chat_id, lh)
-                            logger.info(f"Motorista adicionado por {chat_id}: {lh}")
+                            self.notificador.registrar_transicao(chat_id, lh, resultado['dados']['Nome'], 'novo',
+                                                                 deposito=self._codigo_assinatura())
+                            logger.info("Motorista adicionado por %s: %s", chat_id, lh)
                         
                         elif resultado['status'] == 'duplicado':
                             self.send_message(
@@ -266,11 +492,14 @@ class BotTelegram:
                         logger.error(f"Erro inesperado ao adicionar motorista: {e}", exc_info=True)
                         self.send_message(chat_id, f"[ERRO] Erro ao adicionar: {str(e)[:100]}")
                 else:
-                    self.send_message(chat_id, "[ERRO] Uso: /add LH_1234567890123 NOME PLACA")
+                    self.send_message(chat_id, "[ERRO] Uso: /add LH12345678901 NOME PLACA")
             
             elif mensagem.startswith('/concluidos'):
-                lh = mensagem.replace('/concluidos', '').strip()
-                if lh:
+                texto = mensagem.replace('/concluidos', '').strip()
+                lh = normalizar_lh(texto)
+                if texto and not lh:
+                    self.send_message(chat_id, f"[ERRO] LH inválida: {texto} (esperado 13 letras/números)")
+                elif lh:
                     # Valida se o usuário pode marcar este motorista
                     if not self.gerenciador_usuarios.pode_editar_motorista(chat_id, lh):
                         self.send_message(chat_id, "[ERRO] Você não tem permissão para marcar este motorista!\nVocê só pode editar motoristas que criou.")
@@ -281,18 +510,23 @@ class BotTelegram:
                         resultado = self.bot_bolsao.marcar_concluido(lh)
                         if resultado['status'] == 'sucesso':
                             self.send_message(chat_id, f"[OK] {resultado['mensagem']}")
-                            logger.info(f"Motorista marcado como concluído por {chat_id}: {lh}")
+                            self.notificador.registrar_transicao(chat_id, lh, resultado['dados']['Nome'], 'concluido',
+                                                                 deposito=self._codigo_assinatura())
+                            logger.info("Motorista marcado como concluído por %s: %s", chat_id, lh)
                         else:
                             self.send_message(chat_id, f"[ERRO] {resultado['mensagem']}")
                     except Exception as e:
                         logger.error(f"Erro ao marcar como concluído: {e}")
                         self.send_message(chat_id, f"[ERRO] Erro: {e}")
                 else:
-                    self.send_message(chat_id, "[ERRO] Uso: /concluidos LH_1234567890123")
+                    self.send_message(chat_id, "[ERRO] Uso: /concluidos LH12345678901")
             
             elif mensagem.startswith('/cancelados'):
-                lh = mensagem.replace('/cancelados', '').strip()
-                if lh:
+                texto = mensagem.replace('/cancelados', '').strip()
+                lh = normalizar_lh(texto)
+                if texto and not lh:
+                    self.send_message(chat_id, f"[ERRO] LH inválida: {texto} (esperado 13 letras/números)")
+                elif lh:
                     # Valida se o usuário pode marcar este motorista
                     if not self.gerenciador_usuarios.pode_editar_motorista(chat_id, lh):
                         self.send_message(chat_id, "[ERRO] Você não tem permissão para marcar este motorista!\nVocê só pode editar motoristas que criou.")
@@ -303,33 +537,75 @@ class BotTelegram:
                         resultado = self.bot_bolsao.marcar_cancelado(lh)
                         if resultado['status'] == 'sucesso':
                             self.send_message(chat_id, f"[OK] {resultado['mensagem']}")
-                            logger.info(f"Motorista marcado como cancelado por {chat_id}: {lh}")
+                            self.notificador.registrar_transicao(chat_id, lh, resultado['dados']['Nome'], 'cancelado',
+                                                                 deposito=self._codigo_assinatura())
+                            logger.info("Motorista marcado como cancelado por %s: %s", chat_id, lh)
                         else:
                             self.send_message(chat_id, f"[ERRO] {resultado['mensagem']}")
                     except Exception as e:
                         logger.error(f"Erro ao marcar como cancelado: {e}")
                         self.send_message(chat_id, f"[ERRO] Erro: {e}")
                 else:
-                    self.send_message(chat_id, "[ERRO] Uso: /cancelados LH_1234567890123")
+                    self.send_message(chat_id, "[ERRO] Uso: /cancelados LH12345678901")
             
+            elif mensagem.startswith('/deposito'):
+                self._comando_deposito(chat_id, mensagem.replace('/deposito', '', 1).strip())
+
+            elif mensagem.startswith('/seguir') or mensagem.startswith('/deixar'):
+                self._comando_assinatura(chat_id, mensagem)
+
+            elif mensagem.startswith('/resumo'):
+                self.send_message(chat_id, self._texto_resumo(chat_id))
+
+            elif mensagem.startswith('/fila'):
+                self._comando_fila(chat_id, mensagem.replace('/fila', '').strip())
+
+            elif mensagem.startswith('/proximo'):
+                resultado = self.bot_bolsao.chamar_proximo()
+                if resultado['status'] == 'sucesso':
+                    m = resultado['dados']
+                    self.send_message(
+                        chat_id,
+                        f"[OK] Próximo: {m['LH']} | {m['Nome']} | {m['Placas']}\n"
+                        f"Aguardou {_minutos(resultado['espera'])}. Restam {resultado['restantes']} na fila."
+                    )
+                    self.notificador.registrar_transicao(m.get('Dono', chat_id), m['LH'], m['Nome'], 'chamado',
+                                                     deposito=self._codigo_assinatura())
+                    logger.info("Próximo da fila chamado por %s: %s", chat_id, m['LH'])
+                else:
+                    self.send_message(chat_id, f"[INFO] {resultado['mensagem']}")
+
+            elif mensagem.startswith('/assinaturas'):
+                alvos = self.assinaturas.listar(chat_id)
+                if alvos:
+                    self.send_message(chat_id, "[INFO] Você segue: " + ", ".join(alvos))
+                else:
+                    self.send_message(chat_id, "[INFO] Você não segue ninguém. Use: /seguir todos")
+
+            elif mensagem.startswith('/perfil'):
+                self._comando_perfil(update, chat_id, mensagem)
+
             elif mensagem == '/planilha' or mensagem.startswith('/planilha'):
-                # Extrai senha se foi fornecida
-                senha_fornecida = mensagem.replace('/planilha', '').strip()
-                
-                # Verifica se a senha foi fornecida
-                if not senha_fornecida:
-                    self.send_message(chat_id, "[AVISO] Esta planilha requer senha.\nUso: /planilha SENHA")
-                    return
-                
-                # Valida a senha
-                if senha_fornecida != self.senha_planilha:
-                    logger.warning(f"Tentativa de acessar planilha com senha incorreta")
-                    self.send_message(chat_id, "[ERRO] Senha incorreta! Acesso negado.")
+                # Acesso pelo papel da sessão (login com a senha de supervisor)
+                if not self.gerenciador_usuarios.tem_papel(chat_id, PAPEL_SUPERVISOR):
+                    logger.warning("Tentativa de acessar planilha sem papel de supervisor: %s", chat_id)
+                    self.send_message(chat_id, "[ERRO] A planilha requer perfil supervisor.\n"
+                                               "Faça /login com a senha de supervisor.")
                     return
+
+                # Data opcional DD/MM/AAAA de um dia já fechado
+                argumentos = mensagem.replace('/planilha', '').split()
+                dia = self.bot_bolsao.dia_atual
+                if argumentos and argumentos[-1].count('/') == 2:
+                    try:
+                        dia = datetime.strptime(argumentos[-1], '%d/%m/%Y').date()
+                    except ValueError:
+                        self.send_message(chat_id, "[ERRO] Data inválida. Uso: /planilha DD/MM/AAAA")
+                        return
                 
                 try:
                     # Gera relatório
-                    relatorio = self.bot_bolsao.obter_relatorio_fechamento()
+                    relatorio = self.bot_bolsao.obter_relatorio_dia(dia)
                     if not relatorio:
                         self.send_message(chat_id, "[AVISO] Nenhum motorista registrado para gerar planilha.")
                         return
@@ -337,18 +613,233 @@ class BotTelegram:
                     logger.info(f"Acesso à planilha permitido para {chat_id}")
                     
                     # Cria/atualiza planilha
-                    threading.Thread(
-                        target=self._gerar_e_enviar_planilha,
-                        args=(chat_id, relatorio),
-                        daemon=True
-                    ).start()
+                    self._iniciar_tarefa(self._gerar_e_enviar_planilha, chat_id, relatorio, dia)
                 except Exception as e:
                     logger.error(f"Erro ao processar planilha: {e}")
                     self.send_message(chat_id, f"[ERRO] Erro ao gerar planilha: {e}")
         except Exception as e:
             logger.error(f"Erro ao processar mensagem: {e}", exc_info=True)
     
-    def _gerar_e_enviar_planilha(self, chat_id, relatorio):
+    def _papel_da_senha(self, senha):
+        """Papel correspondente à senha do /login (do maior para o menor), ou None."""
+        for papel, segredo in ((PAPEL_ADMIN, self.senha_admin),
+                               (PAPEL_SUPERVISOR, self.senha_planilha),
+                               (PAPEL_OPERADOR, self.senha_autenticacao)):
+            if segredo is not None and segredo.verificar(senha):
+                return papel
+        return None
+
+    def _senha_incorreta(self, chat_id, mensagem_erro):
+        """Conta a tentativa errada e avisa; ao atingir o limite, informa o bloqueio."""
+        bloqueio = self.tentativas.registrar_falha(chat_id)
+        if bloqueio:
+            self.send_message(
+                chat_id,
+                f"[ERRO] Muitas tentativas incorretas. Tente novamente em {int(bloqueio // 60) or 1} minuto(s)."
+            )
+        else:
+            self.send_message(chat_id, mensagem_erro)
+
+    def _texto_resumo(self, chat_id):
+        """/resumo: painel do dia montado a partir dos contadores (não gera relatório)."""
+        r = self.bot_bolsao.resumo(dono=chat_id)
+        linhas = [
+            f"[RESUMO] Dia {r['dia'].strftime('%d/%m/%Y')}",
+            f"Ativos: {r['ativos']} | Concluídos: {r['concluidos']} | Cancelados: {r['cancelados']}",
+            f"Total no dia: {r['total']}",
+        ]
+        if r['dono']:
+            ativos, concluidos, cancelados = r['dono']
+            linhas.append(f"Seus motoristas: {ativos} ativos, {concluidos} concluídos, {cancelados} cancelados")
+        linhas.append(
+            f"Concluídos/hora: {r['concluidos_hora_atual']} às {r['hora_atual']:02d}h, "
+            f"média {r['media_concluidos_hora']:.1f}/h"
+        )
+        linhas.append(f"Entradas às {r['hora_atual']:02d}h: {r['entradas_hora_atual']}")
+        if r['por_hora']:
+            linhas.append("")
+            linhas.append("Hora  entradas/concluídos/cancelados")
+            linhas.extend(f"{hora:02d}h   {e}/{c}/{x}" for hora, e, c, x in r['por_hora'])
+        return "\n".join(linhas)
+
+    def _comando_fila(self, chat_id, texto):
+        """/fila: situação da fila do pátio; /fila LH|PLACA: posição de um caminhão."""
+        if texto:
+            encontrados = self.bot_bolsao.posicao_na_fila(texto)
+            if isinstance(encontrados, str):
+                self.send_message(chat_id, f"[ERRO] {encontrados}")
+            elif not encontrados:
+                self.send_message(chat_id, f"[INFO] Nenhum motorista encontrado para: {texto}")
+            else:
+                linhas = []
+                for m, posicao, espera in encontrados:
+                    if posicao is None:
+                        linhas.append(f"{m['LH']} | {m['Nome']}: não está aguardando (já chamado ou encerrado)")
+                    else:
+                        linhas.append(f"{m['LH']} | {m['Nome']}: posição {posicao}, aguardando há {_minutos(espera)}")
+                self.send_message(chat_id, "[FILA] " + "\n".join(linhas))
+            return
+
+        f = self.bot_bolsao.estado_fila()
+        linhas = [f"[FILA] {f['aguardando']} caminhão(ões) aguardando"]
+        if f['atendidos']:
+            linhas.append(
+                f"Espera hoje ({f['atendidos']} chamados/concluídos): "
+                f"p50 {f['p50']} min | p95 {f['p95']} min | média {f['media']:.0f} min"
+            )
+        if f['primeiros']:
+            linhas.append("")
+            linhas.extend(f"{posicao}. {m['LH']} | {m['Nome']} | {m['Placas']} - {_minutos(espera)}"
+                          for posicao, m, espera in f['primeiros'])
+            if f['aguardando'] > len(f['primeiros']):
+                linhas.append(f"... e mais {f['aguardando'] - len(f['primeiros'])}")
+        self.send_message(chat_id, "\n".join(linhas))
+
+    def _codigo_assinatura(self):
+        """Depósito atual para as assinaturas: None no padrão, o código nos demais."""
+        codigo = self.deposito.codigo
+        return None if codigo == DEPOSITO_PADRAO else codigo
+
+    def _comando_deposito(self, chat_id, texto):
+        """/deposito: mostra o depósito do chat; /deposito CODIGO vincula; /deposito padrao desfaz.
+
+        Trocar exige sessão de admin no depósito atual, e o código precisa estar
+        em `depositos_permitidos`.
+        """
+        if not texto:
+            self.send_message(chat_id, f"[INFO] Depósito deste chat: {self.deposito.codigo}\n"
+                                       "Use: /deposito CODIGO para trocar (admin).")
+            return
+        if not self.gerenciador_usuarios.tem_papel(chat_id, PAPEL_ADMIN):
+            self.send_message(chat_id, "[ERRO] Só admin pode trocar o depósito do chat.")
+            logger.warning("Troca de depósito negada para %s: %s", chat_id, texto)
+            return
+        if texto.lower() == DEPOSITO_PADRAO:
+            if self.depositos.desvincular(chat_id):
+                self.send_message(chat_id, f"[OK] Chat de volta ao depósito {DEPOSITO_PADRAO}.\n"
+                                           "Faça /login para usar este depósito.")
+            else:
+                self.send_message(chat_id, f"[INFO] Este chat já usa o depósito {DEPOSITO_PADRAO}.")
+            return
+        resultado = self.depositos.vincular(chat_id, texto)
+        if resultado['status'] == 'sucesso':
+            # Sessões são por depósito: é preciso fazer /login no novo
+            self.send_message(chat_id, f"[OK] {resultado['mensagem']}\nFaça /login para usar este depósito.")
+        else:
+            self.send_message(chat_id, f"[ERRO] {resultado['mensagem']}")
+
+    def _comando_assinatura(self, chat_id, mensagem):
+        """/seguir e /deixar: 'todos' (bolsão inteiro do depósito) ou o chat_id de um dono."""
+        comando, _, alvo = mensagem.partition(' ')
+        alvo = alvo.strip().lower()
+        if alvo != TODOS and not alvo.lstrip('-').isdigit():
+            self.send_message(chat_id, f"[ERRO] Uso: {comando} todos | {comando} CHAT_ID_DO_DONO")
+            return
+        # Donos e 'todos' valem só no depósito atual
+        alvo = alvo_assinatura(alvo, self._codigo_assinatura())
+        if comando == '/seguir':
+            if self.assinaturas.seguir(chat_id, alvo):
+                self.send_message(chat_id, f"[OK] Você vai receber resumos de: {alvo}")
+            else:
+                self.send_message(chat_id, f"[AVISO] Você já segue: {alvo}")
+        else:
+            if self.assinaturas.deixar(chat_id, alvo):
+                self.send_message(chat_id, f"[OK] Você deixou de seguir: {alvo}")
+            else:
+                self.send_message(chat_id, f"[AVISO] Você não segue: {alvo}")
+
+    def _processar_callback(self, callback: Dict[str, Any]):
+        """Trata cliques nos botões de paginação das buscas."""
+        try:
+            usuario_id = callback['from']['id']
+            mensagem = callback.get('message') or {}
+            chat_id = mensagem.get('chat', {}).get('id', usuario_id)
+            dados = callback.get('data', '')
+
+            # Como nas mensagens, a sessão é do chat (num grupo, o /login vale para o grupo)
+            with self.depositos.usar(self.depositos.codigo_do_chat(chat_id)) as deposito:
+                autenticado = deposito.gerenciador_usuarios.esta_autenticado(chat_id)
+            if not autenticado:
+                self.responder_callback(callback['id'], "Você não está autenticado!")
+                return
+            if not dados.startswith(PREFIXO_CALLBACK + ':'):
+                self.responder_callback(callback['id'])
+                return
+
+            pagina = self.paginador.pagina(chat_id, dados)
+            if pagina is None:
+                self.responder_callback(callback['id'], "Busca expirada. Pesquise novamente.")
+                return
+            texto, teclado = pagina
+            self.responder_callback(callback['id'])
+            self.editar_mensagem(chat_id, mensagem.get('message_id'), texto, reply_markup=teclado)
+        except Exception as e:
+            logger.error(f"Erro ao processar callback: {e}", exc_info=True)
+
+    def _processar_inline(self, inline_query: Dict[str, Any]):
+        """Encaminha inline_queries de usuários autenticados para a busca com debounce."""
+        usuario_id = inline_query['from']['id']
+        # Sem chat de origem: vale o depósito do chat privado do usuário. Fica fixado
+        # até a busca (que roda depois, na thread do debounce) terminar
+        deposito = self.depositos.obter(self.depositos.codigo_do_chat(usuario_id))
+        if not deposito.gerenciador_usuarios.esta_autenticado(usuario_id):
+            self.depositos.liberar(deposito)
+            # Resposta pessoal e sem cache para quem ainda não fez /login
+            self.responder_inline(inline_query['id'], [], cache_time=0, pessoal=True)
+            return
+        self.busca_inline.receber(inline_query, deposito)
+
+    def _comando_perfil(self, update, chat_id, mensagem):
+        """/perfil [SEGUNDOS] e /perfil_cmd <COMANDO> (somente sessões com papel admin)."""
+        if not self.perfilador_habilitado or not self.gerenciador_usuarios.tem_papel(chat_id, PAPEL_ADMIN):
+            self.send_message(chat_id, "[ERRO] Comando restrito a administradores.")
+            logger.warning("Tentativa de usar profiling sem permissão: %s", chat_id)
+            return
+
+        if mensagem.startswith('/perfil_cmd'):
+            comando = mensagem.replace('/perfil_cmd', '', 1).strip()
+            if not comando.startswith('/') or comando.startswith('/perfil'):
+                self.send_message(chat_id, "[ERRO] Uso: /perfil_cmd /placa ABC1234")
+                return
+            update_perfilado = dict(update, message=dict(update['message'], text=comando))
+            self._iniciar_tarefa(self._perfilar_comando, update_perfilado, chat_id)
+            return
+
+        argumento = mensagem.replace('/perfil', '', 1).strip() or '30'
+        if not argumento.isdigit() or not 1 <= int(argumento) <= 300:
+            self.send_message(chat_id, "[ERRO] Uso: /perfil SEGUNDOS (1 a 300)")
+            return
+        self.send_message(chat_id, f"[INFO] Perfilando todas as threads por {argumento}s...")
+        self._iniciar_tarefa(self._perfilar_amostragem, chat_id, int(argumento))
+
+    def _perfilar_amostragem(self, chat_id, segundos):
+        """Roda o profiler por amostragem e envia o arquivo collapsed-stack."""
+        try:
+            from perfilador import PerfiladorAmostragem
+            caminho = PerfiladorAmostragem(diretorio=self.diretorio_dados).executar(segundos)
+            if not self.enviar_arquivo(chat_id, caminho):
+                self.send_message(chat_id, "[ERRO] Falha ao enviar perfil.")
+        except Exception as e:
+            logger.error(f"Erro ao perfilar: {e}", exc_info=True)
+            self.send_message(chat_id, f"[ERRO] Erro ao perfilar: {str(e)[:100]}")
+
+    def _perfilar_comando(self, update, chat_id):
+        """Executa um único comando sob cProfile (tarefas filhas rodam na mesma thread)."""
+        try:
+            from perfilador import perfilar_chamada
+            self._local.sincrono = True
+            try:
+                caminho = perfilar_chamada(self._processar_mensagem, update, chat_id,
+                                           diretorio=self.diretorio_dados)
+            finally:
+                self._local.sincrono = False
+            if not self.enviar_arquivo(chat_id, caminho):
+                self.send_message(chat_id, "[ERRO] Falha ao enviar perfil.")
+        except Exception as e:
+            logger.error(f"Erro ao perfilar comando: {e}", exc_info=True)
+            self.send_message(chat_id, f"[ERRO] Erro ao perfilar: {str(e)[:100]}")
+
+    def _gerar_e_enviar_planilha(self, chat_id, relatorio, dia=None):
         """Gera e envia a planilha de fechamento."""
         try:
             self.send_message(chat_id, "[INFO] Gerando planilha de fechamento...")
@@ -356,10 +847,10 @@ class BotTelegram:
             # Debug
             logger.info(f"Relatório recebido: {len(relatorio)} motoristas")
             if relatorio:
-                logger.debug(f"Primeiro registro: {relatorio[0]}")
+                logger.debug("Primeiro registro: %s", relatorio[0])
             
             # Cria/atualiza planilha
-            caminho = self.planilha.criar_ou_atualizar_planilha(relatorio)
+            caminho = self.planilha.criar_ou_atualizar_planilha(relatorio, dia=dia)
             logger.info(f"Planilha criada: {caminho}")
             
             # Envia arquivo
@@ -387,35 +878,73 @@ class BotTelegram:
 
 /login <SENHA>
   Realiza login no sistema (necessário para usar os comandos).
+  A senha define o perfil: operador, supervisor ou admin.
+  A sessão expira depois de algumas horas.
   Exemplo: /login MinhaS3nh4
 
-/add <LH> <NOME> <PLACA>
+/logout
+  Encerra a sessão.
+
+/deposito [<CODIGO>|padrao]
+  Mostra ou troca o depósito deste chat (trocar: só admin, e só
+  para depósitos configurados). Cada depósito tem seus motoristas,
+  usuários e planilhas; depois de trocar, faça /login.
+  Sem código, o chat usa o depósito padrão.
+  Exemplo: /deposito CD01
+
+/add <LH> <NOME> <PLACA>[,<PLACA>...]
   Adiciona um novo motorista ao sistema.
-  Exemplo: /add LH1234567890123 Joao Silva ABC1234
+  Placas no formato antigo (ABC1234) ou Mercosul (ABC1D23).
+  Exemplo: /add LH12345678901 Joao Silva ABC1234,DEF5G67
 
 /placa <PLACA>
-  Busca motorista pela placa (7 caracteres).
+  Busca motorista pela placa (ABC1234 ou ABC1D23).
   Exemplo: /placa ABC1234
 
 /lh <LH>
   Busca motorista pela LH (13 caracteres).
-  Exemplo: /lh LH1234567890123
+  Exemplo: /lh LH12345678901
 
 /remove <LH>
   Remove motorista do sistema (marca como cancelado).
-  Exemplo: /remove LH1234567890123
+  Exemplo: /remove LH12345678901
 
 /concluidos <LH>
   Marca motorista como concluido (verde na planilha).
-  Exemplo: /concluidos LH1234567890123
+  Exemplo: /concluidos LH12345678901
 
 /cancelados <LH>
   Marca motorista como cancelado (vermelho na planilha).
-  Exemplo: /cancelados LH1234567890123
+  Exemplo: /cancelados LH12345678901
 
-/planilha <SENHA>
+/seguir todos | /seguir <CHAT_ID>
+  Recebe resumos periódicos das mudanças de status
+  (de todo o bolsão ou dos motoristas de um usuário),
+  só do depósito deste chat.
+  Exemplo: /seguir todos
+
+/deixar todos | /deixar <CHAT_ID>
+  Para de receber os resumos.
+
+/assinaturas
+  Lista o que você está seguindo.
+
+/resumo
+  Painel do dia: ativos, concluídos e cancelados, seus motoristas
+  e concluídos por hora.
+
+/fila [<LH>|<PLACA>]
+  Fila do pátio por ordem de chegada: próximos, tempo de espera
+  e p50/p95 das esperas do dia. Com LH ou placa, mostra a posição.
+  Exemplo: /fila ABC1234
+
+/proximo
+  Chama o próximo caminhão da fila (continua ativo até ser
+  concluído ou cancelado).
+
+/planilha [DD/MM/AAAA]
   Gera e envia planilha de fechamento com cores.
-  Requer senha de segurança.
+  Requer perfil supervisor. Informe a data para um dia já fechado.
   - Amarelo = Ativo
   - Verde = Concluido
   - Vermelho = Cancelado
@@ -426,20 +955,22 @@ class BotTelegram:
 Duvidas? Entre em contato com o suporte!
 """
         self.send_message(chat_id, mensagem_ajuda)
-        logger.info(f"Ajuda enviada para {chat_id}")
+        logger.info("Ajuda enviada para %s", chat_id)
     
     def pesquisa_placa_async(self, chat_id, placa):
         """Busca por placa em thread separada e envia resposta automaticamente."""
         try:
-            logger.info(f"Iniciando busca por placa: {placa}")
-            placa_pesquisada = self.bot_bolsao.pesquisar_motoristas(placa)
-            if placa_pesquisada:
-                resposta = f"[OK] Motorista encontrado: {placa_pesquisada}"
-                logger.info(f"Placa encontrada: {placa}")
-                self.send_message(chat_id, resposta)
+            logger.info("Iniciando busca por placa: %s", placa)
+            placa_pesquisada = self.bot_bolsao.pesquisar_motoristas(Consulta('placa', placa))
+            if isinstance(placa_pesquisada, str):
+                self.send_message(chat_id, f"[ERRO] {placa_pesquisada}")
+            elif placa_pesquisada:
+                texto, teclado = self.paginador.criar(chat_id, f"Placa {placa}", placa_pesquisada)
+                logger.info("Placa encontrada: %s", placa)
+                self.send_message(chat_id, texto, reply_markup=teclado)
             else:
                 resposta = f"[FALHA] Nenhum motorista encontrado para placa {placa}"
-                logger.info(f"Placa não encontrada: {placa}")
+                logger.info("Placa não encontrada: %s", placa)
                 self.send_message(chat_id, resposta)
         except Exception as e:
             logger.error(f"Erro na busca de placa {placa}: {e}", exc_info=True)
@@ -448,36 +979,41 @@ Duvidas? Entre em contato com o suporte!
     def pesquisa_lh_async(self, chat_id, lh):
         """Busca por LH em thread separada e envia resposta automaticamente."""
         try:
-            logger.info(f"Iniciando busca por LH: {lh}")
-            lh_pesquisada = self.bot_bolsao.pesquisar_motoristas(lh)
-            if lh_pesquisada:
-                resposta = f"[OK] Motorista encontrado: {lh_pesquisada}"
-                logger.info(f"LH encontrado: {lh}")
-                self.send_message(chat_id, resposta)
+            logger.info("Iniciando busca por LH: %s", lh)
+            lh_pesquisada = self.bot_bolsao.pesquisar_motoristas(Consulta('lh', lh))
+            if isinstance(lh_pesquisada, str):
+                self.send_message(chat_id, f"[ERRO] {lh_pesquisada}")
+            elif lh_pesquisada:
+                texto, teclado = self.paginador.criar(chat_id, f"LH {lh}", lh_pesquisada)
+                logger.info("LH encontrado: %s", lh)
+                self.send_message(chat_id, texto, reply_markup=teclado)
             else:
                 resposta = f"[FALHA] Nenhum motorista encontrado para LH {lh}"
-                logger.info(f"LH não encontrado: {lh}")
+                logger.info("LH não encontrado: %s", lh)
                 self.send_message(chat_id, resposta)
         except Exception as e:
             logger.error(f"Erro na busca de LH {lh}: {e}", exc_info=True)
             self.send_message(chat_id, f"❌ Erro na busca: {str(e)[:100]}")
 
-    def send_message(self, chat_id, text):
-        """Envia mensagem com retry automático."""
+    def send_message(self, chat_id, text, reply_markup=None):
+        """Envia mensagem com retry automático (reply_markup opcional, ex.: teclado inline)."""
         if not self.link_base:
             logger.error("link_base não está configurado")
             return False
         
         url = self.link_base + "sendMessage"
+        dados = {"chat_id": chat_id, "text": text}
+        if reply_markup:
+            dados["reply_markup"] = json.dumps(reply_markup)
         for tentativa in range(1, 3):  # 2 tentativas
             try:
                 response = requests.post(
                     url, 
-                    data={"chat_id": chat_id, "text": text},
+                    data=dados,
                     timeout=self.timeout
                 )
                 if response.status_code == 200:
-                    logger.info(f"Mensagem enviada para {chat_id}")
+                    logger.info("Mensagem enviada para %s", chat_id)
                     return True
                 else:
                     logger.warning(f"Status {response.status_code} ao enviar para {chat_id}")
@@ -490,6 +1026,47 @@ Duvidas? Entre em contato com o suporte!
         logger.error(f"Falha ao enviar mensagem para {chat_id}")
         return False
     
+    def editar_mensagem(self, chat_id, message_id, text, reply_markup=None):
+        """Edita o texto (e o teclado) de uma mensagem já enviada."""
+        dados = {"chat_id": chat_id, "message_id": message_id, "text": text}
+        if reply_markup:
+            dados["reply_markup"] = json.dumps(reply_markup)
+        try:
+            response = requests.post(self.link_base + "editMessageText", data=dados, timeout=self.timeout)
+            return response.status_code == 200
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Erro ao editar mensagem {message_id} de {chat_id}: {e}")
+            return False
+
+    def responder_callback(self, callback_id, texto=None):
+        """Confirma um callback_query (remove o "carregando" do botão)."""
+        dados = {"callback_query_id": callback_id}
+        if texto:
+            dados["text"] = texto
+        try:
+            requests.post(self.link_base + "answerCallbackQuery", data=dados, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Erro ao responder callback: {e}")
+
+    def responder_inline(self, inline_query_id, resultados, cache_time=10, pessoal=True):
+        """Responde um inline_query (answerInlineQuery).
+
+        Com pessoal=False o Telegram reaproveita a resposta para qualquer
+        usuário que digitar o mesmo texto, inclusive sem login.
+        """
+        dados = {
+            "inline_query_id": inline_query_id,
+            "results": json.dumps(resultados),
+            "cache_time": cache_time,
+            "is_personal": json.dumps(pessoal),
+        }
+        try:
+            response = requests.post(self.link_base + "answerInlineQuery", data=dados, timeout=self.timeout)
+            if response.status_code != 200:
+                logger.warning("Status %s ao responder inline query", response.status_code)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Erro ao responder inline query: {e}")
+
     def enviar_arquivo(self, chat_id, caminho_arquivo):
         """Envia arquivo para o Telegram."""
         if not self.link_base or not Path(caminho_arquivo).exists():
@@ -524,25 +1101,35 @@ Duvidas? Entre em contato com o suporte!
     def configure_token(self):
         """Configura o token do bot com validação."""
         try:
-            load_dotenv(Path(__file__).parent / ".env")
+            # Rodando como script o .env já foi lido no início; importado, é lido aqui
+            carregar_dotenv()
             self.token = os.getenv("token_telegram")
             if not self.token:
                 logger.error("Token não encontrado no arquivo .env")
                 raise ValueError("Variável 'token_telegram' não configurada no .env")
             self.link_base = f"https://api.telegram.org/bot{self.token}/"
             
-            # Carrega senha da planilha
-            self.senha_planilha = os.getenv("senha_planilha")
-            if not self.senha_planilha:
+            # Carrega senha da planilha (texto puro ou hash de `python seguranca.py`)
+            senha_planilha = os.getenv("senha_planilha")
+            if not senha_planilha:
                 logger.error("Senha da planilha não encontrada no arquivo .env")
                 raise ValueError("Variável 'senha_planilha' não configurada no .env")
+            self.senha_planilha = Segredo(senha_planilha)
             
             # Carrega senha de autenticação
-            self.senha_autenticacao = os.getenv("senha_autenticacao")
-            if not self.senha_autenticacao:
+            senha_autenticacao = os.getenv("senha_autenticacao")
+            if not senha_autenticacao:
                 logger.error("Senha de autenticação não encontrada no arquivo .env")
                 raise ValueError("Variável 'senha_autenticacao' não configurada no .env")
+            self.senha_autenticacao = Segredo(senha_autenticacao)
+
+            # Senha de admin (opcional): sem ela ninguém recebe o papel admin
+            senha_admin = os.getenv("senha_admin")
+            self.senha_admin = Segredo(senha_admin) if senha_admin else None
             
+            # Profiling sob demanda (opcional, só para admin)
+            self.perfilador_habilitado = os.getenv("perfilador_habilitado", "0") == "1"
+
             logger.info("Token, senha de planilha e autenticação configurados com sucesso")
         except Exception as e:
             logger.error(f"Erro ao configurar token/senha: {e}")
@@ -578,7 +1165,7 @@ Duvidas? Entre em contato com o suporte!
         if not self.token:
             raise RuntimeError("token não configurado. Chame configure_token() antes de clear_history().")
 
-        url = f"https://api.telegram.org/bot{self.token}/getUpdates"
+        url = f"{self.link_base or f'https://api.telegram.org/bot{self.token}/'}getUpdates"
         
         try:
             resp = requests.get(url, timeout=self.timeout)
@@ -617,14 +1204,39 @@ Duvidas? Entre em contato com o suporte!
             logger.warning(f"Erro ao definir offset: {e}")
         
 if __name__ == "__main__":
+    # Fases da inicialização com tempos, para acompanhar o cold start dos dynos
+    fases = [('imports', time.perf_counter() - _INICIO)]
+    inicio_fase = time.perf_counter()
+
+    # Antes do logging: as variáveis log_* podem estar no .env
+    carregar_dotenv()
+    configurar_logging_env()
+    fases.append(('dotenv_log', time.perf_counter() - inicio_fase))
+    inicio_fase = time.perf_counter()
+
     try:
         logger.info("=" * 60)
         logger.info("[BOT] Iniciando Bot Telegram para Busca de Motoristas")
         logger.info("=" * 60)
-        
-        bot_b = RoboBolsao()
+
+        bot_b = RoboBolsao(
+            hora_virada=os.getenv("hora_virada", "00:00"),
+            arquivo_historico=ArquivoHistorico(os.getenv(
+                "diretorio_historico", str(Path(os.getenv("diretorio_dados", ".")) / "historico"))),
+        )
         bot = BotTelegram(bot_bolsao=bot_b, token=None, texto=None, chat_id=None)
+        # Warm restart: volta com os motoristas do dia gravados no último desligamento
+        bot_b.carregar_estado(bot.arquivo_estado)
+        fases.append(('estado', time.perf_counter() - inicio_fase))
+        inicio_fase = time.perf_counter()
+
         bot.configure_token()
+        fases.append(('configuracao', time.perf_counter() - inicio_fase))
+        logger.info("Inicialização em %.0f ms (%s)", (time.perf_counter() - _INICIO) * 1000,
+                    ', '.join(f'{nome} {segundos * 1000:.0f} ms' for nome, segundos in fases))
+        # Heroku envia SIGTERM no deploy/restart; Ctrl+C segue o mesmo caminho
+        signal.signal(signal.SIGTERM, lambda *_: bot.parar())
+        signal.signal(signal.SIGINT, lambda *_: bot.parar())
         bot.rodarbot()
     except KeyboardInterrupt:
         logger.info("Bot interrompido pelo usuário")
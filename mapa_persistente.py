@@ -0,0 +1,166 @@
+"""
+Mapa imutável com cópia parcial na escrita (structural sharing).
+As chaves ficam numa trie de hash: nós internos são tuplas de 32 filhos
+(5 bits do hash por nível) e as folhas são dicts pequenos, divididos em um
+novo nó quando passam de LIMITE_FOLHA chaves. Uma escrita copia só o
+caminho da raiz até a folha (log32 n nós de 32 posições + uma folha), então
+o custo por escrita quase não cresce com o tamanho do mapa. Versões antigas
+continuam válidas e podem ser lidas por outras threads sem lock.
+"""
+from collections.abc import Mapping
+
+_BITS = 5
+_LARGURA = 1 << _BITS
+_MASCARA = _LARGURA - 1
+_HASH_64 = (1 << 64) - 1
+# Abaixo disso os bits do hash acabam; a folha cresce sem dividir (colisões)
+PROFUNDIDADE_MAXIMA = 64 // _BITS
+LIMITE_FOLHA = 8
+_VAZIO = {}  # folha vazia compartilhada; nunca é alterada
+
+
+def _hash(chave):
+    return hash(chave) & _HASH_64
+
+
+def _construir(itens, nivel):
+    """Nó (ou folha) para uma lista de (hash, chave, item) a partir de `nivel`."""
+    if len(itens) <= LIMITE_FOLHA or nivel >= PROFUNDIDADE_MAXIMA:
+        return {chave: item for _, chave, item in itens} or _VAZIO
+    grupos = [[] for _ in range(_LARGURA)]
+    deslocamento = nivel * _BITS
+    for entrada in itens:
+        grupos[(entrada[0] >> deslocamento) & _MASCARA].append(entrada)
+    return tuple(_construir(grupo, nivel + 1) if grupo else _VAZIO for grupo in grupos)
+
+
+def _com(no, h, nivel, chave, item):
+    if type(no) is tuple:
+        indice = (h >> (nivel * _BITS)) & _MASCARA
+        filhos = list(no)
+        filhos[indice] = _com(no[indice], h, nivel + 1, chave, item)
+        return tuple(filhos)
+    folha = dict(no)
+    folha[chave] = item
+    if len(folha) > LIMITE_FOLHA and nivel < PROFUNDIDADE_MAXIMA:
+        return _construir([(_hash(k), k, v) for k, v in folha.items()], nivel)
+    return folha
+
+
+def _sem(no, h, nivel, chave):
+    if type(no) is tuple:
+        indice = (h >> (nivel * _BITS)) & _MASCARA
+        filhos = list(no)
+        filhos[indice] = _sem(no[indice], h, nivel + 1, chave)
+        # Junta de volta numa folha quando o nó ficou pequeno
+        if not any(type(f) is tuple for f in filhos) and sum(map(len, filhos)) <= LIMITE_FOLHA:
+            folha = {}
+            for f in filhos:
+                folha.update(f)
+            return folha or _VAZIO
+        return tuple(filhos)
+    folha = dict(no)
+    del folha[chave]
+    return folha or _VAZIO
+
+
+def _folhas(raiz):
+    pilha = [raiz]
+    while pilha:
+        no = pilha.pop()
+        if type(no) is tuple:
+            pilha.extend(no)
+        elif no:
+            yield no
+
+
+class MapaPersistente(Mapping):
+    """Mapping imutável. Escritas (`com`, `sem`) retornam um novo mapa.
+
+    Cada valor guarda a ordem de inserção, para que `ordenado()` devolva os
+    itens na ordem em que chegaram (como um dict comum).
+    """
+
+    __slots__ = ('_raiz', '_tamanho', '_proximo_seq')
+
+    def __init__(self, _raiz=_VAZIO, _tamanho=0, _proximo_seq=0):
+        self._raiz = _raiz
+        self._tamanho = _tamanho
+        self._proximo_seq = _proximo_seq
+
+    @classmethod
+    def de_itens(cls, itens):
+        """Constrói um mapa a partir de pares (chave, valor), preservando a ordem."""
+        entradas = {}
+        seq = 0
+        for chave, valor in itens:
+            anterior = entradas.get(chave)
+            if anterior is None:
+                entradas[chave] = (seq, valor)
+                seq += 1
+            else:
+                entradas[chave] = (anterior[0], valor)
+        raiz = _construir([(_hash(chave), chave, item) for chave, item in entradas.items()], 0)
+        return cls(raiz, len(entradas), seq)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+    def _folha(self, chave):
+        no = self._raiz
+        h = _hash(chave)
+        while type(no) is tuple:
+            no = no[h & _MASCARA]
+            h >>= _BITS
+        return no
+
+    def __getitem__(self, chave):
+        return self._folha(chave)[chave][1]
+
+    def get(self, chave, padrao=None):
+        item = self._folha(chave).get(chave)
+        return padrao if item is None else item[1]
+
+    def __contains__(self, chave):
+        return chave in self._folha(chave)
+
+    def __iter__(self):
+        for folha in _folhas(self._raiz):
+            yield from folha
+
+    def __len__(self):
+        return self._tamanho
+
+    def items(self):
+        for folha in _folhas(self._raiz):
+            for chave, (_, valor) in folha.items():
+                yield chave, valor
+
+    def values(self):
+        for folha in _folhas(self._raiz):
+            for _, valor in folha.values():
+                yield valor
+
+    def ordenado(self):
+        """Lista de (chave, valor) na ordem de inserção."""
+        itens = [(seq, chave, valor) for folha in _folhas(self._raiz) for chave, (seq, valor) in folha.items()]
+        itens.sort(key=lambda item: item[0])
+        return [(chave, valor) for _, chave, valor in itens]
+
+    # ------------------------------------------------------------------
+    # Escrita (retornam um novo mapa)
+    # ------------------------------------------------------------------
+    def com(self, chave, valor):
+        anterior = self._folha(chave).get(chave)
+        if anterior is None:
+            item = (self._proximo_seq, valor)
+            tamanho, proximo = self._tamanho + 1, self._proximo_seq + 1
+        else:
+            item = (anterior[0], valor)
+            tamanho, proximo = self._tamanho, self._proximo_seq
+        return MapaPersistente(_com(self._raiz, _hash(chave), 0, chave, item), tamanho, proximo)
+
+    def sem(self, chave):
+        if chave not in self._folha(chave):
+            return self
+        return MapaPersistente(_sem(self._raiz, _hash(chave), 0, chave), self._tamanho - 1, self._proximo_seq)
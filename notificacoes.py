@@ -0,0 +1,240 @@
+"""
+Assinaturas de notificações de status e envio em lote.
+- GerenciadorAssinaturas: quais chats seguem quais donos (ou o bolsão todo)
+- FilaEnvio: fila de saída com limite global e por chat (limites do Telegram)
+- Notificador: agrega as transições e envia um resumo periódico por assinante
+"""
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+TODOS = 'todos'
+
+ROTULOS_STATUS = {
+    'novo': 'adicionado',
+    'chamado': 'chamado da fila',
+    'concluido': 'concluído',
+    'cancelado': 'cancelado',
+    'removido': 'removido',
+}
+
+
+def alvo_assinatura(alvo, deposito=None) -> str:
+    """Alvo gravado na assinatura: 'todos' ou o chat_id do dono, com '@CODIGO' fora do depósito padrão.
+
+    Assim quem segue um dono (ou o bolsão todo) num depósito não recebe as
+    transições feitas em outro.
+    """
+    return str(alvo) if deposito is None else f"{alvo}@{deposito}"
+
+
+class GerenciadorAssinaturas:
+    """Persiste as assinaturas em JSON e mantém um índice reverso dono -> chats."""
+
+    def __init__(self, arquivo_assinaturas='assinaturas.json'):
+        self.arquivo = Path(arquivo_assinaturas)
+        self.assinaturas = {}  # chat_id (str) -> lista de alvos (ver alvo_assinatura)
+        self._por_alvo = {}    # alvo -> set(chat_id)
+        self._lock = threading.Lock()
+        self._carregar()
+
+    def _carregar(self):
+        if self.arquivo.exists():
+            try:
+                with open(self.arquivo, 'r') as f:
+                    self.assinaturas = json.load(f)
+                logger.info(f"Carregadas assinaturas de {len(self.assinaturas)} chats")
+            except Exception as e:
+                logger.error(f"Erro ao carregar assinaturas: {e}")
+                self.assinaturas = {}
+        for chat_id, alvos in self.assinaturas.items():
+            for alvo in alvos:
+                self._por_alvo.setdefault(alvo, set()).add(int(chat_id))
+
+    def _salvar(self):
+        try:
+            with open(self.arquivo, 'w') as f:
+                json.dump(self.assinaturas, f, indent=2)
+        except Exception as e:
+            logger.error(f"Erro ao salvar assinaturas: {e}")
+
+    def seguir(self, chat_id: int, alvo: str) -> bool:
+        """Assina um alvo (de alvo_assinatura). Retorna False se já assinava."""
+        with self._lock:
+            alvos = self.assinaturas.setdefault(str(chat_id), [])
+            if alvo in alvos:
+                return False
+            alvos.append(alvo)
+            self._por_alvo.setdefault(alvo, set()).add(chat_id)
+            self._salvar()
+            return True
+
+    def deixar(self, chat_id: int, alvo: str) -> bool:
+        with self._lock:
+            alvos = self.assinaturas.get(str(chat_id), [])
+            if alvo not in alvos:
+                return False
+            alvos.remove(alvo)
+            if not alvos:
+                del self.assinaturas[str(chat_id)]
+            self._por_alvo.get(alvo, set()).discard(chat_id)
+            self._salvar()
+            return True
+
+    def listar(self, chat_id: int) -> list:
+        return list(self.assinaturas.get(str(chat_id), []))
+
+    def destinatarios(self, dono: int, deposito: str = None) -> set:
+        """Chats que devem saber de uma transição feita por `dono` no `deposito`
+        (None no depósito padrão)."""
+        with self._lock:
+            return (self._por_alvo.get(alvo_assinatura(TODOS, deposito), set())
+                    | self._por_alvo.get(alvo_assinatura(dono, deposito), set()))
+
+
+class FilaEnvio:
+    """Fila de saída com limite global (msgs/s) e intervalo mínimo por chat.
+
+    Args:
+        enviar: função (chat_id, texto) -> bool
+        mensagens_por_segundo (float): limite global
+        intervalo_por_chat (float): segundos mínimos entre mensagens ao mesmo chat
+    """
+
+    def __init__(self, enviar, mensagens_por_segundo=25, intervalo_por_chat=1.0):
+        self.enviar = enviar
+        self.intervalo_global = 1.0 / mensagens_por_segundo
+        self.intervalo_por_chat = intervalo_por_chat
+        self._por_chat = {}   # chat_id -> deque de textos
+        self._prontos = []    # heap (pronto_em, chat_id)
+        self._proximo_envio = 0.0
+        self._condicao = threading.Condition()
+        self._pendentes = 0
+        self._thread = None
+
+    def enfileirar(self, chat_id, texto):
+        with self._condicao:
+            fila = self._por_chat.get(chat_id)
+            if fila is None:
+                fila = self._por_chat[chat_id] = deque()
+                heapq.heappush(self._prontos, (time.monotonic(), chat_id))
+            fila.append(texto)
+            self._pendentes += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._laco, name='fila-envio', daemon=True)
+                self._thread.start()
+            self._condicao.notify_all()
+
+    def __len__(self):
+        return self._pendentes
+
+    def _laco(self):
+        while True:
+            with self._condicao:
+                while True:
+                    agora = time.monotonic()
+                    if self._prontos:
+                        inicio = max(self._prontos[0][0], self._proximo_envio)
+                        if inicio <= agora:
+                            break
+                        self._condicao.wait(inicio - agora)
+                    else:
+                        self._condicao.wait()
+                _, chat_id = heapq.heappop(self._prontos)
+                fila = self._por_chat[chat_id]
+                texto = fila.popleft()
+                if fila:
+                    heapq.heappush(self._prontos, (agora + self.intervalo_por_chat, chat_id))
+                else:
+                    del self._por_chat[chat_id]
+                self._proximo_envio = agora + self.intervalo_global
+            try:
+                if not self.enviar(chat_id, texto):
+                    logger.warning("Falha ao enviar mensagem da fila para %s", chat_id)
+            except Exception as e:
+                logger.error(f"Erro ao enviar mensagem da fila: {e}")
+            with self._condicao:
+                self._pendentes -= 1
+                self._condicao.notify_all()
+
+    def drenar(self, timeout):
+        """Espera a fila esvaziar (no máximo `timeout` s). Retorna True se esvaziou."""
+        limite = time.monotonic() + timeout
+        with self._condicao:
+            while self._pendentes:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._condicao.wait(restante)
+        return True
+
+
+class Notificador:
+    """Agrega transições de status e envia um resumo periódico para cada assinante.
+
+    Args:
+        assinaturas (GerenciadorAssinaturas)
+        fila (FilaEnvio)
+        intervalo (float): segundos entre resumos
+        max_linhas (int): transições listadas por resumo (o restante só entra na contagem)
+    """
+
+    def __init__(self, assinaturas, fila, intervalo=60, max_linhas=15):
+        self.assinaturas = assinaturas
+        self.fila = fila
+        self.intervalo = intervalo
+        self.max_linhas = max_linhas
+        self._eventos = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def registrar_transicao(self, dono: int, lh: str, nome: str, status: str, deposito: str = None):
+        """Registra uma transição no `deposito` (None: padrão). O(1); o envio acontece no próximo resumo."""
+        with self._lock:
+            self._eventos.append((time.strftime('%H:%M'), dono, lh, nome, status, deposito))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._laco, name='resumo-notificacoes', daemon=True)
+                self._thread.start()
+
+    def _laco(self):
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                self.enviar_resumos()
+            except Exception as e:
+                logger.error(f"Erro ao enviar resumos de notificação: {e}", exc_info=True)
+
+    def enviar_resumos(self):
+        """Agrupa os eventos pendentes por assinante e enfileira um resumo para cada um."""
+        with self._lock:
+            eventos, self._eventos = self._eventos, []
+        if not eventos:
+            return 0
+
+        por_chat = {}
+        for evento in eventos:
+            for chat_id in self.assinaturas.destinatarios(evento[1], evento[5]):
+                por_chat.setdefault(chat_id, []).append(evento)
+
+        for chat_id, lista in por_chat.items():
+            self.fila.enfileirar(chat_id, self._formatar(lista))
+        logger.info("Resumo de %s transições enviado para %s assinantes", len(eventos), len(por_chat))
+        return len(por_chat)
+
+    def _formatar(self, eventos):
+        contagem = {}
+        for _, _, _, _, status, _ in eventos:
+            contagem[status] = contagem.get(status, 0) + 1
+        partes = [f"{n} {ROTULOS_STATUS.get(s, s)}" for s, n in contagem.items()]
+        linhas = [f"[RESUMO] {len(eventos)} atualização(ões): " + ", ".join(partes)]
+        for hora, _, lh, nome, status, _ in eventos[:self.max_linhas]:
+            linhas.append(f"{hora} {lh} {nome} - {ROTULOS_STATUS.get(status, status)}")
+        if len(eventos) > self.max_linhas:
+            linhas.append(f"... e mais {len(eventos) - self.max_linhas}")
+        return "\n".join(linhas)
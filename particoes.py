@@ -0,0 +1,74 @@
+"""
+Partições diárias do histórico de motoristas.
+Cada dia operacional fechado vira um arquivo compacto (JSON lines + gzip) em
+`historico/AAAA-MM-DD.jsonl.gz`, lido sob demanda quando alguém consulta um
+dia passado.
+"""
+import gzip
+import json
+import logging
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+from cache_lru import CacheLRU
+
+logger = logging.getLogger(__name__)
+
+
+def converter_hora(texto):
+    """'HH:MM' -> datetime.time (usado para a hora da virada do dia)."""
+    horas, minutos = texto.strip().split(':')
+    return time(int(horas), int(minutos))
+
+
+def dia_operacional(agora=None, hora_virada=time(0, 0)):
+    """Dia a que `agora` pertence, considerando que o dia vira às `hora_virada`.
+
+    Ex.: com virada às 06:00, 19/10 às 05:59 ainda pertence ao dia 18/10.
+    """
+    agora = agora or datetime.now()
+    deslocamento = timedelta(hours=hora_virada.hour, minutes=hora_virada.minute)
+    return (agora - deslocamento).date()
+
+
+def proxima_virada(dia, hora_virada=time(0, 0)):
+    """Instante em que o dia operacional `dia` termina."""
+    return datetime.combine(dia + timedelta(days=1), hora_virada)
+
+
+class ArquivoHistorico:
+    """Grava e lê as partições diárias (uma por dia operacional)."""
+
+    def __init__(self, diretorio='historico', dias_em_cache=7):
+        self.diretorio = Path(diretorio)
+        self._cache = CacheLRU(maximo=dias_em_cache)
+
+    def _caminho(self, dia: date):
+        return self.diretorio / f'{dia.isoformat()}.jsonl.gz'
+
+    def arquivar(self, dia: date, registros: list):
+        """Acrescenta os registros à partição do dia (gzip multi-membro se já existir)."""
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        with gzip.open(self._caminho(dia), 'at', encoding='utf-8') as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        self._cache.remover(dia)
+        logger.info("Dia %s arquivado: %s registros", dia.isoformat(), len(registros))
+
+    def carregar(self, dia: date) -> list:
+        """Lê a partição de um dia passado (lista vazia se não existir)."""
+        registros = self._cache.obter(dia)
+        if registros is not None:
+            return registros
+        caminho = self._caminho(dia)
+        if not caminho.exists():
+            return []
+        with gzip.open(caminho, 'rt', encoding='utf-8') as f:
+            registros = [json.loads(linha) for linha in f if linha.strip()]
+        self._cache.definir(dia, registros)
+        return registros
+
+    def dias_disponiveis(self) -> list:
+        if not self.diretorio.exists():
+            return []
+        return sorted(date.fromisoformat(p.name.split('.')[0]) for p in self.diretorio.glob('*.jsonl.gz'))
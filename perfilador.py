@@ -0,0 +1,83 @@
+"""
+Ferramentas de profiling para diagnosticar lentidão em produção.
+- PerfiladorAmostragem: amostra as pilhas de todas as threads por N segundos
+  e grava no formato "collapsed stack" (pronto para flamegraph.pl/speedscope).
+- perfilar_chamada: roda uma única chamada sob cProfile e grava as estatísticas.
+Nada aqui é importado ou executado enquanto o profiling está desligado.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class PerfiladorAmostragem:
+    """Profiler estatístico baseado em sys._current_frames()."""
+
+    def __init__(self, intervalo=0.005, diretorio='.'):
+        self.intervalo = intervalo
+        self.diretorio = Path(diretorio)
+        self.pilhas = Counter()
+        self.amostras = 0
+
+    @staticmethod
+    def _rotulo(frame):
+        codigo = frame.f_code
+        return f"{codigo.co_name} ({Path(codigo.co_filename).name}:{codigo.co_firstlineno})"
+
+    def _amostrar(self, ignorar):
+        nomes = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == ignorar:
+                continue
+            pilha = []
+            while frame is not None:
+                pilha.append(self._rotulo(frame))
+                frame = frame.f_back
+            pilha.append(nomes.get(ident, str(ident)))
+            self.pilhas[';'.join(reversed(pilha))] += 1
+        self.amostras += 1
+
+    def executar(self, segundos):
+        """Amostra por `segundos` (bloqueante) e retorna o caminho do arquivo gerado."""
+        proprio = threading.get_ident()
+        fim = time.monotonic() + segundos
+        while time.monotonic() < fim:
+            self._amostrar(proprio)
+            time.sleep(self.intervalo)
+
+        caminho = self.diretorio / f"perfil_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"
+        with open(caminho, 'w') as f:
+            for pilha, contagem in self.pilhas.most_common():
+                f.write(f"{pilha} {contagem}\n")
+        logger.info("Perfil por amostragem gravado: %s (%s amostras)", caminho, self.amostras)
+        return str(caminho)
+
+
+def perfilar_chamada(funcao, *args, diretorio='.', limite=40, **kwargs):
+    """Executa funcao(*args, **kwargs) sob cProfile.
+
+    Retorna:
+        str: caminho do arquivo .txt com as estatísticas ordenadas por tempo acumulado
+    """
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        funcao(*args, **kwargs)
+    finally:
+        perfil.disable()
+
+    saida = io.StringIO()
+    pstats.Stats(perfil, stream=saida).sort_stats('cumulative').print_stats(limite)
+    caminho = Path(diretorio) / f"cprofile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    caminho.write_text(saida.getvalue())
+    logger.info("Perfil cProfile gravado: %s", caminho)
+    return str(caminho)
@@ -8,6 +8,8 @@ from openpyxl.utils import get_column_letter
 from datetime import datetime
 from pathlib import Path
 import logging
+import os
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +17,8 @@ class PlanilhaFechamento:
     def __init__(self, diretorio='./'):
         self.diretorio = Path(diretorio)
         self.diretorio.mkdir(parents=True, exist_ok=True)
-        self.data_atual = datetime.now().strftime('%d_%m_%Y')
-        self.nome_arquivo = self.diretorio / f'planilha_fechamento_{self.data_atual}.xlsx'
+        # Um /planilha por vez lê e grava o arquivo (pedidos simultâneos usam o mesmo arquivo do dia)
+        self._lock = threading.Lock()
         
         # Cores e estilos
         self.cor_verde = PatternFill(start_color='00B050', end_color='00B050', fill_type='solid')
@@ -36,24 +38,39 @@ class PlanilhaFechamento:
             bottom=Side(style='thin')
         )
     
-    def criar_ou_atualizar_planilha(self, relatorio):
+    def caminho_do_dia(self, dia=None):
+        """Arquivo da planilha de um dia (hoje se `dia` for None).
+
+        Calculado a cada chamada para que um worker de longa duração não
+        continue escrevendo no arquivo de ontem.
+        """
+        dia = dia or datetime.now().date()
+        return self.diretorio / f'planilha_fechamento_{dia.strftime("%d_%m_%Y")}.xlsx'
+
+    def criar_ou_atualizar_planilha(self, relatorio, dia=None):
         """Cria ou atualiza a planilha com os dados do relatório.
         
         Args:
             relatorio (list): Lista de dicts com LH, Nome, Placa, Status, Data
+            dia (date): dia operacional da planilha (padrão: hoje)
         """
+        nome_arquivo = self.caminho_do_dia(dia)
+        with self._lock:
+            return self._criar_ou_atualizar(nome_arquivo, relatorio)
+
+    def _criar_ou_atualizar(self, nome_arquivo, relatorio):
         try:
             # Tenta carregar planilha existente
-            if self.nome_arquivo.exists():
-                wb = load_workbook(self.nome_arquivo)
+            if nome_arquivo.exists():
+                wb = load_workbook(nome_arquivo)
                 ws = wb.active
-                logger.info(f"Planilha existente carregada: {self.nome_arquivo}")
+                logger.info(f"Planilha existente carregada: {nome_arquivo}")
             else:
                 # Cria nova planilha
                 wb = Workbook()
                 ws = wb.active
                 ws.title = "Fechamento"
-                logger.info(f"Nova planilha criada: {self.nome_arquivo}")
+                logger.info(f"Nova planilha criada: {nome_arquivo}")
             
             # Limpa dados existentes mantendo headers
             while ws.max_row > 1:
@@ -69,11 +86,14 @@ class PlanilhaFechamento:
             # Ajusta largura das colunas
             self._ajustar_colunas(ws)
             
-            # Salva a planilha
-            wb.save(self.nome_arquivo)
-            logger.info(f"Planilha atualizada com sucesso: {self.nome_arquivo}")
+            # Salva num temporário e troca de uma vez: quem estiver enviando
+            # o arquivo anterior nunca lê uma planilha pela metade
+            temporario = nome_arquivo.with_suffix('.tmp')
+            wb.save(temporario)
+            os.replace(temporario, nome_arquivo)
+            logger.info(f"Planilha atualizada com sucesso: {nome_arquivo}")
             
-            return str(self.nome_arquivo)
+            return str(nome_arquivo)
         
         except Exception as e:
             logger.error(f"Erro ao criar/atualizar planilha: {e}", exc_info=True)
@@ -123,7 +143,7 @@ class PlanilhaFechamento:
                     cell.alignment = Alignment(horizontal='left', vertical='center')
                     cell.border = self.borda
                 
-                logger.debug(f"Linha {row_idx} preenchida: {lh} {nome} {placa}")
+                logger.debug("Linha %s preenchida: %s %s %s", row_idx, lh, nome, placa)
             
             except Exception as e:
                 logger.error(f"Erro ao preencher linha {row_idx}: {e}")
@@ -141,6 +161,6 @@ class PlanilhaFechamento:
         for col, largura in colunas.items():
             ws.column_dimensions[col].width = largura
     
-    def obter_caminho(self):
+    def obter_caminho(self, dia=None):
         """Retorna o caminho completo do arquivo."""
-        return str(self.nome_arquivo)
+        return str(self.caminho_do_dia(dia))
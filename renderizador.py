@@ -0,0 +1,78 @@
+"""
+Formatação compacta e paginação dos resultados de busca.
+A lista de resultados fica no servidor (cache limitado); o Telegram só recebe
+uma página por vez e o callback_data carrega apenas o cursor e o número da página.
+"""
+import secrets
+
+from cache_lru import CacheLRU
+
+PREFIXO_CALLBACK = 'pg'
+
+
+def formatar_motorista(motorista):
+    """Uma linha por motorista: 'LH | Nome | Placas'."""
+    placas = motorista.get('Placas', '').replace(',', ', ')
+    return f"{motorista.get('LH', '')} | {motorista.get('Nome', '')} | {placas}"
+
+
+class PaginadorResultados:
+    """Gera páginas de resultados com teclado inline de navegação.
+
+    Args:
+        por_pagina (int): motoristas por página
+        maximo_cursores (int): buscas mantidas em memória (as mais antigas saem primeiro)
+        ttl (int): segundos até um cursor expirar
+    """
+
+    def __init__(self, por_pagina=5, maximo_cursores=500, ttl=900):
+        self.por_pagina = por_pagina
+        self._cursores = CacheLRU(maximo=maximo_cursores, ttl=ttl)
+
+    def _total_paginas(self, resultados):
+        return max(1, -(-len(resultados) // self.por_pagina))
+
+    def _renderizar(self, token, titulo, resultados, pagina):
+        total = self._total_paginas(resultados)
+        pagina = min(max(pagina, 0), total - 1)
+        inicio = pagina * self.por_pagina
+        linhas = [formatar_motorista(m) for m in resultados[inicio:inicio + self.por_pagina]]
+
+        cabecalho = f"[OK] {titulo}: {len(resultados)} motorista(s)"
+        if total > 1:
+            cabecalho += f" - página {pagina + 1}/{total}"
+        texto = cabecalho + "\n" + "\n".join(linhas)
+
+        if total == 1:
+            return texto, None
+        botoes = []
+        if pagina > 0:
+            botoes.append({'text': '« Anterior', 'callback_data': f'{PREFIXO_CALLBACK}:{token}:{pagina - 1}'})
+        if pagina < total - 1:
+            botoes.append({'text': 'Próxima »', 'callback_data': f'{PREFIXO_CALLBACK}:{token}:{pagina + 1}'})
+        return texto, {'inline_keyboard': [botoes]}
+
+    def criar(self, chat_id, titulo, resultados):
+        """Registra o resultado (se tiver mais de uma página) e retorna (texto, teclado|None)."""
+        if len(resultados) <= self.por_pagina:
+            return self._renderizar(None, titulo, resultados, 0)
+        token = secrets.token_urlsafe(6)
+        self._cursores.definir(token, (chat_id, titulo, resultados))
+        return self._renderizar(token, titulo, resultados, 0)
+
+    def pagina(self, chat_id, callback_data):
+        """Renderiza a página pedida por um callback 'pg:<token>:<n>'.
+
+        Retorna:
+            tuple|None: (texto, teclado) ou None se o cursor expirou/não pertence ao chat
+        """
+        try:
+            _, token, numero = callback_data.split(':')
+            numero = int(numero)
+        except ValueError:
+            return None
+        cursor = self._cursores.obter(token)
+        if cursor is None or cursor[0] != chat_id:
+            return None
+        _, titulo, resultados = cursor
+        return self._renderizar(token, titulo, resultados, numero)
@@ -0,0 +1,80 @@
+"""
+Batimento (heartbeat) do bot para healthcheck de container.
+O loop de polling grava periodicamente um JSON pequeno com o instante da
+última volta e algumas métricas; o healthcheck só confere a idade do arquivo:
+
+    python saude.py                 # usa $diretorio_dados/saude.json
+    python saude.py --max-idade 60  # falha se o último batimento tiver mais de 60s
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_PADRAO = 'saude.json'
+
+
+class Batimento:
+    """Grava o estado do bot em `arquivo` no máximo a cada `intervalo` segundos."""
+
+    def __init__(self, arquivo, intervalo=5):
+        self.arquivo = Path(arquivo)
+        self.intervalo = intervalo
+        self._iniciado_em = time.time()
+        self._proximo = 0.0
+
+    def registrar(self, **metricas):
+        """Chamado a cada volta do polling; barato quando ainda não deu o intervalo."""
+        agora = time.monotonic()
+        if agora < self._proximo:
+            return False
+        self._proximo = agora + self.intervalo
+        dados = {'ts': time.time(), 'iniciado_em': self._iniciado_em, 'pid': os.getpid(), **metricas}
+        temporario = self.arquivo.with_suffix('.tmp')
+        try:
+            with open(temporario, 'w') as f:
+                json.dump(dados, f)
+            os.replace(temporario, self.arquivo)
+        except OSError as e:
+            logger.warning("Falha ao gravar batimento em %s: %s", self.arquivo, e)
+            return False
+        return True
+
+
+def verificar(arquivo, max_idade=120):
+    """Lê o batimento e diz se está recente.
+
+    Retorna:
+        tuple: (ok: bool, dados: dict|None, idade: float|None)
+    """
+    try:
+        with open(arquivo) as f:
+            dados = json.load(f)
+    except (OSError, ValueError):
+        return False, None, None
+    idade = time.time() - dados.get('ts', 0)
+    return idade <= max_idade, dados, idade
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Healthcheck do bot (idade do último batimento).')
+    parser.add_argument('arquivo', nargs='?',
+                        default=str(Path(os.getenv('diretorio_dados', '.')) / ARQUIVO_PADRAO))
+    parser.add_argument('--max-idade', type=float, default=120, help='segundos (padrão: 120)')
+    args = parser.parse_args(argv)
+
+    ok, dados, idade = verificar(args.arquivo, args.max_idade)
+    if dados is None:
+        print(f'[ERRO] Batimento não encontrado: {args.arquivo}')
+    else:
+        print(f'[{"OK" if ok else "ERRO"}] Último batimento há {idade:.0f}s: {json.dumps(dados)}')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Segredos com hash (PBKDF2) e bloqueio de tentativas de senha por chat.
+
+As senhas do .env podem ser informadas em texto puro ou já como hash
+gerado por este módulo:
+
+    python seguranca.py
+    Senha: ********
+    pbkdf2_sha256$20000$9f1c...$4ab2...
+
+O custo (iterações) fica no próprio hash. O padrão custa ~10 ms por
+verificação, o que ainda cabe na thread de polling; um hash vazado continua
+caro de atacar por força bruta. Quem quiser mais custo gera com
+`python seguranca.py --iteracoes N`.
+"""
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+ALGORITMO = 'pbkdf2_sha256'
+ITERACOES_PADRAO = 20_000
+TAMANHO_MINIMO = 12
+# Chave do processo para as senhas em texto puro do .env: o texto já está no
+# disco, então um KDF não protegeria nada e só custaria tempo no boot
+_CHAVE_PROCESSO = os.urandom(32)
+
+
+def gerar_hash(senha: str, iteracoes: int = ITERACOES_PADRAO, sal: bytes = None) -> str:
+    """Retorna 'pbkdf2_sha256$iteracoes$sal_hex$hash_hex'."""
+    sal = sal or os.urandom(16)
+    derivada = hashlib.pbkdf2_hmac('sha256', senha.encode('utf-8'), sal, iteracoes)
+    return f'{ALGORITMO}${iteracoes}${sal.hex()}${derivada.hex()}'
+
+
+class Segredo:
+    """Senha guardada só como hash; a comparação é em tempo constante.
+
+    Args:
+        valor (str): hash gerado por `gerar_hash` (verificado com PBKDF2) ou a
+            senha em texto puro (guardada como HMAC com a chave do processo;
+            o texto é descartado)
+    """
+
+    __slots__ = ('_iteracoes', '_sal', '_hash')
+
+    def __init__(self, valor: str):
+        if not valor:
+            raise ValueError('Segredo vazio')
+        if not valor.startswith(ALGORITMO + '$'):
+            self._iteracoes = None
+            self._sal = None
+            self._hash = self._derivar(valor)
+            return
+        try:
+            _, iteracoes, sal, derivada = valor.split('$')
+            self._iteracoes = int(iteracoes)
+            self._sal = bytes.fromhex(sal)
+            self._hash = bytes.fromhex(derivada)
+        except ValueError:
+            raise ValueError(f'Hash de senha mal formatado (esperado {ALGORITMO}$iteracoes$sal$hash)')
+
+    def _derivar(self, senha: str) -> bytes:
+        if self._iteracoes is None:
+            return hmac.new(_CHAVE_PROCESSO, senha.encode('utf-8'), hashlib.sha256).digest()
+        return hashlib.pbkdf2_hmac('sha256', senha.encode('utf-8'), self._sal, self._iteracoes)
+
+    def verificar(self, senha: str) -> bool:
+        """True se `senha` corresponde ao segredo (comparação em tempo constante)."""
+        return hmac.compare_digest(self._derivar(senha), self._hash)
+
+    def __repr__(self):
+        return 'Segredo(***)'
+
+
+class ControleTentativas:
+    """Conta senhas erradas por chat e bloqueia com tempo crescente (exponencial).
+
+    A cada `maximo_tentativas` erros seguidos o chat fica bloqueado por
+    `bloqueio_base * 2**n` segundos (n = bloqueios anteriores), até
+    `bloqueio_maximo`. Enquanto bloqueado, as mensagens do chat são
+    descartadas sem resposta. Erros mais antigos que `janela` segundos são
+    esquecidos. A tabela é limitada a `maximo_chats` (os mais antigos saem).
+
+    `bloqueado()` é só um lookup em dict, barato o bastante para rodar em
+    toda mensagem recebida.
+
+    Além do limite por chat, `sobrecarregado()` fica True quando o total de
+    erros no último minuto (somando todos os chats) passa de
+    `maximo_falhas_minuto`; o /login é recusado sem verificar a senha, para
+    que muitos chats juntos não ocupem a thread de polling com PBKDF2.
+    """
+
+    def __init__(self, maximo_tentativas=5, bloqueio_base=30, bloqueio_maximo=3600,
+                 janela=900, maximo_chats=10000, maximo_falhas_minuto=60):
+        self.maximo_tentativas = maximo_tentativas
+        self.bloqueio_base = bloqueio_base
+        self.bloqueio_maximo = bloqueio_maximo
+        self.janela = janela
+        self.maximo_chats = maximo_chats
+        self.maximo_falhas_minuto = maximo_falhas_minuto
+        self._estado = OrderedDict()  # chat_id -> [falhas, ultima_falha, bloqueado_ate, bloqueios]
+        self._falhas_recentes = deque()  # instantes das falhas do último minuto (todos os chats)
+        self._lock = threading.Lock()
+
+    def bloqueado(self, chat_id) -> bool:
+        estado = self._estado.get(chat_id)
+        return estado is not None and estado[2] > time.monotonic()
+
+    def sobrecarregado(self) -> bool:
+        """True se houve falhas demais no último minuto (todos os chats somados)."""
+        limite = time.monotonic() - 60
+        with self._lock:
+            while self._falhas_recentes and self._falhas_recentes[0] <= limite:
+                self._falhas_recentes.popleft()
+            return len(self._falhas_recentes) >= self.maximo_falhas_minuto
+
+    def registrar_falha(self, chat_id) -> float:
+        """Registra uma senha errada.
+
+        Retorna:
+            float: segundos de bloqueio aplicados agora (0 se ainda não bloqueou)
+        """
+        agora = time.monotonic()
+        with self._lock:
+            estado = self._estado.pop(chat_id, None) or [0, 0.0, 0.0, 0]
+            if agora - estado[1] > self.janela:
+                estado[0] = 0
+            estado[0] += 1
+            estado[1] = agora
+            self._falhas_recentes.append(agora)
+            bloqueio = 0.0
+            if estado[0] >= self.maximo_tentativas:
+                bloqueio = min(self.bloqueio_base * 2 ** estado[3], self.bloqueio_maximo)
+                estado[0] = 0
+                estado[2] = agora + bloqueio
+                estado[3] += 1
+            self._estado[chat_id] = estado
+            while len(self._estado) > self.maximo_chats:
+                self._estado.popitem(last=False)
+        if bloqueio:
+            logger.warning("Chat %s bloqueado por %.0fs após senhas incorretas", chat_id, bloqueio)
+        return bloqueio
+
+    def registrar_sucesso(self, chat_id):
+        with self._lock:
+            self._estado.pop(chat_id, None)
+
+    def __len__(self):
+        return len(self._estado)
+
+
+if __name__ == '__main__':
+    import argparse
+    import getpass
+
+    parser = argparse.ArgumentParser(description='Gera o hash de uma senha para o .env')
+    parser.add_argument('--iteracoes', type=int, default=ITERACOES_PADRAO)
+    args = parser.parse_args()
+    senha = getpass.getpass('Senha: ')
+    if len(senha) < TAMANHO_MINIMO:
+        raise SystemExit(f'[ERRO] Use uma senha com pelo menos {TAMANHO_MINIMO} caracteres.')
+    if senha != getpass.getpass('Confirme: '):
+        raise SystemExit('[ERRO] As senhas não conferem.')
+    print(gerar_hash(senha, args.iteracoes))
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Módulos do bot ficam na raiz do repositório
+RAIZ = Path(__file__).resolve().parents[1]
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
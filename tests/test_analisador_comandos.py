@@ -0,0 +1,48 @@
+import pytest
+
+from analisador_comandos import (ComandoAdicionar, Consulta, ErroValidacao, analisar_adicionar,
+                                 analisar_consulta, normalizar_lh, normalizar_placa)
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('abc1234', 'ABC1234'),
+    ('ABC-1234', 'ABC1234'),
+    ('abc 1d23', 'ABC1D23'),
+    ('AB1234', None),
+    ('ABC12345', None),
+    ('1BC1234', None),
+])
+def test_normalizar_placa(texto, esperado):
+    assert normalizar_placa(texto) == esperado
+
+
+def test_normalizar_lh():
+    assert normalizar_lh(' lh12345678901 ') == 'LH12345678901'
+    assert normalizar_lh('LH1234567890') is None
+    assert normalizar_lh('LH12345678901X') is None
+
+
+def test_adicionar_com_nome_composto_e_varias_placas():
+    comando = analisar_adicionar('lh12345678901 Joao da Silva abc1234,def5g67 GHI-8901')
+    assert comando == ComandoAdicionar('LH12345678901', 'Joao da Silva', ('ABC1234', 'DEF5G67', 'GHI8901'))
+    assert comando.placas_texto == 'ABC1234,DEF5G67,GHI8901'
+
+
+def test_adicionar_remove_placas_duplicadas():
+    assert analisar_adicionar('LH12345678901 Ana ABC1234;abc1234').placas == ('ABC1234',)
+
+
+@pytest.mark.parametrize('texto, trecho', [
+    ('LH12345678901 Ana', 'Formato inválido'),
+    ('LH123 Ana ABC1234', 'LH inválida'),
+    ('LH12345678901 Ana XYZ', 'Placa inválida'),
+])
+def test_adicionar_invalido(texto, trecho):
+    with pytest.raises(ErroValidacao, match=trecho):
+        analisar_adicionar(texto)
+
+
+def test_analisar_consulta():
+    assert analisar_consulta('abc1d23') == Consulta('placa', 'ABC1D23')
+    assert analisar_consulta('lh12345678901') == Consulta('lh', 'LH12345678901')
+    assert analisar_consulta('qualquer') is None
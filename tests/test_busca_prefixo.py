@@ -0,0 +1,78 @@
+import random
+import time
+from datetime import timedelta
+
+from busca_inline import BuscaInline
+from estrutura import RoboBolsao
+from particoes import ArquivoHistorico
+
+
+def _varredura(bolsao, prefixo):
+    """Busca ingênua (varre todos os motoristas), para comparar com o índice."""
+    return {lh for lh, m in bolsao.snapshot().motoristas.items()
+            if lh.startswith(prefixo) or any(p.startswith(prefixo) for p in m['Placas'].split(','))}
+
+
+def _buscar(bolsao, prefixo):
+    return {m['LH'] for m in bolsao.pesquisar_prefixo(prefixo, limite=10_000)}
+
+
+def test_indice_de_prefixos_equivale_a_varredura(tmp_path):
+    rng = random.Random(11)
+    bolsao = RoboBolsao(arquivo_historico=ArquivoHistorico(tmp_path / 'historico'))
+    lhs = [f'LH{i:011d}' for i in range(300)]
+    for passo in range(3000):
+        lh = rng.choice(lhs)
+        operacao = rng.random()
+        if operacao < 0.6:
+            placas = ','.join(f'AB{rng.choice("CD")}{rng.randrange(10000):04d}' for _ in range(rng.randint(1, 2)))
+            bolsao.adicionar_motoristas(f'{lh} Motorista {placas}')
+        elif operacao < 0.8:
+            bolsao.remover_motorista(lh)
+        else:
+            bolsao.marcar_concluido(lh)
+        if passo == 1500:
+            bolsao.salvar_estado(tmp_path / 'estado.json')
+            bolsao = RoboBolsao(arquivo_historico=ArquivoHistorico(tmp_path / 'historico'))
+            bolsao.carregar_estado(tmp_path / 'estado.json')
+        if passo % 100 == 0:
+            for prefixo in ('LH0000000001', 'ABC', 'ABD12', 'AB', 'ZZ'):
+                assert _buscar(bolsao, prefixo) == _varredura(bolsao, prefixo)
+    bolsao.virar_dia(bolsao.dia_atual + timedelta(days=1))
+    for prefixo in ('LH', 'ABC1', 'abd'):
+        assert _buscar(bolsao, prefixo) == _varredura(bolsao, prefixo.upper())
+
+
+def test_limite_e_consulta_curta(tmp_path):
+    bolsao = RoboBolsao(arquivo_historico=ArquivoHistorico(tmp_path / 'historico'))
+    for i in range(30):
+        bolsao.adicionar_motoristas(f'LH{i:011d} Motorista ABC{i:04d}')
+    assert len(bolsao.pesquisar_prefixo('ABC', limite=20)) == 20
+    busca = BuscaInline(bolsao, responder=None)
+    assert busca.resultados('ab') == []
+    assert [a['id'] for a in busca.resultados('abc-002')] == [f'LH{i:011d}' for i in range(20, 30)]
+
+
+class DepositoFalso:
+    def __init__(self, bolsao, codigo):
+        self.bolsao = bolsao
+        self.codigo = codigo
+
+
+def test_busca_inline_libera_o_deposito(tmp_path):
+    bolsao = RoboBolsao(arquivo_historico=ArquivoHistorico(tmp_path / 'historico'))
+    bolsao.adicionar_motoristas('LH12345678901 Joao ABC1234')
+    respostas = []
+    liberados = []
+    busca = BuscaInline(None, lambda *args, **kwargs: respostas.append(args), atraso_debounce=0.2,
+                        liberar=liberados.append)
+    primeiro, segundo = DepositoFalso(bolsao, 'CD01'), DepositoFalso(bolsao, 'CD01')
+    busca.receber({'id': '1', 'from': {'id': 7}, 'query': 'AB'}, primeiro)
+    # A consulta seguinte do mesmo usuário substitui a anterior, que é liberada na hora
+    busca.receber({'id': '2', 'from': {'id': 7}, 'query': 'ABC1'}, segundo)
+    assert liberados == [primeiro]
+    limite = time.monotonic() + 2
+    while len(liberados) < 2 and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert liberados == [primeiro, segundo]
+    assert [(r[0], [a['id'] for a in r[1]]) for r in respostas] == [('2', ['LH12345678901'])]
@@ -0,0 +1,73 @@
+import random
+
+from contadores import ATIVO, CANCELADO, CONCLUIDO, Contadores
+from estrutura import RoboBolsao
+from particoes import ArquivoHistorico
+
+
+def _bolsao(tmp_path):
+    return RoboBolsao(arquivo_historico=ArquivoHistorico(tmp_path / 'historico'))
+
+
+def _reconstruidos(bolsao):
+    snap = bolsao.snapshot()
+    return Contadores.de_estado(snap.motoristas, snap.historico)
+
+
+def _confere(bolsao):
+    incremental = bolsao.snapshot().contadores
+    reconstruido = _reconstruidos(bolsao)
+    assert incremental.por_status == reconstruido.por_status
+    # Donos que ficaram zerados só existem no incremental
+    por_dono = {d: c for d, c in incremental.por_dono.items() if c != (0, 0, 0)}
+    assert por_dono == dict(reconstruido.por_dono.items())
+
+
+def test_transicao():
+    contadores = Contadores.vazio().transicao(None, ATIVO, 1).transicao(ATIVO, CONCLUIDO, 1)
+    assert contadores.por_status == (0, 1, 0)
+    assert contadores.por_dono[1] == (0, 1, 0)
+    assert contadores.transicao(CONCLUIDO, CONCLUIDO, 1) is contadores
+    trocado = contadores.transicao(CONCLUIDO, ATIVO, 2, dono_anterior=1)
+    assert trocado.por_status == (1, 0, 0)
+    assert trocado.por_dono[1] == (0, 0, 0) and trocado.por_dono[2] == (1, 0, 0)
+
+
+def test_readicionar_depois_de_remover(tmp_path):
+    bolsao = _bolsao(tmp_path)
+    lh = 'LH12345678901'
+    assert bolsao.adicionar_motoristas(f'{lh} Joao ABC1234', dono=1)['status'] == 'novo'
+    bolsao.remover_motorista(lh)
+    assert bolsao.adicionar_motoristas(f'{lh} Joao ABC1234', dono=1)['status'] == 'novo'
+    assert bolsao.snapshot().contadores.por_status == (1, 0, 0)
+    bolsao.marcar_concluido(lh)
+    assert bolsao.snapshot().contadores.por_status == (0, 1, 0)
+    _confere(bolsao)
+
+
+def test_readicionar_por_outro_dono(tmp_path):
+    bolsao = _bolsao(tmp_path)
+    lh = 'LH12345678901'
+    bolsao.adicionar_motoristas(f'{lh} Joao ABC1234', dono=1)
+    bolsao.remover_motorista(lh)
+    bolsao.adicionar_motoristas(f'{lh} Joao ABC1234', dono=2)
+    assert bolsao.snapshot().contadores.por_dono[2] == (1, 0, 0)
+    _confere(bolsao)
+
+
+def test_operacoes_aleatorias_equivalem_a_de_estado(tmp_path):
+    rng = random.Random(3)
+    bolsao = _bolsao(tmp_path)
+    lhs = [f'LH{i:011d}' for i in range(40)]
+    for _ in range(3000):
+        lh = rng.choice(lhs)
+        operacao = rng.randrange(4)
+        if operacao == 0:
+            bolsao.adicionar_motoristas(f'{lh} Motorista ABC{rng.randrange(10000):04d}', dono=rng.randrange(3))
+        elif operacao == 1:
+            bolsao.remover_motorista(lh)
+        elif operacao == 2:
+            bolsao.marcar_concluido(lh)
+        else:
+            bolsao.marcar_cancelado(lh)
+        _confere(bolsao)
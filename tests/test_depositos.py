@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from depositos import DEPOSITO_PADRAO, Deposito, GerenciadorDepositos
+from estrutura import RoboBolsao
+from particoes import ArquivoHistorico
+
+GRUPO = -100
+PRIVADO = 10
+
+
+def _gerenciador(tmp_path, **opcoes):
+    padrao = Deposito(DEPOSITO_PADRAO, tmp_path,
+                      bolsao=RoboBolsao(arquivo_historico=ArquivoHistorico(tmp_path / 'historico')))
+    return GerenciadorDepositos(tmp_path, padrao, **opcoes)
+
+
+def test_sem_vinculo_todos_usam_o_padrao(tmp_path):
+    depositos = _gerenciador(tmp_path)
+    assert depositos.codigo_do_chat(PRIVADO) == DEPOSITO_PADRAO
+    assert depositos.codigo_do_chat(GRUPO) == DEPOSITO_PADRAO
+    assert depositos.desvincular(GRUPO) is False
+
+
+def test_grupo_com_deposito_proprio_volta_ao_padrao(tmp_path):
+    depositos = _gerenciador(tmp_path, por_grupo=True)
+    assert depositos.codigo_do_chat(GRUPO) == 'GRUPO100'
+    assert depositos.codigo_do_chat(PRIVADO) == DEPOSITO_PADRAO
+    assert depositos.desvincular(GRUPO) is True
+    assert depositos.codigo_do_chat(GRUPO) == DEPOSITO_PADRAO
+    # O vínculo ao padrão sobrevive ao restart
+    assert _gerenciador(tmp_path, por_grupo=True).codigo_do_chat(GRUPO) == DEPOSITO_PADRAO
+
+
+def test_vincular_so_codigos_configurados(tmp_path):
+    assert _gerenciador(tmp_path).vincular(PRIVADO, 'CD01')['status'] == 'erro'
+    depositos = _gerenciador(tmp_path, permitidos={'CD01'})
+    assert depositos.vincular(PRIVADO, 'ZZ99')['status'] == 'erro'
+    assert depositos.vincular(PRIVADO, 'padrao')['status'] == 'erro'
+    assert depositos.vincular(PRIVADO, ' cd01 ')['status'] == 'sucesso'
+    assert depositos.codigo_do_chat(PRIVADO) == 'CD01'
+    assert depositos.desvincular(PRIVADO) is True
+    assert depositos.codigo_do_chat(PRIVADO) == DEPOSITO_PADRAO
+
+
+def test_deposito_sem_dados_nao_cria_diretorio(tmp_path):
+    depositos = _gerenciador(tmp_path, ocioso_segundos=0)
+    with depositos.usar('CD01') as deposito:
+        assert deposito.gerenciador_usuarios.esta_autenticado(PRIVADO) is False
+    depositos.manutencao()
+    assert depositos.carregados() == [depositos.padrao]
+    assert not (tmp_path / 'depositos').exists()
+
+
+def test_despejo_por_orcamento_grava_e_recarrega(tmp_path):
+    # Orçamento para o padrão e mais um depósito vazio
+    depositos = _gerenciador(tmp_path, orcamento_bytes=3 * 64 * 1024)
+    with depositos.usar('CD01') as deposito:
+        deposito.bolsao.adicionar_motoristas('LH12345678901 Joao ABC1234')
+    with depositos.usar('CD02'):
+        # CD01 (o menos usado) sai para caber no orçamento; CD02 está em uso
+        assert [d.codigo for d in depositos.carregados()] == [DEPOSITO_PADRAO, 'CD02']
+    assert (tmp_path / 'depositos' / 'CD01' / 'estado_bolsao.json').exists()
+    with depositos.usar('CD01') as deposito:
+        assert 'LH12345678901' in deposito.bolsao.snapshot().motoristas
+    with depositos.usar('CD02') as deposito:
+        assert not deposito.bolsao.snapshot().motoristas
+
+
+def test_deposito_em_uso_nao_e_despejado(tmp_path):
+    depositos = _gerenciador(tmp_path, orcamento_bytes=0, ocioso_segundos=0)
+    with depositos.usar('CD01') as deposito:
+        depositos.manutencao()
+        assert deposito in depositos.carregados()
+    depositos.manutencao()
+    assert depositos.carregados() == [depositos.padrao]
+
+
+def test_virada_grava_o_novo_dia(tmp_path):
+    depositos = _gerenciador(tmp_path)
+    with depositos.usar('CD01') as deposito:
+        bolsao = deposito.bolsao
+        bolsao.adicionar_motoristas('LH12345678901 Joao ABC1234')
+        bolsao.marcar_concluido('LH12345678901')
+        dia_fechado = bolsao.dia_atual - timedelta(days=1)
+        bolsao.dia_atual = dia_fechado
+        bolsao._proxima_virada = datetime.now() - timedelta(seconds=1)
+        # Estado do dia antigo gravado antes (despejo ou desligamento anterior)
+        deposito.salvar()
+    depositos.manutencao()
+
+    # Restart sem desligamento limpo: o dia fechado não é arquivado de novo
+    for _ in range(2):
+        depositos = _gerenciador(tmp_path)
+        with depositos.usar('CD01') as deposito:
+            depositos.manutencao()
+            assert not deposito.bolsao.snapshot().historico
+    assert len(deposito.bolsao.arquivo_historico.carregar(dia_fechado)) == 1
+
+
+def test_deposito_fixado_fora_do_usar_nao_e_despejado(tmp_path):
+    depositos = _gerenciador(tmp_path, orcamento_bytes=0, ocioso_segundos=0)
+    with depositos.usar('CD01') as deposito:
+        # Tarefa em segunda plano criada durante a mensagem
+        depositos.fixar(deposito)
+    depositos.manutencao()
+    assert deposito in depositos.carregados()
+    depositos.liberar(deposito)
+    depositos.manutencao()
+    assert deposito not in depositos.carregados()
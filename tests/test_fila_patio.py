@@ -0,0 +1,72 @@
+import random
+
+from estrutura import RoboBolsao
+from fila_patio import Fenwick, FilaPatio, HistogramaEspera
+from particoes import ArquivoHistorico
+
+
+def test_fenwick_prefixo_e_kesimo():
+    rng = random.Random(1)
+    valores = [rng.randrange(3) for _ in range(100)]
+    arvore = Fenwick.de_lista(valores)
+    for i in range(len(valores)):
+        assert arvore.prefixo(i) == sum(valores[:i + 1])
+    for k in range(1, sum(valores) + 1):
+        indice = arvore.kesimo(k)
+        assert arvore.prefixo(indice) >= k and (indice == 0 or arvore.prefixo(indice - 1) < k)
+
+
+def test_fila_equivale_a_uma_lista():
+    rng = random.Random(5)
+    fila = FilaPatio()
+    modelo = []
+    # Mais entradas que CAPACIDADE_MINIMA, para passar pela reorganização
+    for i in range(6000):
+        operacao = rng.random()
+        if operacao < 0.5:
+            lh = f'LH{rng.randrange(3000):011d}'
+            assert fila.entrar(lh, chegada=i) == (lh not in modelo)
+            if lh not in modelo:
+                modelo.append(lh)
+        elif operacao < 0.8 and modelo:
+            lh = rng.choice(modelo)
+            assert fila.sair(lh, agora=i) is not None
+            modelo.remove(lh)
+        else:
+            chamado = fila.chamar(agora=i)
+            assert (chamado[0] if chamado else None) == (modelo.pop(0) if modelo else None)
+        assert len(fila) == len(modelo)
+        if modelo:
+            lh = rng.choice(modelo)
+            assert fila.posicao(lh) == modelo.index(lh) + 1
+    assert fila.primeiros(20) == modelo[:20]
+    assert [lh for lh, _ in fila.itens()] == modelo
+    assert fila.posicao('LH99999999999') is None and fila.sair('LH99999999999') is None
+
+
+def test_percentis_de_espera():
+    esperas = HistogramaEspera()
+    assert esperas.percentil(50) is None and esperas.media_minutos() is None
+    for minuto in range(1, 101):
+        esperas.registrar(minuto * 60 + 30)
+    assert esperas.percentil(50) == 50
+    assert esperas.percentil(95) == 95
+    assert esperas.percentil(100) == 100
+    esperas.registrar(3 * 24 * 3600)
+    assert esperas.percentil(100) == HistogramaEspera.MAX_MINUTOS
+
+
+def test_bolsao_salva_e_restaura_a_fila(tmp_path):
+    bolsao = RoboBolsao(arquivo_historico=ArquivoHistorico(tmp_path / 'historico'))
+    lhs = [f'LH{i:011d}' for i in range(5)]
+    for lh in lhs:
+        bolsao.adicionar_motoristas(f'{lh} Motorista ABC1234')
+    assert bolsao.chamar_proximo()['dados']['LH'] == lhs[0]
+    bolsao.marcar_concluido(lhs[2])
+    bolsao.salvar_estado(tmp_path / 'estado.json')
+
+    restaurado = RoboBolsao(arquivo_historico=ArquivoHistorico(tmp_path / 'historico'))
+    assert restaurado.carregar_estado(tmp_path / 'estado.json')
+    assert restaurado.fila.primeiros(10) == [lhs[1], lhs[3], lhs[4]]
+    assert restaurado.posicao_na_fila(lhs[3])[0][1] == 2
+    assert restaurado.estado_fila()['aguardando'] == 3
@@ -0,0 +1,81 @@
+import pytest
+
+import gerenciador_usuarios
+from gerenciador_usuarios import PAPEL_ADMIN, PAPEL_OPERADOR, PAPEL_SUPERVISOR, GerenciadorUsuarios
+
+HORA = 3600
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1_000_000.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(gerenciador_usuarios.time, 'time', relogio)
+    return relogio
+
+
+def _usuarios(tmp_path, **opcoes):
+    return GerenciadorUsuarios(tmp_path / 'usuarios.json', ttl_sessao=HORA, retencao=24 * HORA, **opcoes)
+
+
+def test_sessao_expira_no_ttl(tmp_path, relogio):
+    usuarios = _usuarios(tmp_path)
+    usuarios.autenticar(1, 'x')
+    relogio.agora += HORA - 1
+    assert usuarios.esta_autenticado(1)
+    relogio.agora += 1
+    assert not usuarios.esta_autenticado(1)
+    assert not _usuarios(tmp_path).esta_autenticado(1)
+
+
+def test_novo_login_renova_a_sessao(tmp_path, relogio):
+    usuarios = _usuarios(tmp_path)
+    usuarios.autenticar(1, 'x')
+    relogio.agora += HORA - 60
+    assert usuarios.autenticar(1, 'x')['status'] == 'sucesso'
+    relogio.agora += HORA - 60
+    assert usuarios.esta_autenticado(1)
+    # A renovação também vai para o arquivo
+    assert _usuarios(tmp_path).esta_autenticado(1)
+
+
+def test_papeis_em_ordem(tmp_path, relogio):
+    usuarios = _usuarios(tmp_path)
+    usuarios.autenticar(1, 'x', papel=PAPEL_SUPERVISOR)
+    assert usuarios.tem_papel(1, PAPEL_OPERADOR) and usuarios.tem_papel(1, PAPEL_SUPERVISOR)
+    assert not usuarios.tem_papel(1, PAPEL_ADMIN)
+    # Senha de papel menor renova sem rebaixar; de papel maior promove
+    usuarios.autenticar(1, 'x', papel=PAPEL_OPERADOR)
+    assert usuarios.papel(1) == PAPEL_SUPERVISOR
+    usuarios.autenticar(1, 'x', papel=PAPEL_ADMIN)
+    assert usuarios.papel(1) == PAPEL_ADMIN
+    assert not usuarios.tem_papel(2, PAPEL_OPERADOR)
+
+
+def test_compactar_remove_so_vencidos_alem_da_retencao(tmp_path, relogio):
+    usuarios = _usuarios(tmp_path)
+    usuarios.autenticar(1, 'x')
+    usuarios.adicionar_motorista(1, 'LH12345678901')
+    relogio.agora += 12 * HORA
+    usuarios.autenticar(2, 'x')
+    relogio.agora += 14 * HORA
+    # 1 venceu há 25 h (passa da retenção); 2 venceu há 13 h e mantém os motoristas
+    assert usuarios.compactar() == 1
+    assert _usuarios(tmp_path).obter_motoristas_usuario(1) == []
+    usuarios.autenticar(2, 'x')
+    assert usuarios.esta_autenticado(2) and '2' in _usuarios(tmp_path).usuarios
+
+
+def test_logout(tmp_path, relogio):
+    usuarios = _usuarios(tmp_path)
+    usuarios.autenticar(1, 'x')
+    assert usuarios.encerrar_sessao(1) and not usuarios.esta_autenticado(1)
+    assert not usuarios.encerrar_sessao(1)
+    assert not _usuarios(tmp_path).esta_autenticado(1)
@@ -0,0 +1,77 @@
+import random
+
+from mapa_persistente import LIMITE_FOLHA, MapaPersistente
+
+
+class ChaveColidindo:
+    """Chave com hash fixo, para forçar colisões até o fim da trie."""
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __hash__(self):
+        return 42
+
+    def __eq__(self, outra):
+        return isinstance(outra, ChaveColidindo) and outra.nome == self.nome
+
+
+def test_escritas_aleatorias_equivalem_a_um_dict():
+    rng = random.Random(7)
+    mapa = MapaPersistente()
+    modelo = {}
+    for i in range(20000):
+        chave = f'LH{rng.randrange(3000):011d}'
+        if rng.random() < 0.3:
+            mapa = mapa.sem(chave)
+            modelo.pop(chave, None)
+        else:
+            mapa = mapa.com(chave, i)
+            modelo[chave] = i
+    assert len(mapa) == len(modelo)
+    assert dict(mapa.items()) == modelo
+    assert sorted(mapa) == sorted(modelo)
+    assert all(mapa[chave] == valor for chave, valor in modelo.items())
+    assert 'inexistente' not in mapa and mapa.get('inexistente', 'x') == 'x'
+
+
+def test_versoes_antigas_nao_mudam():
+    base = MapaPersistente.de_itens((str(i), i) for i in range(1000))
+    nova = base.com('500', 'novo').sem('10').com('extra', 1)
+    assert base['500'] == 500 and '10' in base and 'extra' not in base
+    assert len(base) == 1000 and len(nova) == 1000
+    assert nova['500'] == 'novo' and '10' not in nova
+
+
+def test_ordenado_mantem_ordem_de_insercao():
+    mapa = MapaPersistente.de_itens([('b', 1), ('a', 2)])
+    mapa = mapa.com('c', 3).com('a', 20).sem('b').com('b', 4)
+    assert mapa.ordenado() == [('a', 20), ('c', 3), ('b', 4)]
+
+
+def test_de_itens_igual_a_escritas_uma_a_uma():
+    itens = [(f'k{i}', i) for i in range(5000)]
+    construido = MapaPersistente.de_itens(itens)
+    incremental = MapaPersistente()
+    for chave, valor in itens:
+        incremental = incremental.com(chave, valor)
+    assert construido.ordenado() == incremental.ordenado() == itens
+
+
+def test_colisoes_de_hash():
+    chaves = [ChaveColidindo(i) for i in range(LIMITE_FOLHA * 3)]
+    mapa = MapaPersistente()
+    for i, chave in enumerate(chaves):
+        mapa = mapa.com(chave, i)
+    assert [mapa[chave] for chave in chaves] == list(range(len(chaves)))
+    for chave in chaves[::2]:
+        mapa = mapa.sem(chave)
+    assert len(mapa) == len(chaves) // 2
+    assert all(chave not in mapa for chave in chaves[::2])
+
+
+def test_remover_tudo_volta_a_vazio():
+    mapa = MapaPersistente.de_itens((i, i) for i in range(2000))
+    for i in range(2000):
+        mapa = mapa.sem(i)
+    assert len(mapa) == 0 and list(mapa) == [] and mapa._raiz == {}
@@ -0,0 +1,82 @@
+import pytest
+
+import seguranca
+from seguranca import ControleTentativas, Segredo, gerar_hash
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(seguranca.time, 'monotonic', relogio)
+    return relogio
+
+
+def test_segredo_em_texto_puro():
+    segredo = Segredo('senha-do-deposito')
+    assert segredo.verificar('senha-do-deposito')
+    assert not segredo.verificar('senha-do-deposit')
+    assert 'senha' not in repr(segredo)
+
+
+def test_segredo_com_hash_gerado():
+    valor = gerar_hash('senha-do-deposito', iteracoes=1000)
+    assert valor.startswith('pbkdf2_sha256$1000$')
+    segredo = Segredo(valor)
+    assert segredo.verificar('senha-do-deposito')
+    assert not segredo.verificar(valor)
+    # Mesmo texto, sal diferente
+    assert gerar_hash('x', iteracoes=1000) != gerar_hash('x', iteracoes=1000)
+
+
+@pytest.mark.parametrize('valor', ['', 'pbkdf2_sha256$mil$aa$bb', 'pbkdf2_sha256$1000$zz$bb', 'pbkdf2_sha256$1000$aa'])
+def test_segredo_invalido(valor):
+    with pytest.raises(ValueError):
+        Segredo(valor)
+
+
+def test_bloqueio_cresce_a_cada_bloqueio(relogio):
+    tentativas = ControleTentativas(maximo_tentativas=3, bloqueio_base=30, bloqueio_maximo=100)
+    bloqueios = []
+    for _ in range(3):
+        assert tentativas.registrar_falha(1) == 0 and tentativas.registrar_falha(1) == 0
+        bloqueios.append(tentativas.registrar_falha(1))
+        assert tentativas.bloqueado(1) and not tentativas.bloqueado(2)
+        relogio.agora += bloqueios[-1]
+        assert not tentativas.bloqueado(1)
+    assert bloqueios == [30, 60, 100]
+
+
+def test_sucesso_e_janela_zeram_as_falhas(relogio):
+    tentativas = ControleTentativas(maximo_tentativas=2, janela=60)
+    tentativas.registrar_falha(1)
+    tentativas.registrar_sucesso(1)
+    assert tentativas.registrar_falha(1) == 0
+    relogio.agora += 61
+    assert tentativas.registrar_falha(1) == 0
+    assert tentativas.registrar_falha(1) > 0
+
+
+def test_tabela_limitada(relogio):
+    tentativas = ControleTentativas(maximo_chats=100)
+    for chat_id in range(250):
+        tentativas.registrar_falha(chat_id)
+    assert len(tentativas) == 100
+
+
+def test_limite_global_de_falhas(relogio):
+    tentativas = ControleTentativas(maximo_falhas_minuto=10)
+    for chat_id in range(9):
+        tentativas.registrar_falha(chat_id)
+    assert not tentativas.sobrecarregado()
+    tentativas.registrar_falha(99)
+    assert tentativas.sobrecarregado()
+    relogio.agora += 60
+    assert not tentativas.sobrecarregado()